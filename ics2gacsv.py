@@ -46,7 +46,7 @@ def __myhelp(fname):
     sys.exit()
 
 if __name__ == '__main__':
-    if libicsconvcsv.VERSION != "3.1":
+    if libicsconvcsv.VERSION != "3.2":
         print("ERROR: ファイルが古いです。最新のics2gacsv.pyとlibicsconvcsv.pyをダウンロードしてください。", file=sys.stderr)
         sys.exit(1)
 
@@ -72,7 +72,7 @@ if __name__ == '__main__':
     try:
         argv = ext_argv + sys.argv[1:]
 
-        argv, flag = libicsconvcsv.parse_args(argv, 3, short_opt, long_opt)
+        argv, flag = libicsconvcsv.parse_args(argv, 3, short_opt, long_opt, use_cache=True)
         if argv is None:
             __myhelp(exec_filename)
 
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- python -*-
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2025-2026 MATSUMOTO Ryuji.
+# License: Apache License 2.0
+#
+import os
+import sys
+import re
+import csv
+import glob
+import libicsconvcsv
+
+__doc__=f"""複数のICS(iCalendar)を一括でCSVに変換。
+
+icsconvcsv.pyを何度も実行する代わりに、ICSファイルを並列に変換します。
+ICSファイルの大きいものから順に変換を始めます。
+
+使用方法:
+
+   $ python3 {sys.argv[0]} [OPTION] 期間 入力フォルダ 出力フォルダ
+   $ python3 {sys.argv[0]} [OPTION] 一覧.csv
+
+   入力フォルダの*.icsを、出力フォルダに同名の*.csvとして変換する例:
+   $ python3 {sys.argv[0]} 202512 ics/ csv/
+
+   一覧.csvに書いたICSファイルを変換する例:
+   $ python3 {sys.argv[0]} --workers=4 jobs.csv
+
+一覧.csvは1行に1個、「入力.ics,期間,出力.csv」の形式で書きます。
+ファイル名は一覧.csvのあるフォルダからの相対パスでも構いません。
+「#」で始まる行と空行は無視します。書式の誤った行と期間を決められない
+行はエラーを表示して変換せず、残りの行を変換します。
+
+   # 一覧.csvの例
+   staff1.ics,202512,staff1-202512.csv
+   staff2.ics,guess,staff2-202512.csv
+
+期間の指定方法は下記の「必須引数」の「期間」を参照ください。
+すべての変換が終わると、結果の集計を表示します。失敗した変換が有れば、
+終了ステータスは1です。
+"""
+__doc__+=libicsconvcsv.HELP_PART1
+
+__doc__+=libicsconvcsv.HELP_PART2
+__doc__+=libicsconvcsv.HELP_LICENSE
+
+
+########################################
+
+def __myhelp(fname):
+    help(fname)
+    help("libicsconvcsv")
+    sys.exit()
+
+def read_manifest(fname: str) -> tuple:
+    """
+    一覧.csvを読み込み、(入力ICS, 期間, 出力CSV)のtupleのlistと、
+    書式の誤った行の数を返す。書式の誤った行はエラーを表示して読み飛ばす。
+    """
+    base = os.path.dirname(fname)
+    jobs = []
+    bad = 0
+    with open(fname, 'r', encoding='utf-8-sig', newline="") as f:
+        for n, row in enumerate(csv.reader(f), 1):
+            if len(row) == 0 or row[0].strip() == "" or row[0].startswith('#'):
+                continue
+            if len(row) != 3:
+                print(f"ERROR: {fname}の{n}行目の書式の誤り: {row}", file=sys.stderr)
+                bad += 1
+                continue
+            ics, timerange, out = [i.strip() for i in row]
+            jobs.append((os.path.join(base, ics), timerange, os.path.join(base, out)))
+    return jobs, bad
+
+def resolve_timerange(job: tuple) -> tuple:
+    """
+    (入力ICS, 期間の文字列, 出力CSV)の期間をtimerangeの値にする。
+    期間を決められなければエラーを表示して、timerangeをNoneにする。
+    ics2csv_batch()はtimerangeがNoneの変換を失敗として数える。
+    """
+    ics, timerange, out = job
+    try:
+        return (ics, libicsconvcsv.guess_timerange(timerange, ics, out), out)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return (ics, None, out)
+
+def scan_dir(timerange: str, ics_dir: str, csv_dir: str) -> list:
+    """
+    入力フォルダの*.icsから、(入力ICS, 期間, 出力CSV)のtupleのlistを返す。
+    """
+    if not os.path.isdir(ics_dir):
+        raise ValueError(f"ERROR: 入力フォルダ「{ics_dir}」が存在しません。")
+    if not os.path.isdir(csv_dir):
+        raise ValueError(f"ERROR: 出力フォルダ「{csv_dir}」が存在しません。")
+
+    jobs = []
+    for ics in sorted(glob.glob(os.path.join(ics_dir, "*.ics"))):
+        out = os.path.join(csv_dir, re.sub(r'\.ics$', ".csv", os.path.basename(ics)))
+        jobs.append((ics, timerange, out))
+    return jobs
+
+if __name__ == '__main__':
+    if libicsconvcsv.VERSION != "3.2":
+        print("ERROR: ファイルが古いです。最新のicsbatch.pyとlibicsconvcsv.pyをダウンロードしてください。",file=sys.stderr)
+        sys.exit(1)
+
+    exec_filename = os.path.basename(__file__)
+    exec_filename = re.sub(r'\.py$', "", exec_filename)
+
+    flag = None
+
+    try:
+        argv = sys.argv[1:]
+
+        argv, flag = libicsconvcsv.parse_args(argv, -1, use_cache=True)
+        if argv is None:
+            __myhelp(exec_filename)
+
+        bad = 0
+        if len(argv) == 1:
+            jobs, bad = read_manifest(argv[0])
+        elif len(argv) == 3:
+            jobs = scan_dir(argv[0], argv[1], argv[2])
+        else:
+            raise ValueError("ERROR: 引数を間違えてます。")
+
+        if len(jobs) == 0:
+            raise ValueError("ERROR: 変換するICSファイルがありません。")
+
+        jobs = [resolve_timerange(job) for job in jobs]
+
+        results = libicsconvcsv.ics2csv_batch(flag, jobs)
+
+    except (ValueError, OSError) as e:
+        print("ERROR: ", e,  file=sys.stderr)
+        print("ERROR:  引数 -h でヘルプが表示されます。", file=sys.stderr)
+        sys.exit(1)
+
+    if bad > 0:
+        print(f"WARNING: 一覧の書式の誤りで変換しなかった行: {bad}行", file=sys.stderr)
+    if None in results or bad > 0:
+        sys.exit(1)
+#End of main()
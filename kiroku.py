@@ -103,7 +103,7 @@ def __myhelp(fname):
     sys.exit()
 
 if __name__ == '__main__':
-    if libicsconvcsv.VERSION != "3.1":
+    if libicsconvcsv.VERSION != "3.2":
         print("ERROR: ファイルが古いです。最新のkiroku.pyとlibicsconvcsv.pyをダウンロードしてください。", file=sys.stderr)
         sys.exit(1)
 
@@ -120,6 +120,7 @@ if __name__ == '__main__':
     short_opt = 'hWzkmE:'
     long_opt = ["format-garoon"]
     long_opt += ["help", "enable-file-exist-test", "add-summary-head="]
+    long_opt += ["no-cache"]
 
     # ライブラリの挙動変更。
 
@@ -147,7 +148,7 @@ if __name__ == '__main__':
     try:
         argv = ext_argv + sys.argv[1:]
 
-        argv, flag = libicsconvcsv.parse_args(argv, 1, short_opt, long_opt)
+        argv, flag = libicsconvcsv.parse_args(argv, 1, short_opt, long_opt, use_cache=True)
         if argv is None:
             __myhelp(exec_filename)
 
@@ -187,7 +188,9 @@ if __name__ == '__main__':
     # CSV変換
     # TODO: 単発で動かした場合と本プログラムで差分がないか確認
     # TODO: Windowsで確認。とくにファイルの日付確認。
+    # ICSファイルの読み込みと繰返しスケジュールの展開は1回のみ行う。
+    cal = libicsconvcsv.ConvertedCalendar(flag, __INPUT_ICS_FILENAME, list(csv_fname_list.keys()))
     for key, value in csv_fname_list.items():
-        libicsconvcsv.ics2csv(flag, __INPUT_ICS_FILENAME, value, key)
+        cal.write_csv(value, key)
 
 #End of main()
@@ -10,11 +10,22 @@ import io
 import os
 import re
 import datetime
+import bisect
 import zoneinfo
 import csv
 import getopt
+import mmap
 import time
 import codecs
+import hashlib
+import json
+import copy
+import shutil
+import threading
+import contextlib
+import contextvars
+import concurrent.futures
+import importlib.metadata
 import dateutil
 import vobject
 
@@ -44,7 +55,7 @@ ICS to CSV コンバータ icsconvcsv.py が利用するライブラリ。
 __doc__ += HELP_LICENSE
 
 #######################################
-VERSION = "3.1"
+VERSION = "3.2"
 #########################################################################
 
 # utf_8_sig: WindowsでBOMをつける。
@@ -73,7 +84,7 @@ CSVFormat = Enum('CSVFormat',\
                  ])
 
 # 日時の出力形式。
-# slash_ymd: 2025/12/31, 12:33  日本式順序。順番変更する場合は「F.output_sort」関連の修正必要。
+# slash_ymd: 2025/12/31, 12:33  日本式順序。
 # ISO_8601 basic: 20251231, 1233
 # ISO_8601 extended: 2025/12/31, 12:33
 # Ref: https://ja.wikipedia.org/wiki/ISO_8601
@@ -108,6 +119,13 @@ class ConstDat:
     #
     # 特殊な文字列
     UNREF = "(REFERENCE DATA DOES NOT EXIST)"
+    # Teamsの会議インフォメーションを消した行の代わりの文字列
+    REMOVE_TEAMS = "(REMOVE TEAMS INFOMATION)"
+    # Teamsの会議インフォメーションの始まりの目印のデフォルト。
+    # この文字列を含む行から後を消す。2025/9現在のフォーマット。
+    TEAMS_INFOMATION_MARKERS = ("Microsoft Teams ヘルプが必要ですか", "." * 27, "_" * 27)
+    # str.splitlines()が行の区切りとする文字
+    LINE_BREAK_CHARS = "\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029"
     # 未定義を示す文字列。変更不可(これを書き換える場合は一部正規表現の修正が必要)
     NA = "(N/A)"
 
@@ -121,6 +139,243 @@ class ConstDat:
     CSV_TABLE_X_MICROSOFT_CDO_BUSYSTATUS = \
         {"WORKINGELSEWHERE":0, "TENTATIVE":1, "BUSY":2, "FREE":3, "OOF":4}
 
+    # CSVフォーマットの定義。キーはCSVFormatの名前。PreSetup.set_format()で使う。
+    # 引数--format-fileで読み込むJSONファイルも同じ形式。
+    #
+    # encoding, allday, datetime: 文字コード(CharSet)、終日スケジュールの日付の
+    #     書式(AllDayFormat)、日時の書式(DateTimeFormat)のdefault。Enumの名前で書く。
+    # allday_fixed: trueなら終日スケジュールの日付の書式の指定を無視する。
+    # flags: trueにするFeatureFlagsの変数。CSV_FORMAT_FLAGSのみ。
+    # extend_summary_head: trueなら予定の選択肢を拡張する(引数-m)。
+    # columns: CSVの各列の[ヘッダ, ICSの要素]。ICSの要素がnullの列は"(N/A)"。
+    #     「:」が入ってるのは特殊な値(Column.SPECIALとColumn.TIME)。
+    CSV_FORMATS = {
+        "garoon": {
+            "encoding": "shift_jis", "allday": "today", "datetime": "slash_ymd",
+            "columns": [["開始日", "DTSTART:DAY"], ["開始時刻", "DTSTART:TIME"],
+                        ["終了日", "DTEND:DAY"], ["終了時刻", "DTEND:TIME"],
+                        ["予定", "SUMMARY:H"], ["予定詳細", "SUMMARY"], ["メモ", "DESCRIPTION"]],
+        },
+        "simple": {
+            "encoding": "utf_8", "allday": "nextday", "datetime": "extended",
+            "columns": [["DTSTART:DAY", "DTSTART:DAY"], ["DTSTART:TIME", "DTSTART:TIME"],
+                        ["DTEND:DAY", "DTEND:DAY"], ["DTEND:TIME", "DTEND:TIME"],
+                        ["SUMMARY", "SUMMARY"], ["DESCRIPTION", "DESCRIPTION"],
+                        ["X-MICROSOFT-CDO-BUSYSTATUS", "X-MICROSOFT-CDO-BUSYSTATUS"],
+                        ["CATEGORIES", "CATEGORIES"]],
+        },
+        "outlookclassic": {
+            "encoding": "utf_8", "allday": "addtime", "datetime": "slash_ymd",
+            "allday_fixed": True,
+            "columns": [["件名", "SUMMARY"], ["開始日", "DTSTART:DAY"], ["開始時刻", "DTSTART:TIME"],
+                        ["終了日", "DTEND:DAY"], ["終了時刻", "DTEND:TIME"],
+                        ["終日イベント", "X:ALLDAY_EVENT"], ["アラーム オン/オフ", None],
+                        ["アラーム日付", None], ["アラーム時刻", None],
+                        ["会議の開催者", "ORGANIZER:CN"], ["必須出席者", "ATTENDEE:CN:RSVP:TRUE"],
+                        ["任意出席者", "ATTENDEE:CN:RSVP:FALSE"], ["リソース", None],
+                        ["プライベート", None], ["経費情報", None],
+                        ["公開する時間帯の種類", "X-MICROSOFT-CDO-BUSYSTATUS:NUM"],
+                        ["支払い条件", None], ["場所", None], ["内容", "DESCRIPTION"],
+                        ["秘密度", None], ["分類", None], ["優先度", None]],
+        },
+        # Outlookと GaroonのICS比較用。
+        "cmpouga": {
+            "encoding": "utf_8", "allday": "todayremtime", "datetime": "slash_ymd",
+            "flags": ["remove_tail_cr", "enhanced_gyoumunum"], "extend_summary_head": True,
+            "columns": [["開始日", "DTSTART:DAY"], ["開始時刻", "DTSTART:TIME"],
+                        ["終了日", "DTEND:DAY"], ["終了時刻", "DTEND:TIME"],
+                        ["予定", "SUMMARY:H"], ["予定詳細", "SUMMARY"], ["メモ", "DESCRIPTION"]],
+        },
+        # outlookの全出力と、description無しのデータ(*-limit2)の比較用。
+        "omitdescription": {
+            #GaroonとOutlook比較時はこれを入れないと古いデータの
+            "encoding": "utf_8", "allday": "todayremtime", "datetime": "extended",
+            "columns": [["DTSTART:DAY", "DTSTART:DAY"], ["DTSTART:TIME", "DTSTART:TIME"],
+                        ["DTEND:DAY", "DTEND:DAY"], ["DTEND:TIME", "DTEND:TIME"],
+                        ["SUMMARY", "SUMMARY"]],
+        },
+        # debug1は原則変更しない。debug2以降は頻繁に変更の可能性あり。
+        "debug1": {
+            "encoding": "utf_8", "allday": "today", "datetime": "extended",
+            "columns": [["開始日", "DTSTART:DAY"], ["開始時刻", "DTSTART:TIME"],
+                        ["終了日", "DTEND:DAY"], ["終了時刻", "DTEND:TIME"],
+                        ["終日イベント", "X:ALLDAY_EVENT"], ["予定", "SUMMARY:H"],
+                        ["予定詳細", "SUMMARY"]],
+        },
+    }
+    # CSVフォーマットの定義のflagsに書けるFeatureFlagsの変数
+    CSV_FORMAT_FLAGS = ("remove_tail_cr", "enhanced_gyoumunum")
+
+    # 繰返しスケジュール(RRULE)の展開の上限(年月)のデフォルト。
+    # TimeRange.format_check()の有効範囲の最終月。
+    RRULE_HORIZON_DEFAULT = 209912
+    # 繰返しスケジュール(RRULE)を期間指定で展開する時の前後の余裕。
+    # CSV出力の判断はローカルタイムに変換後の開始日時で行うため、
+    # TimeZoneの時差(最大±14時間)を吸収できればよい。
+    RRULE_EXPANSION_SLACK = datetime.timedelta(days=2)
+
+    # 変換結果のキャッシュの保存先のデフォルト。
+    CACHE_DIR_DEFAULT = os.path.join(os.path.expanduser("~"), ".cache", "icsconvcsv")
+    # 変換結果のキャッシュの上限(MB)のデフォルト。
+    CACHE_SIZE_MB_DEFAULT = 64
+
+    # VEVENTの並列処理(-j)を行う最小のVEVENTの数。少ないとプロセスの起動の方が遅い。
+    PARALLEL_MIN_VEVENTS = 500
+    # VEVENTの並列処理で、1プロセスあたりのチャンクの数。
+    PARALLEL_CHUNKS_PER_JOB = 4
+
+    # VTIMEZONEのTZID(Windowsの名前)からIANAのTimeZone名への読み替え表。
+    # TZ.calendar_timezones()で、VTIMEZONEの定義と切り替わりが一致すれば
+    # zoneinfo.ZoneInfoに差し替える。CLDRのwindowsZones.xml(territory="001")より。
+    # 表に無いTZIDは、TZIDそのものをIANAのTimeZone名として試す。
+    WINDOWS_TZID = {
+        "Dateline Standard Time": "Etc/GMT+12",
+        "UTC-11": "Etc/GMT+11",
+        "Aleutian Standard Time": "America/Adak",
+        "Hawaiian Standard Time": "Pacific/Honolulu",
+        "Marquesas Standard Time": "Pacific/Marquesas",
+        "Alaskan Standard Time": "America/Anchorage",
+        "UTC-09": "Etc/GMT+9",
+        "Pacific Standard Time (Mexico)": "America/Tijuana",
+        "UTC-08": "Etc/GMT+8",
+        "Pacific Standard Time": "America/Los_Angeles",
+        "US Mountain Standard Time": "America/Phoenix",
+        "Mountain Standard Time (Mexico)": "America/Mazatlan",
+        "Mountain Standard Time": "America/Denver",
+        "Yukon Standard Time": "America/Whitehorse",
+        "Central America Standard Time": "America/Guatemala",
+        "Central Standard Time": "America/Chicago",
+        "Easter Island Standard Time": "Pacific/Easter",
+        "Central Standard Time (Mexico)": "America/Mexico_City",
+        "Canada Central Standard Time": "America/Regina",
+        "SA Pacific Standard Time": "America/Bogota",
+        "Eastern Standard Time (Mexico)": "America/Cancun",
+        "Eastern Standard Time": "America/New_York",
+        "Haiti Standard Time": "America/Port-au-Prince",
+        "Cuba Standard Time": "America/Havana",
+        "US Eastern Standard Time": "America/Indiana/Indianapolis",
+        "Turks And Caicos Standard Time": "America/Grand_Turk",
+        "Paraguay Standard Time": "America/Asuncion",
+        "Atlantic Standard Time": "America/Halifax",
+        "Venezuela Standard Time": "America/Caracas",
+        "Central Brazilian Standard Time": "America/Cuiaba",
+        "SA Western Standard Time": "America/La_Paz",
+        "Pacific SA Standard Time": "America/Santiago",
+        "Newfoundland Standard Time": "America/St_Johns",
+        "Tocantins Standard Time": "America/Araguaina",
+        "E. South America Standard Time": "America/Sao_Paulo",
+        "SA Eastern Standard Time": "America/Cayenne",
+        "Argentina Standard Time": "America/Argentina/Buenos_Aires",
+        "Greenland Standard Time": "America/Nuuk",
+        "Montevideo Standard Time": "America/Montevideo",
+        "Magallanes Standard Time": "America/Punta_Arenas",
+        "Saint Pierre Standard Time": "America/Miquelon",
+        "Bahia Standard Time": "America/Bahia",
+        "UTC-02": "Etc/GMT+2",
+        "Azores Standard Time": "Atlantic/Azores",
+        "Cape Verde Standard Time": "Atlantic/Cape_Verde",
+        "GMT Standard Time": "Europe/London",
+        "Greenwich Standard Time": "Atlantic/Reykjavik",
+        "Sao Tome Standard Time": "Africa/Sao_Tome",
+        "Morocco Standard Time": "Africa/Casablanca",
+        "W. Europe Standard Time": "Europe/Berlin",
+        "Central Europe Standard Time": "Europe/Budapest",
+        "Romance Standard Time": "Europe/Paris",
+        "Central European Standard Time": "Europe/Warsaw",
+        "W. Central Africa Standard Time": "Africa/Lagos",
+        "Jordan Standard Time": "Asia/Amman",
+        "GTB Standard Time": "Europe/Bucharest",
+        "Middle East Standard Time": "Asia/Beirut",
+        "Egypt Standard Time": "Africa/Cairo",
+        "E. Europe Standard Time": "Europe/Chisinau",
+        "Syria Standard Time": "Asia/Damascus",
+        "West Bank Standard Time": "Asia/Hebron",
+        "South Africa Standard Time": "Africa/Johannesburg",
+        "FLE Standard Time": "Europe/Kiev",
+        "Israel Standard Time": "Asia/Jerusalem",
+        "South Sudan Standard Time": "Africa/Juba",
+        "Kaliningrad Standard Time": "Europe/Kaliningrad",
+        "Sudan Standard Time": "Africa/Khartoum",
+        "Libya Standard Time": "Africa/Tripoli",
+        "Namibia Standard Time": "Africa/Windhoek",
+        "Arabic Standard Time": "Asia/Baghdad",
+        "Turkey Standard Time": "Europe/Istanbul",
+        "Arab Standard Time": "Asia/Riyadh",
+        "Belarus Standard Time": "Europe/Minsk",
+        "Russian Standard Time": "Europe/Moscow",
+        "E. Africa Standard Time": "Africa/Nairobi",
+        "Volgograd Standard Time": "Europe/Volgograd",
+        "Iran Standard Time": "Asia/Tehran",
+        "Arabian Standard Time": "Asia/Dubai",
+        "Astrakhan Standard Time": "Europe/Astrakhan",
+        "Azerbaijan Standard Time": "Asia/Baku",
+        "Russia Time Zone 3": "Europe/Samara",
+        "Mauritius Standard Time": "Indian/Mauritius",
+        "Saratov Standard Time": "Europe/Saratov",
+        "Georgian Standard Time": "Asia/Tbilisi",
+        "Caucasus Standard Time": "Asia/Yerevan",
+        "Afghanistan Standard Time": "Asia/Kabul",
+        "West Asia Standard Time": "Asia/Tashkent",
+        "Ekaterinburg Standard Time": "Asia/Yekaterinburg",
+        "Pakistan Standard Time": "Asia/Karachi",
+        "Qyzylorda Standard Time": "Asia/Qyzylorda",
+        "India Standard Time": "Asia/Kolkata",
+        "Sri Lanka Standard Time": "Asia/Colombo",
+        "Nepal Standard Time": "Asia/Kathmandu",
+        "Central Asia Standard Time": "Asia/Almaty",
+        "Bangladesh Standard Time": "Asia/Dhaka",
+        "Omsk Standard Time": "Asia/Omsk",
+        "Myanmar Standard Time": "Asia/Yangon",
+        "SE Asia Standard Time": "Asia/Bangkok",
+        "Altai Standard Time": "Asia/Barnaul",
+        "W. Mongolia Standard Time": "Asia/Hovd",
+        "North Asia Standard Time": "Asia/Krasnoyarsk",
+        "N. Central Asia Standard Time": "Asia/Novosibirsk",
+        "Tomsk Standard Time": "Asia/Tomsk",
+        "China Standard Time": "Asia/Shanghai",
+        "North Asia East Standard Time": "Asia/Irkutsk",
+        "Singapore Standard Time": "Asia/Singapore",
+        "W. Australia Standard Time": "Australia/Perth",
+        "Taipei Standard Time": "Asia/Taipei",
+        "Ulaanbaatar Standard Time": "Asia/Ulaanbaatar",
+        "Aus Central W. Standard Time": "Australia/Eucla",
+        "Transbaikal Standard Time": "Asia/Chita",
+        "Tokyo Standard Time": "Asia/Tokyo",
+        "North Korea Standard Time": "Asia/Pyongyang",
+        "Korea Standard Time": "Asia/Seoul",
+        "Yakutsk Standard Time": "Asia/Yakutsk",
+        "Cen. Australia Standard Time": "Australia/Adelaide",
+        "AUS Central Standard Time": "Australia/Darwin",
+        "E. Australia Standard Time": "Australia/Brisbane",
+        "AUS Eastern Standard Time": "Australia/Sydney",
+        "West Pacific Standard Time": "Pacific/Port_Moresby",
+        "Tasmania Standard Time": "Australia/Hobart",
+        "Vladivostok Standard Time": "Asia/Vladivostok",
+        "Lord Howe Standard Time": "Australia/Lord_Howe",
+        "Bougainville Standard Time": "Pacific/Bougainville",
+        "Russia Time Zone 10": "Asia/Srednekolymsk",
+        "Magadan Standard Time": "Asia/Magadan",
+        "Norfolk Standard Time": "Pacific/Norfolk",
+        "Sakhalin Standard Time": "Asia/Sakhalin",
+        "Central Pacific Standard Time": "Pacific/Guadalcanal",
+        "Russia Time Zone 11": "Asia/Kamchatka",
+        "New Zealand Standard Time": "Pacific/Auckland",
+        "UTC+12": "Etc/GMT-12",
+        "Fiji Standard Time": "Pacific/Fiji",
+        "Chatham Islands Standard Time": "Pacific/Chatham",
+        "UTC+13": "Etc/GMT-13",
+        "Tonga Standard Time": "Pacific/Tongatapu",
+        "Samoa Standard Time": "Pacific/Apia",
+        "Line Islands Standard Time": "Pacific/Kiritimati",
+        # 日本語版Outlookの出力。
+        "東京 (標準時)": "Asia/Tokyo",
+    }
+    # VTIMEZONEとIANAのTimeZoneの時差を比べる間隔。切り替わりの日時は別に比べる。
+    TIMEZONE_CHECK_STEP = datetime.timedelta(weeks=1)
+    # 時差の表(TZ.offset_table())を使わない、切り替わりの前後の幅。
+    # 時差(最大±14時間)より広ければ、UTCとローカルタイムのどちらで探しても同じ。
+    TIMEZONE_TABLE_MARGIN = datetime.timedelta(days=1)
+
 class FeatureFlags:
     """parse_argsなどで後で書き換える変数
     小文字は原則Bool型。大文字は原則Bool型以外"""
@@ -147,6 +402,9 @@ class FeatureFlags:
         self.description_delete_4th_line_onwards = False
         # Teamsの会議インフォメーションを消す。パスワードが入ってる。
         self.remove_teams_infomation = True
+        # Teamsの会議インフォメーションの始まりの目印(文字列)。
+        # 増やす場合は引数--add-teams-markerかライブラリ呼び出し側から追加してください。
+        self.TEAMS_INFOMATION_MARKERS = list(ConstDat.TEAMS_INFOMATION_MARKERS)
         # 登録番号(業務番号)の拡張フォーマットを使うか
         # True: 使う
         # False: 使わない
@@ -178,14 +436,43 @@ class FeatureFlags:
         # 推測した値を保存。
         self.GUESS_TIMEZONE = None # 値は文字列ではない。TimeZoneオブジェクト
         self.guess_timezone_initalized = False
+        # ICSファイルの日時の範囲(開始年, 終了年)。Main.load_ics()で調べる。
+        self.TIMEZONE_YEARS = None
+        # VEVENTの日時のtzinfoを差し替える表。key: TZID, value: そのICSファイルの
+        # VTIMEZONEのtzinfo(IANAと一致すればzoneinfo.ZoneInfo)。VTIMEZONEの無い
+        # TZIDはTZ.unknown_tzid()の値(Noneはnaive)。
+        # TZ.load_ics()で設定し、Main.vevent_readone()で使う。
+        self.TIMEZONE_SWAP = {}
+        # IANAと一致しないtzinfoの時差の表。key: id(tzinfo), value: TZ.offset_table()の表。
+        # tzinfoはTIMEZONE_SWAPが保持する。dateutil.tz.tzutcなどはhashできないのでid()。
+        # TZ.load_ics()で設定し、TZ.astimezone()で使う。
+        self.TIMEZONE_TABLES = {}
         #
         # 指定したUIDの細かい情報を表示する
         self.DEBUG_UID = None
 
+        # 繰返しスケジュール(RRULE)をこの年月の月末まで展開する。
+        # COUNT/UNTILが無いRRULEは、この値で打ち切る。
+        self.RRULE_HORIZON = ConstDat.RRULE_HORIZON_DEFAULT
+
+        # 変換結果のキャッシュを使う(True)。使わない(False)。
+        # ライブラリとして使う場合は使わない。コマンドはparse_args()のuse_cacheで使う。
+        self.use_cache = False
+        # 変換結果のキャッシュの保存先と上限(MB)。
+        self.CACHE_DIR = ConstDat.CACHE_DIR_DEFAULT
+        self.CACHE_SIZE_MB = ConstDat.CACHE_SIZE_MB_DEFAULT
+
+        # 一括変換(Batch)の並列数(プロセス数)。NoneならCPUの数。
+        self.BATCH_WORKERS = None
+        # 1個のICSファイルのVEVENTの変換の並列数(プロセス数)。1なら並列処理しない。
+        self.PARALLEL_JOBS = 1
+
         # CSVに出力する時の各種処理関数
         #
         self.CSV_ALLDAY_FORMAT = AllDayFormat.nextday
         self.CSV_DATE_TIME_FORMAT = None
+        # 日付と時刻の文字列への変換。TimeFormat型。PreSetup.set_format()で作る。
+        self.CSV_TIME_FORMAT = None
         #
         # 予定の選択肢を追加
         # 追加項目。増やす場合はライブラリ呼び出し側から追加してください。
@@ -193,10 +480,17 @@ class FeatureFlags:
 
         # CSVの出力フォーマット
         self.CSV_FORMAT = CSVFormat.simple
+        # 引数--format-fileで読み込んだCSVフォーマットの定義。NoneならCSV_FORMAT。
+        self.CSV_FORMAT_DEF = None
 
         # CSVのBODY(出力する部分)のCSVの各要素の位置
         self.CSV_POS = {}
 
+        # CSVのBODYの各要素を取り出す(位置, 関数, 引数)のlist。Column.compile()の返り値。
+        self.CSV_PLAN = []
+        # CSVのBODYのColumn.TIMEの各要素の位置。無い要素はNone。
+        self.CSV_TIME_POS = ()
+
         # CSVの内部処理用の(出力しない部分)を含めての各要素の位置.
         # 「H:LENGTH:」 CSVのHEADER(出力しない部分)の長さ
         # なので、次のようになる。
@@ -204,16 +498,17 @@ class FeatureFlags:
         #
         # 前述のCSVの1行めの最初のヘッダ(self.print_csv_header)と用語が混ざってますので注意ください。
         #
-        self.CSV_POS2 = {"H:UID":0, "H:DTSTART":1, "H:RECURRENCE_ID":2, "H:LENGTH":3}
+        self.CSV_POS2 = {"H:UID":0, "H:DTSTART":1, "H:RECURRENCE_ID":2, "H:SORT":3, "H:LENGTH":4}
 
-        self.CSV_HEADER = [ConstDat.NA, None, None] # 先頭部分のみ。 set_format()で後半をappendする。
-        # == ["H:UID", "H:DTSTART", "H:RECURRENCE_ID"]
+        self.CSV_HEADER = [ConstDat.NA, None, None, None] # 先頭部分のみ。 set_format()で後半をappendする。
+        # == ["H:UID", "H:DTSTART", "H:RECURRENCE_ID", "H:SORT"]
 
         # H:UIDはVEVENTのUID。CSVの項目一覧などは'(N/A)', RECURRENCE-IDで不可視化した場合はNoneを代入
         # Noneの場合はファイルへの出力対象外。
         # H:DTSTARTは datetime.datetime型もしくはdatetime.date型
         # H:RECURRENCE_IDは要素に含まれるならその値が入る。datetime.datetime型もしくはdatetime.date型
         # なければNone。datetime.datetimeの時はlocaltimeに変換する。
+        # H:SORTはCSVの出力順のキー。OccurrenceTime.sort_key()の返り値(int)。
 
         # 試してないが、改行コードの話。
         # Ref: https://qiita.com/tatsuya-miyamoto/items/f57408064b803f55cf99
@@ -264,6 +559,36 @@ class FeatureFlags:
         #MEMO: debug用4Byte UTF-8。通常はコメントアウト
         #self.NON_PR_CHAR_MAP[chr(0x20BB7)] = "吉" # 頭が土(U+20BB7).吉野家は正しくはこの漢字
 
+        # -Esimple、-Ereplace_getaでCSVに書き込む前に文字を置き換える表。
+        # NonPrintTable型。FileIO.open_csv_object()で作る。使わない場合はNone。
+        self.CSV_NON_PRINT_TABLE = None
+
+        # 変換結果のキャッシュ(ResultCache)のヒット/ミスの回数。
+        # copy()で複製した変換ごとに数える。
+        self.cache_hit = 0
+        self.cache_miss = 0
+
+    def copy(self):
+        """
+        変換ごとに使う複製を返す。
+
+        list, dict, setの要素は複製し、TimeFormatは覚えた文字列を共有
+        しないように作り直す。TimeZoneのオブジェクト(GUESS_TIMEZONE,
+        TIMEZONE_SWAPの値)は複製しない。キャッシュのヒット/ミスの回数は
+        0から数える。
+        """
+        ret = copy.copy(self)
+        for k, v in vars(self).items():
+            if k in ('TIMEZONE_SWAP', 'TIMEZONE_TABLES'):
+                setattr(ret, k, dict(v))
+            elif type(v) in (list, dict, set):
+                setattr(ret, k, copy.deepcopy(v))
+        if not self.CSV_TIME_FORMAT is None:
+            ret.CSV_TIME_FORMAT = self.CSV_TIME_FORMAT.copy()
+        ret.cache_hit = 0
+        ret.cache_miss = 0
+        return ret
+
 #######################################################
 class TimeRange:
     """CSVの出力範囲を制限する処理をする関数"""
@@ -383,6 +708,76 @@ class TimeRange:
         if(ics_time.year == timerange//100) and (ics_time.month == timerange%100):
             return True
         return False
+
+    @staticmethod
+    def is_collect_any(ics_time, timeranges: list)->bool:
+        """
+        引数で渡した時刻ics_timeがtimerangesのいずれかの期間で
+        CSVへの出力対象か判断します。Noneの場合はTrueを返します。
+        """
+        if ics_time is None:
+            return True
+        for timerange in timeranges:
+            if TimeRange.is_collect(ics_time, timerange):
+                return True
+        return False
+
+    @staticmethod
+    def month_start(timerange: int) -> datetime.datetime:
+        """
+        timerangeで指定した年月の1日0時0分(naive)を返す。
+        """
+        return datetime.datetime(timerange//100, timerange%100, 1)
+
+    @staticmethod
+    def next_month_start(timerange: int) -> datetime.datetime:
+        """
+        timerangeで指定した年月の翌月1日0時0分(naive)を返す。
+        """
+        y = timerange//100
+        m = timerange%100 + 1
+        if m > 12:
+            y += 1
+            m = 1
+        return datetime.datetime(y, m, 1)
+
+    @staticmethod
+    def window(timeranges: list) -> tuple:
+        """
+        timerangesで指定した期間すべてを含む範囲を返す。
+
+        返り値:
+        (開始, 終了)のtuple。いずれもnaiveなdatetime.datetime型。
+        全期間(timerangesが空もしくは「0」を含む)の場合は(None, None)を返す。
+
+        時差を吸収するため、ConstDat.RRULE_EXPANSION_SLACK分の余裕を
+        もたせている。
+        """
+        if (len(timeranges) == 0) or (0 in timeranges):
+            return None, None
+
+        lo = TimeRange.month_start(min(timeranges)) - ConstDat.RRULE_EXPANSION_SLACK
+        hi = TimeRange.next_month_start(max(timeranges)) + ConstDat.RRULE_EXPANSION_SLACK
+        return lo, hi
+
+    @staticmethod
+    def expansion_window(timeranges: list, horizon: int) -> tuple:
+        """
+        繰返しスケジュール(RRULE)を展開する範囲を返す。
+
+        引数:
+        timeranges: CSVの出力範囲を指定するtimerangeの値のlist。
+                    複数指定した場合はすべてを含む範囲を返す。
+        horizon: 展開の上限の年月。この年月の月末まで展開する。
+
+        返り値:
+        (展開開始, 展開終了)のtuple。いずれもnaiveなdatetime.datetime型。
+        展開開始がNoneの場合は先頭から展開する。
+        """
+        lo, hi = TimeRange.window(timeranges)
+        if hi is None:
+            return None, TimeRange.next_month_start(horizon)
+        return lo, min(hi, TimeRange.next_month_start(horizon))
 ###
 class Misc:
     """煩雑な関数"""
@@ -505,79 +900,249 @@ class TZ:
         raise RuntimeError(f"ERROR: 想定外の型が渡された: = {type(t)}")
 
     @staticmethod
-    def load_ics_vtimezone(ics_data: str):
+    def calendar_timezones(calendar, years: tuple = None) -> tuple:
         """
-        TimeZoneデータ読み込み
-        https://dateutil.readthedocs.io/en/stable/tz.html
-        vobjectのサンプルtests.py
+        vobjectで変換済みのVCALENDARのVTIMEZONEから、TZIDをkey、tzinfoを
+        valueとするdictを作る。順番はICSファイルで定義された順。
 
-        返り値: None -> VTIMEZONEのデータが無かった。
-        データ異常などの場合は、例外raiseで停止する。
+        tzinfoは、そのVCALENDARのVTIMEZONEから作る(vtimezone.gettzinfo())。
+        vobjectの登録(vobject.icalendar.getTzid())は全体で共有していて、
+        同じTZIDは最初に変換したICSファイルの定義のままなので使わない。
+        Outlookの"Customized Time Zone"のように、同じTZIDで定義が異なる
+        ICSファイルがある。VEVENTの日時はswap_timezones()で差し替える。
+
+        years(開始年, 終了年)を指定した場合は、IANAのTimeZoneと一致すれば
+        zoneinfo.ZoneInfoに差し替え、一致しなければ時差の表を作る
+        (iana_timezone())。
+
+        返り値: (TZIDとtzinfoのdict, id(tzinfo)をkey、時差の表をvalueとするdict)
     """
-        ret = None
+        ret = {}
+        tables = {}
+        for vtimezone in calendar.contents.get('vtimezone', []):
+            tzid = Misc.get_ics_val(vtimezone, 'tzid', ConstDat.NA)
+            if tzid in ret:
+                continue
+            tzinfo = vtimezone.gettzinfo()
+            if tzinfo is None:
+                continue
+            if not years is None:
+                tzinfo, table = TZ.iana_timezone(tzid, vtimezone, tzinfo, years)
+                if not table is None:
+                    tables[id(tzinfo)] = table
+            ret[tzid] = tzinfo
+        return ret, tables
 
+    @staticmethod
+    def iana_timezone(tzid: str, vtimezone, tzinfo, years: tuple):
+        """
+        TZIDに対応するIANAのTimeZone(ConstDat.WINDOWS_TZID、表に無ければ
+        TZIDそのもの)が、VTIMEZONEの定義とyears(開始年, 終了年)の期間で
+        一致すれば(same_transitions())、(zoneinfo.ZoneInfo, None)を返す。
+        一致しなければ(tzinfo, 時差の表(offset_table()))を返す。
+
+        dateutil.tz.tzicalは時差を調べるたびにVTIMEZONEのRRULEを先頭から
+        たどるので遅い。VEVENTの日時のtzinfoもswap_timezones()でZoneInfoに
+        すると、ローカルタイムへの変換やRRULEの展開が速い。
+    """
         try:
-            ret = dateutil.tz.tzical(io.StringIO(ics_data))
-        except ValueError as e:
-            # Outlook(classic)が作ったICSを一気よみすると途中のVEVENTで
-            # 解析に失敗する。
-            new = []
-            found_vtimezone = False
-            found_vcalendar = False
-            found_vevent = False
-            for i in ics_data.splitlines():
-                if re.match('BEGIN:VTIMEZONE', i):
-                    found_vtimezone = True
-                if re.match('BEGIN:VCALENDAR', i):
-                    found_vcalendar = True
-                if re.match('BEGIN:VEVENT', i):
-                    if found_vevent:
-                        raise ValueError("ERROR: BEGIN:VEVENTからEND:VEVENTの対応が壊れてる(1)") from e
-                    found_vevent = True
-                    continue
-                if re.match('END:VEVENT', i):
-                    if not found_vevent:
-                        raise ValueError("ERROR: BEGIN:VEVENTからEND:VEVENTの対応が壊れてる(2)") from e
-                    found_vevent = False
-                    continue
-                if found_vevent:
-                    continue
-                new.append(i)
-            # end for i:
+            iana = zoneinfo.ZoneInfo(ConstDat.WINDOWS_TZID.get(tzid, tzid))
+        except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+            iana = None
+
+        if not iana is None and TZ.same_transitions(vtimezone, iana, years):
+            return iana, None
+        return tzinfo, TZ.offset_table(vtimezone, tzinfo, years)
 
-            if found_vevent:
-                raise ValueError("ERROR: BEGIN:VEVENTからEND:VEVENTの対応が壊れてる(3)") from e
+    @staticmethod
+    def offset_table(vtimezone, tzinfo, years: tuple) -> tuple:
+        """
+        IANAのTimeZoneに差し替えられなかったVTIMEZONEのtzinfoについて、
+        years(開始年, 終了年)の期間の時差の表を作る。表は変換ごとに
+        F.TIMEZONE_TABLESに保存し、astimezone()で使う。
 
-            if not found_vcalendar:
-                raise ValueError("ERROR: 入力して渡されたICSファイルにBEGIN:VCALENDARが無い") from e
+        表は(区間の開始日時のlist, 区間の時差のlist)。日時はnaive。最後の
+        日時は期間の終わり。各区間の中央の日時で、UTCからの変換と
+        ローカルタイムの時差をtzinfoと比べ、一致しなければNoneを返す。
+    """
+        lo = datetime.datetime(years[0], 1, 1)
+        hi = datetime.datetime(years[1] + 1, 1, 1)
+        try:
+            transitions = TZ.vtimezone_transitions(vtimezone, lo, hi)
+        except (ValueError, TypeError, AttributeError, OverflowError):
+            return None
+        if not transitions:
+            return None
 
-            if not found_vtimezone:
-                # VTIMEZONEが無い。おそらくFloating timeモード。ただし時刻がUTC(世界標準時)の可能性あり。
-                ret = None
-            else:
-                #print("\n".join(new))
-                ret = dateutil.tz.tzical(io.StringIO("\n".join(new) + "\n"))
+        times = [lo] + [t for t, _ in transitions[1:]] + [hi]
+        offsets = [offset for _, offset in transitions]
+        utc = datetime.timezone.utc
+        for n, offset in enumerate(offsets):
+            t = times[n] + (times[n + 1] - times[n]) / 2
+            if t.replace(tzinfo=utc).astimezone(tzinfo).utcoffset() != offset:
+                return None
+            if (t + offset).replace(tzinfo=tzinfo).utcoffset() != offset:
+                return None
+        return times, offsets
+
+    @staticmethod
+    def find_offset_table(tzinfo) -> tuple:
+        """
+        tzinfoの時差の表(日時のlist, 時差のlist)を返す。無ければNone。
+    """
+        if not F.TIMEZONE_TABLES:
+            return None
+        return F.TIMEZONE_TABLES.get(id(tzinfo))
 
-        #print(type(ret))
-        #if len(ret.keys()) == 1:
-            #t = datetime.datetime(2003, 9, 27, 12, 40, 12, tzinfo=ret.get())
-            #t = datetime.datetime(2003, 9, 27, 12, 40, 12, tzinfo=dateutil.tz.tzutc())
-            #print(t, file=sys.stderr)
+    @staticmethod
+    def table_offset(table: tuple, d: datetime.datetime) -> datetime.timedelta:
+        """
+        offset_table()の表から、naiveな日時dの時差を返す。dは、UTCでも
+        ローカルタイムでもよい。切り替わりの前後(ConstDat.TIMEZONE_TABLE_MARGIN)
+        と表の期間外は、tzinfoで調べる必要があるのでNoneを返す。
+    """
+        times, offsets = table
+        n = bisect.bisect_right(times, d) - 1
+        if n < 0 or n >= len(offsets):
+            return None
+        if d - times[n] < ConstDat.TIMEZONE_TABLE_MARGIN or times[n + 1] - d < ConstDat.TIMEZONE_TABLE_MARGIN:
+            return None
+        return offsets[n]
 
-        #print(tzs.get('Tokyo Standard Time'))
-        #jp = vobject.icalendar.TimezoneComponent(tzs.get('Tokyo Standard Time'))
-        #print(jp)
+    @staticmethod
+    def astimezone(d: datetime.datetime, tz) -> datetime.datetime:
+        """
+        awareなdatetimeのdをTimeZone tzに変換する(d.astimezone(tz))。
 
-        return ret
+        dとtzのtzinfoが同じならdを返す。どちらかに時差の表(offset_table())
+        があれば、dateutil.tz.tzicalの時差の計算(VTIMEZONEのRRULEを毎回
+        たどる)の代わりに、表を二分探索して時差を足し引きする。
+    """
+        src = d.tzinfo
+        if src is tz:
+            return d
+        src_table = TZ.find_offset_table(src)
+        tz_table = TZ.find_offset_table(tz)
+        if src_table is None and tz_table is None:
+            return d.astimezone(tz)
+
+        offset = None
+        if not src_table is None and d.fold == 0:
+            offset = TZ.table_offset(src_table, d.replace(tzinfo=None))
+        if offset is None:
+            offset = d.utcoffset()
+        u = d.replace(tzinfo=None) - offset
+
+        if not tz_table is None:
+            offset = TZ.table_offset(tz_table, u)
+            if not offset is None:
+                return (u + offset).replace(tzinfo=tz)
+        return u.replace(tzinfo=datetime.timezone.utc).astimezone(tz)
+
+    @staticmethod
+    def same_transitions(vtimezone, tzinfo, years: tuple) -> bool:
+        """
+        VTIMEZONEの定義とtzinfoのUTCからの時差が、years(開始年, 終了年)の
+        期間で一致すればTrue。
+
+        VTIMEZONEの時差の切り替わり(vtimezone_transitions())の日時とその
+        1秒前、及びConstDat.TIMEZONE_CHECK_STEPごとの日時で比べる。
+        VTIMEZONEを調べきれない場合はFalse。
+    """
+        lo = datetime.datetime(years[0], 1, 1)
+        hi = datetime.datetime(years[1] + 1, 1, 1)
+        try:
+            transitions = TZ.vtimezone_transitions(vtimezone, lo, hi)
+        except (ValueError, TypeError, AttributeError, OverflowError):
+            return False
+        if not transitions:
+            return False
+
+        utc = datetime.timezone.utc
+        second = datetime.timedelta(seconds=1)
+        for (_, offset_from), (t, offset_to) in zip(transitions, transitions[1:]):
+            if t.replace(tzinfo=utc).astimezone(tzinfo).utcoffset() != offset_to:
+                return False
+            if (t - second).replace(tzinfo=utc).astimezone(tzinfo).utcoffset() != offset_from:
+                return False
+
+        n = 0
+        t = lo
+        while t < hi:
+            while n + 1 < len(transitions) and transitions[n + 1][0] <= t:
+                n += 1
+            if t.replace(tzinfo=utc).astimezone(tzinfo).utcoffset() != transitions[n][1]:
+                return False
+            t += ConstDat.TIMEZONE_CHECK_STEP
+        return True
+
+    @staticmethod
+    def vtimezone_transitions(vtimezone, lo: datetime.datetime, hi: datetime.datetime) -> list:
+        """
+        vobjectで変換済みのVTIMEZONEのSTANDARD/DAYLIGHTから、時差の切り替わり
+        を(UTCの日時, 切り替わり後の時差)のlistにして、日時の順に返す。
+        日時はnaive。期間[lo, hi)の切り替わりと、lo以前の最後の切り替わり。
+
+        lo以前の時差が分からない、RDATEや複数のRRULEがあるなど、調べきれ
+        ない場合はNoneを返す。
+    """
+        ret = []
+        for comp in vtimezone.contents.get('standard', []) + vtimezone.contents.get('daylight', []):
+            if 'rdate' in comp.contents or len(comp.contents.get('rrule', [])) > 1:
+                return None
+            dtstart = comp.dtstart.value
+            if not type(dtstart) is datetime.datetime or not dtstart.tzinfo is None:
+                return None
+            offset_from = TZ.utc_offset(comp.tzoffsetfrom.value)
+            offset_to = TZ.utc_offset(comp.tzoffsetto.value)
+
+            # 切り替わりの日時は、切り替わり前の時差のローカルタイム。
+            local = [dtstart]
+            if 'rrule' in comp.contents:
+                rule = comp.rrule.value
+                # Outlookは「DTSTART:16010101T...」と書くので、毎年の規則(COUNT無し)
+                # なら、DTSTARTをloの前年にずらしてもlo以降は同じ。
+                parts = dict(i.split('=', 1) for i in rule.upper().split(';') if '=' in i)
+                if parts.get('FREQ') == 'YEARLY' and parts.get('INTERVAL', '1') == '1' \
+                   and not 'COUNT' in parts and dtstart.year < lo.year - 1 \
+                   and (dtstart.month, dtstart.day) != (2, 29):
+                    dtstart = dtstart.replace(year=lo.year - 1)
+                local = []
+                for d in dateutil.rrule.rrulestr(rule, dtstart=dtstart):
+                    if d >= hi + offset_from:
+                        break
+                    if d < lo + offset_from:
+                        local = []
+                    local.append(d)
+            ret += [(d - offset_from, offset_to) for d in local]
+
+        ret.sort(key=lambda x: x[0])
+        start = [n for n, (t, _) in enumerate(ret) if t <= lo]
+        if len(start) == 0:
+            return None
+        return [i for i in ret[start[-1]:] if i[0] < hi]
+
+    @staticmethod
+    def utc_offset(s: str) -> datetime.timedelta:
+        """
+        TZOFFSETFROM/TZOFFSETTOの値(例: "+0900"、"-053000")をtimedeltaにする。
+    """
+        m = re.fullmatch(r'([+-])(\d{2})(\d{2})(\d{2})?', s.strip())
+        if m is None:
+            raise ValueError(f"ERROR: 時差の書式の誤り: {s}")
+        ret = datetime.timedelta(hours=int(m.group(2)), minutes=int(m.group(3)), seconds=int(m.group(4) or 0))
+        return -ret if m.group(1) == '-' else ret
 
     ###
     #
     #
     @staticmethod
-    def guess_timezone_init(cal_tz: dateutil.tz.tz.tzical, override_timezone: str = None):
+    def guess_timezone_init(cal_tz: dict, override_timezone: str = None):
         """
         TimeZoneを推測する関数の初期化
 
+        cal_tz: calendar_timezones()の返り値。
+
         制御変数:
         G.OVERRIDE_TIMEZONE:ただし ics2csv()で使ってます。
 
@@ -586,16 +1151,14 @@ class TZ:
 
         F.guess_timezone_initalized = False
 
-        n = []
-        if not n is None:
-            n = cal_tz.keys()
+        n = list(cal_tz)
 
         if not override_timezone is None:
             print("INFO: 引数でデフォルトのTimeZoneが指定されています。", file=sys.stderr)
 
                 # VTIMEZONEで定義されていたTimeZoneから探す。
             if override_timezone in n:
-                F.GUESS_TIMEZONE = cal_tz.get(override_timezone)
+                F.GUESS_TIMEZONE = cal_tz[override_timezone]
             else:
                 # OS定義のTimeZOneから探す。
                 try:
@@ -615,17 +1178,17 @@ class TZ:
             return
 
         if len(n) == 1:
-            F.GUESS_TIMEZONE = cal_tz.get()
+            F.GUESS_TIMEZONE = cal_tz[n[0]]
             F.guess_timezone_initalized = True
             return
 
         if len(n) > 1:
             print("INFO: ICSファイルにTimzeZoneが複数定義されています。", file=sys.stderr)
-            print(f"INFO: 現在定義されているTimeZone一覧: {cal_tz.keys()}", file=sys.stderr)
+            print(f"INFO: 現在定義されているTimeZone一覧: {n}", file=sys.stderr)
             print(f"INFO: TimeZoneとして1番目に定義されている[{n[0]}]を採用します。", file=sys.stderr)
             print("WARNING: 採用したTimeZoneが不適切な場合、日時計算に失敗します。", file=sys.stderr)
             print("WARNING: 誤ったCSVが生成される場合は引数-TでTimeZoneを指定してください。", file=sys.stderr)
-            F.GUESS_TIMEZONE = cal_tz.get(n[0])
+            F.GUESS_TIMEZONE = cal_tz[n[0]]
             F.guess_timezone_initalized = True
             return
 
@@ -653,13 +1216,60 @@ class TZ:
 
     #
     @staticmethod
-    def load_ics(ics_data: str, override_timezone: str = None):
+    def load_ics(calendar, override_timezone: str = None, years: tuple = None):
         """
-        STRのICSデータからTimeZone関連の情報を読みこみTimeZone関係の初期化
+        vobjectで変換済みのVCALENDARからTimeZone関連の情報を読みこみTimeZone関係の初期化
+
+        override_timezone: 引数-Tの値。guess_timezone_init()に渡す。
+        years: ICSファイルの日時の範囲(開始年, 終了年)。calendar_timezones()に渡す。
         """
-        cal_tz = TZ.load_ics_vtimezone(ics_data)
+        cal_tz, F.TIMEZONE_TABLES = TZ.calendar_timezones(calendar, years)
+        # VTIMEZONEの無いTZIDはswap_timezones()で追加するので複製する。
+        F.TIMEZONE_SWAP = dict(cal_tz)
         TZ.guess_timezone_init(cal_tz, override_timezone)
 
+    @staticmethod
+    def swap_timezones(component) -> None:
+        """
+        vobjectで変換したVEVENTの日時(DTSTART, EXDATEなど)のうち、
+        TZIDのあるものを、同じローカルタイムのまま
+        そのICSファイルのVTIMEZONEのtzinfo(calendar_timezones())に差し替える。
+        vobjectは登録済みのtzinfo(他のICSファイルの定義の場合もある)を使う。
+
+        そのICSファイルにVTIMEZONEが無いTZIDはunknown_tzid()で決め、
+        F.TIMEZONE_SWAPに追加する。
+        """
+        for line in component.lines():
+            # DTSTARTなどは、vobjectがTZIDをX-VOBJ-ORIGINAL-TZIDに移す。
+            tzid = line.params.get('TZID') or line.params.get('X-VOBJ-ORIGINAL-TZID')
+            if tzid is None:
+                continue
+            if tzid[0] in F.TIMEZONE_SWAP:
+                tzinfo = F.TIMEZONE_SWAP[tzid[0]]
+            else:
+                tzinfo = TZ.unknown_tzid(tzid[0])
+                F.TIMEZONE_SWAP[tzid[0]] = tzinfo
+            if type(line.value) is datetime.datetime:
+                line.value = line.value.replace(tzinfo=tzinfo)
+            elif type(line.value) is list:
+                line.value = [d.replace(tzinfo=tzinfo) if type(d) is datetime.datetime else d \
+                              for d in line.value]
+
+    @staticmethod
+    def unknown_tzid(tzid: str):
+        """
+        そのICSファイルにVTIMEZONEが無いTZIDのtzinfoを返す。
+
+        vobjectは他のICSファイルで登録されたTZIDならそのtzinfoを使うため、
+        登録に依らずに、初めて変換する場合のvobjectと同じにする。
+        IANAのTimeZone名(UTCを含む)ならzoneinfo.ZoneInfo、それ以外はNone
+        (naive。TZ.naive2aware()で推測したTimeZoneを使う)。
+        """
+        try:
+            return zoneinfo.ZoneInfo(tzid)
+        except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+            return None
+
     #########################################################################
     # TimeZoneの変換関係の関数。
     ###
@@ -687,22 +1297,11 @@ class TZ:
             #print(f"DEBUG(conver_aware/aft):{d}", file=sys.stderr)
             return d
 
-        y = d.year
-        m = d.month
-        day = d.day
-
-        s = minute = h = 0
-        if type(d) is datetime.datetime:
-            s = d.second
-            minute = d.minute
-            h = d.hour
-            #print(f"DEBUG s={s}, min={minute}, h={h}", file=sys.stderr)
-
         tz = TZ.guess(exit_error)
         #tzinfoのdefault引数はNoneだからtzの値がNoneであっても調べてない。
-        d = datetime.datetime(y, m, day, h, minute, s, tzinfo=tz)
-        #print(f"DEBUG(conver_aware/aft):{d}", file=sys.stderr)
-        return d
+        if type(d) is datetime.datetime:
+            return d.replace(microsecond=0, tzinfo=tz, fold=0)
+        return datetime.datetime(d.year, d.month, d.day, tzinfo=tz)
 
     @staticmethod
     def to_localtime(d, exit_none=True, exit_naive=False):
@@ -727,8 +1326,13 @@ class TZ:
                 raise RuntimeError("ERROR: 引数にNoneが渡されました")
             return None
 
+        # 日付のみとFloating Time(Garoon)は変換しない。
+        if (type(d) is datetime.date or (type(d) is datetime.datetime and d.tzinfo is None)) \
+           and not exit_naive:
+            return d
+
         if TZ.is_aware(d):
-            return d.astimezone(TZ.guess()) # ローカルタイムに変換。
+            return TZ.astimezone(d, TZ.guess()) # ローカルタイムに変換。
 
         if exit_naive:
             raise RuntimeError(f"ERROR: floatingtimeをローカルタイムへの変換しようとしました, time={d}")
@@ -773,9 +1377,113 @@ class TZ:
         F.CSV_ALLDAY_FORMAT: enum AllDayFormat型
              ヘルプの　引数 --allday-format-XXX の欄参照。
 
+        F.CSV_TIME_FORMAT: TimeFormat型
+             日付と時刻の文字列への変換。F.show_timezoneと
+             F.CSV_DATE_TIME_FORMATから作る。
+
         """
-        global F
+        # 処理はOccurrenceTime。繰返しスケジュールはVEVENTごとに
+        # OccurrenceTimeを1回だけ作って使い回す(Main.vevent2csv())。
+        return OccurrenceTime(ics_parts).csv_time(rrule_start)[1]
+    ###
+
+class TimeFormat:
+    """
+    CSVの日付と時刻の文字列への変換(strftime)。
+
+    PreSetup.set_format()でF.CSV_DATE_TIME_FORMATとF.csv_show_timezone
+    から1回だけ作り、F.CSV_TIME_FORMATに入れる。繰返しスケジュールでは
+    同じ日付や時刻が何度も出てくるので、変換した文字列を日付は
+    toordinal()、時刻は(時, 分, 秒, UTCからの差)をキーに覚えておく。
+    覚えた数がCACHE_MAXを超えたら全部忘れる。
+    """
+    # 覚えておく文字列の数の上限(日付、時刻それぞれ)
+    CACHE_MAX = 4096
+
+    def __init__(self, date_time_format, show_timezone: bool):
+        self.date_f = "%Y/%m/%d" # DateTimeFormat.slash_ymd
+        self.time_f = "%H:%M:%S" # DateTimeFormat.slash_ymd
+
+        if date_time_format == DateTimeFormat.basic:
+            self.date_f = "%Y%m%d"
+            self.time_f = "%H%M%S"
+
+        if date_time_format == DateTimeFormat.extended:
+            self.date_f = "%Y-%m-%d"
+
+        self.show_timezone = show_timezone
+        self.dates = {}
+        self.times = {}
+
+    def copy(self):
+        """
+        書式が同じで、覚えた文字列を持たない複製を返す。
+        """
+        ret = copy.copy(self)
+        ret.dates = {}
+        ret.times = {}
+        return ret
+
+    def date(self, d) -> str:
+        """
+        datetime.datetime型もしくはdatetime.date型dの日付の文字列を返す。
+    """
+        key = d.toordinal()
+        ret = self.dates.get(key)
+        if ret is None:
+            if len(self.dates) >= TimeFormat.CACHE_MAX:
+                self.dates.clear()
+            ret = d.strftime(self.date_f)
+            self.dates[key] = ret
+        return ret
+
+    def time(self, t, with_tz: bool) -> str:
+        """
+        datetime.datetime型tの時刻の文字列を返す。
+        with_tzがTrueなら、UTCからの差(%z)も付ける。
+    """
+        if with_tz:
+            key = (t.hour, t.minute, t.second, t.utcoffset())
+        else:
+            key = (t.hour, t.minute, t.second)
+        ret = self.times.get(key)
+        if ret is None:
+            if len(self.times) >= TimeFormat.CACHE_MAX:
+                self.times.clear()
+            if with_tz:
+                ret = t.strftime(self.time_f + "%z")
+            else:
+                ret = t.strftime(self.time_f)
+            self.times[key] = ret
+        return ret
+
+    def csv_time(self, start, end, all_day: bool) -> tuple:
+        """
+        TZ.ics_parts_to_csv_time()の返り値の("開始日","開始時刻","終了日","終了時刻",
+        "終日スケジュールフラグ")を作る。時刻情報がない場合、時刻は""。
+    """
+        if type(start) is datetime.date:
+            return self.date(start), "", self.date(end), "", all_day
+
+        with_tz = self.show_timezone and TZ.is_aware(start)
+        return self.date(start), self.time(start, with_tz), \
+            self.date(end), self.time(end, with_tz), all_day
 
+class OccurrenceTime:
+    """
+    VEVENT1個分の、CSVの日付と時刻への変換(TZ.ics_parts_to_csv_time())。
+
+    繰返しスケジュール(RRULE)は、展開した開始時刻以外はどの回も同じ。
+    DTSTARTとDTENDの取り出し、期間(DTEND-DTSTART)、TimeZoneの有無、
+    終日スケジュールの書式の判断はVEVENTごとに1回だけ行い、
+    csv_time()で展開した開始時刻ごとに変換する。
+    """
+    def __init__(self, ics_parts):
+        """
+        引数:
+            ics_parts: VEVENTのvobjectのcomponetオブジェクト。
+                       x-org-dtstart/x-org-dtendがあればそちらを使う。
+    """
         start = Misc.get_ics_val(ics_parts, 'x-org-dtstart', None, exit_none=False)
         if start is None:
             start = Misc.get_ics_val(ics_parts, 'dtstart')
@@ -784,91 +1492,157 @@ class TZ:
         if end is None:
             end = Misc.get_ics_val(ics_parts, 'dtend')
 
-        if False:
-            print(f"DEBUG: rrule_start = {rrule_start}", file=sys.stderr)
-            print(f"DEBUG: start = {start}", file=sys.stderr)
-            print(f"DEBUG: end = {end}", file=sys.stderr)
-            print(f"DEBUG: F.csv_show_timezone = {F.csv_show_timezone}", file=sys.stderr)
-            print(f"DEBUG: F.CSV_ALLDAY_FORMAT = {F.CSV_ALLDAY_FORMAT}", file=sys.stderr)
-            print(f"DEBUG: F.CSV_FORMAT = {F.CSV_FORMAT}", file=sys.stderr)
-
-        if not rrule_start is None:
-            if TZ.is_aware(start) != TZ.is_aware(rrule_start):
+        self.start = start
+        self.end = end
+        self.aware = TZ.is_aware(start)
+        self.tzinfo = getattr(start, 'tzinfo', None)
+        # 期間。繰返しスケジュールで最初に使う時に求める。
+        self.duration = None
+        # ローカルタイムのTimeZone。awareの時のみ使う。
+        self.localtz = None
+        if self.aware:
+            self.localtz = TZ.guess()
+
+        allday_format = F.CSV_ALLDAY_FORMAT
+        self.remove_time = allday_format in (AllDayFormat.nextdayremtime, AllDayFormat.todayremtime)
+        self.add_time = allday_format == AllDayFormat.addtime
+        self.prev_day = allday_format in (AllDayFormat.today, AllDayFormat.todayremtime)
+        self.time_format = F.CSV_TIME_FORMAT
+
+    def csv_time(self, rrule_start=None) -> tuple:
+        """
+        引数:
+            rrule_start: 繰返しスケジュールの時の開始時刻。
+                         TZ.ics_parts_to_csv_time()を参照。
+        返り値:
+            (ローカルタイムの開始時刻, TZ.ics_parts_to_csv_time()の返り値,
+             sort_key()の返り値)
+    """
+        if rrule_start is None:
+            # ローカルタイムに変換。時間情報がnaiveの時は何もしない。
+            start = TZ.to_localtime(self.start)
+            end = TZ.to_localtime(self.end)
+        else:
+            # RRULEの展開結果のtzinfoはDTSTARTと同じなので、通常はis_aware()を省く。
+            if getattr(rrule_start, 'tzinfo', None) is not self.tzinfo \
+               and TZ.is_aware(rrule_start) != self.aware:
                 #この状態になる場合は、事前処理にミスしてる可能性大
                 raise ValueError("BUG: timezoneありなし混在")
-            end = rrule_start+(end-start)
+            if self.duration is None:
+                self.duration = self.end - self.start
             start = rrule_start
-
-        # 時刻の出力形式
-        date_f = "%Y/%m/%d" # DateTimeFormat.slash_ymd
-        time_f = "%H:%M:%S" # DateTimeFormat.slash_ymd
-
-        if F.CSV_DATE_TIME_FORMAT == DateTimeFormat.basic:
-            date_f = "%Y%m%d"
-            time_f = "%H%M%S"
-
-        if F.CSV_DATE_TIME_FORMAT == DateTimeFormat.extended:
-            date_f = "%Y-%m-%d"
-
-        if False:
-            print(f"DEBUG: start = {start}", file=sys.stderr)
-            print(f"DEBUG: end = {end}", file=sys.stderr)
-
-        # ローカルタイムに変換。時間情報がnaiveの時は何もしない。
-        start = TZ.to_localtime(start)
-        end = TZ.to_localtime(end)
-
-        if False:
-            print(f"DEBUG: start(localtime) = {start}", file=sys.stderr)
-            print(f"DEBUG: end(localtime) = {end}", file=sys.stderr)
+            end = rrule_start + self.duration
+            if self.aware:
+                start = TZ.astimezone(start, self.localtz)
+                end = TZ.astimezone(end, self.localtz)
+        local_start = start
 
         all_day = None
         if TZ.hava_time(start): # 時刻情報あり
             all_day = False
-            if F.CSV_ALLDAY_FORMAT in (AllDayFormat.nextdayremtime, AllDayFormat.todayremtime):
+            if self.remove_time:
                 # ローカルタイムで0:00の時に時間を除去する。
                 if TZ.is_am12(start) and  TZ.is_am12(end):
                     start = start.date()
                     end = end.date()
         else: # 時刻情報なし
             all_day = True
-            if F.CSV_ALLDAY_FORMAT == AllDayFormat.addtime:
-                #print(f"DEBUG: IN addtime", file=sys.stderr)
-
+            if self.add_time:
                 if start == end:
                     raise ValueError("ICSデータ異常startとendに時刻がなく、start == end")
 
                 #第2引数のFalseはTZがないデータでもエラーとしない指示。
                 start = TZ.naive2aware(start, False)
                 end = TZ.naive2aware(end, False)
-                #print(f"DEBUG: conv start = {start}", file=sys.stderr)
-                #print(f"DEBUG: conv end = {end}", file=sys.stderr)
-
-        if False:
-            print(f"DEBUG: start = {start}", file=sys.stderr)
-            print(f"DEBUG: end = {end}", file=sys.stderr)
 
+        # 時刻の出力形式はF.CSV_TIME_FORMAT。
+        if not TZ.hava_time(start):
+            #以下は時刻情報がない場合の処理
+            if self.prev_day:
+                end = end - datetime.timedelta(days=1)
 
-        if TZ.hava_time(start):
-            if F.csv_show_timezone:
-                if TZ.is_aware(start):
-                    time_f += "%z"
-            return start.strftime(date_f), \
-                 start.strftime(time_f), \
-                 end.strftime(date_f), \
-                 end.strftime(time_f), \
-                 all_day
+        return local_start, self.time_format.csv_time(start, end, all_day), \
+            OccurrenceTime.sort_key(start, end)
 
-        #以下は時刻情報がない場合の処理
+    @staticmethod
+    def sort_key(start, end) -> int:
+        """
+        CSVの出力順(Main.csv_write())のキー。CSVに出力する開始日時、
+        終了日時の順に並ぶ整数を返す。時刻情報がない日付は、同じ日の
+        0時0分0秒より前。日付と時刻の出力形式(DateTimeFormat)によらない。
 
-        if F.CSV_ALLDAY_FORMAT in (AllDayFormat.today, AllDayFormat.todayremtime):
-            end = end - datetime.timedelta(days=1)
+        VEVENTキャッシュ(OccurrenceCache)にそのまま保存できるように、
+        tupleではなく整数にしている。
+    """
+        return (OccurrenceTime.day_key(start) << 40) | OccurrenceTime.day_key(end)
 
-        return start.strftime(date_f), "", end.strftime(date_f), "", all_day
-    ###
+    @staticmethod
+    def day_key(d) -> int:
+        """
+        sort_key()の補助関数。datetime.datetime型もしくはdatetime.date型dの
+        ローカルタイムの日時の順に並ぶ、2**40未満の整数を返す。
+    """
+        if type(d) is datetime.date:
+            return d.toordinal() * 86401
+        return d.toordinal() * 86401 + d.hour * 3600 + d.minute * 60 + d.second + 1
 
 class PreSetup:
     """引数の処理およびICSの前処理関係の関数"""
+    @staticmethod
+    def load_format(fname: str) -> dict:
+        """
+        引数--format-fileで指定したJSONファイルからCSVフォーマットの定義を
+        読み込む。形式はConstDat.CSV_FORMATSと同じ。誤りがあれば例外を送出する。
+        encoding, allday, datetimeが無ければ-FSimpleと同じ。
+    """
+        mess = f"ERROR: CSVフォーマットの定義ファイル{fname}の誤り: "
+        try:
+            with open(fname, 'r', encoding='utf-8-sig') as f:
+                fmt = json.load(f)
+        except (OSError, ValueError) as e:
+            raise ValueError(mess + str(e)) from e
+
+        if not isinstance(fmt, dict):
+            raise ValueError(mess + "全体が{}ではありません。")
+        keys = ("encoding", "allday", "datetime", "allday_fixed", "flags", "extend_summary_head", "columns")
+        for k in fmt:
+            if not k in keys:
+                raise ValueError(mess + f"未対応の項目: {k}")
+        for k, e in (("encoding", CharSet), ("allday", AllDayFormat), ("datetime", DateTimeFormat)):
+            fmt.setdefault(k, ConstDat.CSV_FORMATS["simple"][k])
+            if not fmt[k] in e.__members__:
+                raise ValueError(mess + f"{k}の値は{list(e.__members__)}のどれか: {fmt[k]}")
+        for k in ("allday_fixed", "extend_summary_head"):
+            if not isinstance(fmt.get(k, False), bool):
+                raise ValueError(mess + f"{k}の値はtrueかfalse: {fmt[k]}")
+        flags = fmt.get("flags", [])
+        if not isinstance(flags, list):
+            raise ValueError(mess + f"flagsの値はlist: {flags}")
+        for k in flags:
+            if not k in ConstDat.CSV_FORMAT_FLAGS:
+                raise ValueError(mess + f"flagsの値は{list(ConstDat.CSV_FORMAT_FLAGS)}のどれか: {k}")
+
+        columns = fmt.get("columns")
+        if not isinstance(columns, list):
+            raise ValueError(mess + "columnsがありません。")
+        names = []
+        for c in columns:
+            if not (isinstance(c, list) and len(c) == 2 and isinstance(c[0], str) \
+                    and (c[1] is None or isinstance(c[1], str))):
+                raise ValueError(mess + f"columnsの要素は[ヘッダ, ICSの要素]: {c}")
+            name = c[1]
+            if name is None:
+                continue
+            if name in names:
+                raise ValueError(mess + f"ICSの要素が重複しています: {name}")
+            if ':' in name and not (name in Column.SPECIAL or name in Column.TIME):
+                raise ValueError(mess + f"未対応のICS要素: {name}")
+            names.append(name)
+        for name in ConstDat.CSV_REQUIRED:
+            if not name in names:
+                raise ValueError(mess + f"必須のICS要素がありません: {name}")
+        return fmt
+
     @staticmethod
     ###
     #########################################################################
@@ -880,38 +1654,22 @@ class PreSetup:
         対応CSVフォーマットの初期設定および出力文字コードの設定。
     """
         # 各CSVフォーマットの初期値を設定する。
-        # garoonの時のみshift_jis
-        if F.CSV_FORMAT == CSVFormat.garoon:
-            F.CSV_ENCODING = CharSet.shift_jis
-            F.CSV_ALLDAY_FORMAT = AllDayFormat.today
-            F.CSV_DATE_TIME_FORMAT = DateTimeFormat.slash_ymd
-        elif F.CSV_FORMAT == CSVFormat.simple:
-            F.CSV_ENCODING = CharSet.utf_8
-            F.CSV_ALLDAY_FORMAT = AllDayFormat.nextday
-            F.CSV_DATE_TIME_FORMAT = DateTimeFormat.extended
-        elif F.CSV_FORMAT == CSVFormat.outlookclassic:
-            F.CSV_ENCODING = CharSet.utf_8
-            F.CSV_ALLDAY_FORMAT = AllDayFormat.addtime
-            F.CSV_DATE_TIME_FORMAT = DateTimeFormat.slash_ymd
+        # CSVフォーマットの定義はConstDat.CSV_FORMATS。
+        fmt = F.CSV_FORMAT_DEF
+        if fmt is None:
+            fmt = ConstDat.CSV_FORMATS.get(F.CSV_FORMAT.name)
+        if fmt is None:
+            raise ValueError("Internal Error: テーブルの初期化失敗(1)")
+
+        F.CSV_ENCODING = CharSet[fmt["encoding"]]
+        F.CSV_ALLDAY_FORMAT = AllDayFormat[fmt["allday"]]
+        F.CSV_DATE_TIME_FORMAT = DateTimeFormat[fmt["datetime"]]
+        if fmt.get("allday_fixed", False):
             override_all_day_format = None # 上書き不可。
-        elif F.CSV_FORMAT == CSVFormat.cmpouga:
-            # Outlookと GaroonのICS比較用。
-            F.CSV_ENCODING = CharSet.utf_8
-            F.CSV_DATE_TIME_FORMAT = DateTimeFormat.slash_ymd
-            F.CSV_ALLDAY_FORMAT = AllDayFormat.todayremtime
-            F.remove_tail_cr = True
-            F.enhanced_gyoumunum = True
+        for k in fmt.get("flags", []):
+            setattr(F, k, True)
+        if fmt.get("extend_summary_head", False):
             ModCSV.set_summary_extend_head("おそらくバグ:")
-        elif F.CSV_FORMAT == CSVFormat.omitdescription:
-            F.CSV_ENCODING = CharSet.utf_8
-            #GaroonとOutlook比較時はこれを入れないと古いデータの
-            F.CSV_ALLDAY_FORMAT = AllDayFormat.todayremtime
-            F.CSV_DATE_TIME_FORMAT = DateTimeFormat.extended
-        elif F.CSV_FORMAT == CSVFormat.debug1:
-            # debug1は原則変更しない。debug2以降は頻繁に変更の可能性あり。
-            F.CSV_ENCODING = CharSet.utf_8
-            F.CSV_ALLDAY_FORMAT = AllDayFormat.today
-            F.CSV_DATE_TIME_FORMAT = DateTimeFormat.extended
 
         # 文字コードを上書きする。
         if not override_encoding is None:
@@ -924,82 +1682,30 @@ class PreSetup:
         if not override_datetime_format is None:
             F.CSV_DATE_TIME_FORMAT = override_datetime_format
 
+        F.CSV_TIME_FORMAT = TimeFormat(F.CSV_DATE_TIME_FORMAT, F.csv_show_timezone)
+
         #CSVの項目の位置などの初期化。
         # 「：」が入ってるのは特殊な値。
-        # CSVのlistの実際の位置はF.CSV_B_OFFSET+F.CSV_POS[HOGEHOGE]になります。
+        # CSVのlistの実際の位置はF.CSV_POS2["H:LENGTH"]+F.CSV_POS[HOGEHOGE]になります。
 
         # 独自定義のICS要素の追加手順:
 
         # ICSファイルの要素ABCの中身を加工せずにそのまま出力する場合は
-        #  F.CSV_POS["ABC"]  = CSVの位置
+        # CSVフォーマットの定義のcolumnsに
+        #  ["ヘッダ", "ABC"]
         # と記載します。何らかの加工をする場合は「:」付きで以下のような感じで記載し
-        #  F.CSV_POS["X:ABC"]  = CSVの位置
-        #  F.CSV_POS["ABC:適当な名前"]  = CSVの位置
-        # 関数Main.ics_parts_to_csv_buffer()にその要素の
-        # 処理方法を記載します。
-
-        if F.CSV_FORMAT in (CSVFormat.garoon, CSVFormat.cmpouga):
-            h_tail = ["開始日", "開始時刻", "終了日", "終了時刻", "予定", "予定詳細", "メモ"]
-            # 「：」が入ってるのは特殊な値。
-            F.CSV_POS["DTSTART:DAY"] = 0  # DTSTARTの日付
-            F.CSV_POS["DTSTART:TIME"] = 1 # DTSTARTの時刻
-            F.CSV_POS["DTEND:DAY"] = 2
-            F.CSV_POS["DTEND:TIME"] = 3
-            F.CSV_POS["SUMMARY:H"] = 4    # SUMMARYのヘッダ分離
-            F.CSV_POS["SUMMARY"] = 5
-            F.CSV_POS["DESCRIPTION"] = 6
-            F.CSV_POS2["B:LENGTH"] = 7 # CSVの項目の長さ
-        elif F.CSV_FORMAT == CSVFormat.omitdescription:
-            h_tail = ["DTSTART:DAY", "DTSTART:TIME", "DTEND:DAY", "DTEND:TIME", "SUMMARY"]
-            F.CSV_POS["DTSTART:DAY"] = 0  # DTSTARTの日付
-            F.CSV_POS["DTSTART:TIME"] = 1 # DTSTARTの時刻
-            F.CSV_POS["DTEND:DAY"] = 2
-            F.CSV_POS["DTEND:TIME"] = 3
-            F.CSV_POS["SUMMARY"] = 4
-            F.CSV_POS2["B:LENGTH"] = 5 # CSVの項目の長さ
-        elif F.CSV_FORMAT == CSVFormat.debug1:
-            # debug1は原則変更しない。debug2以降は頻繁に変更の可能性あり。
-            h_tail = ["開始日", "開始時刻", "終了日", "終了時刻", "終日イベント", "予定", "予定詳細"]
-            F.CSV_POS["DTSTART:DAY"] = 0  # DTSTARTの日付
-            F.CSV_POS["DTSTART:TIME"] = 1 # DTSTARTの時刻
-            F.CSV_POS["DTEND:DAY"] = 2
-            F.CSV_POS["DTEND:TIME"] = 3
-            F.CSV_POS["X:ALLDAY_EVENT"] = 4
-            F.CSV_POS["SUMMARY:H"] = 5    # SUMMARYのヘッダ分離
-            F.CSV_POS["SUMMARY"] = 6
-            F.CSV_POS2["B:LENGTH"] = 7 # CSVの項目の長さ
-        elif F.CSV_FORMAT == CSVFormat.simple:
-            h_tail = ["DTSTART:DAY", "DTSTART:TIME", "DTEND:DAY", "DTEND:TIME", "SUMMARY",\
-                      "DESCRIPTION", "X-MICROSOFT-CDO-BUSYSTATUS", "CATEGORIES"]
-            F.CSV_POS["DTSTART:DAY"] = 0
-            F.CSV_POS["DTSTART:TIME"] = 1
-            F.CSV_POS["DTEND:DAY"] = 2
-            F.CSV_POS["DTEND:TIME"] = 3
-            F.CSV_POS["SUMMARY"] = 4
-            F.CSV_POS["DESCRIPTION"] = 5
-            F.CSV_POS["X-MICROSOFT-CDO-BUSYSTATUS"] = 6
-            F.CSV_POS["CATEGORIES"] = 7
-            F.CSV_POS2["B:LENGTH"] = 8
-        elif F.CSV_FORMAT == CSVFormat.outlookclassic:
-            h_tail = ["件名", "開始日", "開始時刻", "終了日", "終了時刻", "終日イベント",\
-                      "アラーム オン/オフ", "アラーム日付", "アラーム時刻", "会議の開催者",\
-                      "必須出席者", "任意出席者", "リソース", "プライベート", "経費情報",\
-                      "公開する時間帯の種類", "支払い条件", "場所", "内容", "秘密度", \
-                      "分類", "優先度"]
-            F.CSV_POS["SUMMARY"] = 0
-            F.CSV_POS["DTSTART:DAY"] = 1
-            F.CSV_POS["DTSTART:TIME"] = 2
-            F.CSV_POS["DTEND:DAY"] = 3
-            F.CSV_POS["DTEND:TIME"] = 4
-            F.CSV_POS["X:ALLDAY_EVENT"] = 5
-            F.CSV_POS["ORGANIZER:CN"] = 9
-            F.CSV_POS["ATTENDEE:CN:RSVP:TRUE"] = 10
-            F.CSV_POS["ATTENDEE:CN:RSVP:FALSE"] = 11
-            F.CSV_POS["X-MICROSOFT-CDO-BUSYSTATUS:NUM"] = 15
-            F.CSV_POS["DESCRIPTION"] = 18
-            F.CSV_POS2["B:LENGTH"] = 22
-        else:
-            raise ValueError("Internal Error: テーブルの初期化失敗(1)")
+        #  ["ヘッダ", "ABC:適当な名前"]
+        # Column.SPECIALにその要素の処理方法を記載します。
+
+        h_tail = []
+        for pos, (header, name) in enumerate(fmt["columns"]):
+            h_tail.append(header)
+            if not name is None:
+                F.CSV_POS[name] = pos
+        F.CSV_POS2["B:LENGTH"] = len(fmt["columns"]) # CSVの項目の長さ
+
+        F.CSV_PLAN = Column.compile(fmt["columns"])
+        F.CSV_TIME_POS = tuple(F.CSV_POS.get(name) for name in Column.TIME)
 
         #各種チェック
         #if len(F.CSV_POS) != F.CSV_POS2["B:LENGTH"]:
@@ -1066,6 +1772,7 @@ class PreSetup:
         short_opt += "F:"
         long_opt += ["format-simple", "format-garoon"]
         long_opt += ["format-classic", "format-outlookclassic"]
+        long_opt += ["format-file="]
         #
         short_opt += "T:"
         long_opt += ["override-timezone="]
@@ -1095,13 +1802,18 @@ class PreSetup:
         long_opt += ["day-format-iso8601-basic", "day-format-iso8601-extended",\
                      "day-format-slash-ymd",]
         #
-        long_opt += ["delete-4th-line-onward", "show-teams-infomation"]
+        long_opt += ["delete-4th-line-onward", "show-teams-infomation", "add-teams-marker="]
         long_opt += ["remove-tail-cr", "show-hidden-schedules", "disable-recurrence-id"]
 
         # 文字コード変換時の未定義文字の置き換え
         short_opt += "E:"
         long_opt += ["disable-exdate-format-bugfix", "disable-naive-aware-mixed-bugfix"]
         long_opt += ["DEBUG-UID="]
+        long_opt += ["rrule-horizon="]
+        long_opt += ["no-cache", "cache-dir=", "cache-size="]
+        long_opt += ["workers="]
+        short_opt += "j:"
+        long_opt += ["jobs="]
         #
         #最後に指定されたオプションが有効
         short_opt += "W"
@@ -1145,6 +1857,8 @@ class PreSetup:
                 F.CSV_FORMAT = CSVFormat.garoon
             elif o in ("--format-outlook-classic", "--format-outlookclassic"): # 未実装
                 F.CSV_FORMAT = CSVFormat.outlookclassic # ハイフンなし
+            elif o == "--format-file":
+                F.CSV_FORMAT_DEF = PreSetup.load_format(a)
             elif o in ("-T", "--override-timezone"):
                 F.OVERRIDE_TIMEZONE = a
             elif o in ("-s", "--disable-split-summary"):
@@ -1181,6 +1895,10 @@ class PreSetup:
                 F.description_delete_4th_line_onwards = True
             elif o == "--show-teams-infomation": # old opt: -p
                 F.remove_teams_infomation = False
+            elif o == "--add-teams-marker":
+                if a == "" or any(c in ConstDat.LINE_BREAK_CHARS for c in a):
+                    raise ValueError("ERROR: 引数--add-teams-markerに空の文字列か改行が含まれます。")
+                F.TEAMS_INFOMATION_MARKERS.append(a)
             elif o == "--remove-tail-cr": # old opt -r
                 F.remove_tail_cr = True
             elif o == "-E":
@@ -1202,6 +1920,26 @@ class PreSetup:
                 F.naive_aware_mixed_bugfix = False
             elif o == "--DEBUG-UID":
                 F.DEBUG_UID = a
+            elif o == "--rrule-horizon":
+                if (not a.isdecimal()) or int(a) == 0 or (not TimeRange.format_check(int(a))):
+                    raise ValueError(f"ERROR: 繰返しスケジュールの展開上限の指定の誤り: {a}")
+                F.RRULE_HORIZON = int(a)
+            elif o == "--no-cache":
+                F.use_cache = False
+            elif o == "--cache-dir":
+                F.CACHE_DIR = a
+            elif o == "--cache-size":
+                if not a.isdecimal():
+                    raise ValueError(f"ERROR: キャッシュの上限の指定の誤り: {a}")
+                F.CACHE_SIZE_MB = int(a)
+            elif o == "--workers":
+                if (not a.isdecimal()) or int(a) == 0:
+                    raise ValueError(f"ERROR: 一括変換の並列数の指定の誤り: {a}")
+                F.BATCH_WORKERS = int(a)
+            elif o in ("-j", "--jobs"):
+                if (not a.isdecimal()) or int(a) == 0:
+                    raise ValueError(f"ERROR: 並列数の指定の誤り: {a}")
+                F.PARALLEL_JOBS = int(a)
             elif o == "--enable-file-exist-test":
                 # 引数の指定順序依存あり。
                 # 出力ファイルの上書き確認/入力ファイルの日付確認を行なう。
@@ -1243,74 +1981,62 @@ class PreSetup:
         bugfix_exdate_formatの補助関数1
 
         BEGIN:VEVENTからEND:VEVENTの間のデータをSTRING型のlistで渡して、
-        EXDATE関連を修正する。
+        EXDATE関連を修正する。EXDATEの行が複数あれば、すべて修正する。
+        修正するのはEXDATEの行(折り返しの先頭の行)の要素名のみなので、
+        折り返し行はそのまま。
 
         """
-        flag_exdate = PreSetup.find_ics_data(data, 'EXDATE')
+        found = False
+        for n, i in enumerate(data):
+            if not i.startswith('EXDATE'):
+                continue
+            found = True
 
-        # EXDATEの時刻指定は複数ある場合があるので、修正時は要注意。
-        # 「EXDATE:20250909,20250915」など。
+            # EXDATEの時刻指定は複数ある場合があるので、修正時は要注意。
+            # 「EXDATE:20250909,20250915」など。
 
-        exdate = data[flag_exdate].split(':')
-        if len(exdate) != 2:
-            raise ValueError(f"ERROR: DXDATEの書式異常: {data[flag_exdate]}")
+            exdate = i.split(':')
+            if len(exdate) != 2:
+                raise ValueError(f"ERROR: DXDATEの書式異常: {i}")
+
+            # 時刻情報(T)が一つでもあれば何もしない。
+            #「EXDATE:20250909T112233」など。
+            if 'T' in exdate[1]:
+                continue
 
-        # 時刻情報(T)が一つでもあれば何もしない。
-        #「EXDATE:20250909T112233」など。
-        if re.search('T', exdate[1]):
-            return data
+            # EXDATEに何らかのオプションがあれば何もしない。
+            if exdate[0] != 'EXDATE':
+                continue
 
-        # EXDATEに何らかのオプションがあれば何もしない。
-        if not re.fullmatch('EXDATE', exdate[0]):
-            return data
+            # maybe Garoon. 時刻情報で(時・分)なし。
+            # search: 「EXDATE:20250909」で後ろにTなし。
+            data[n] = 'EXDATE;VALUE=DATE:' + exdate[1]
 
-        # maybe Garoon. 時刻情報で(時・分)なし。
-        # search: 「EXDATE:20250909」で後ろにTなし。
-        exdate[0], count = re.subn('^EXDATE$', 'EXDATE;VALUE=DATE', exdate[0])
-        if count == 0:
-            raise RuntimeError(f"ERROR: 多分バグ(Garoonfix): {exdate[0]}")
-        data[flag_exdate] = exdate[0] + ":" + exdate[1]
+        if not found:
+            raise RuntimeError("ICSのアイテム「EXDATE」が無いVEVENTが渡された")
         return data
 
     ###
     @staticmethod
-    def bugfix_exdate_format(data: str) -> str:
-        """EXDATE関連のbugfix。ICSのファイルをすべて読み込んだ
-    string型のdataを渡して、修正して返却する。
-
-    RRULEのEXDATEが下記形式だとライブラリvobject-0.99では例外を
-    送出します。
-
-      EXDATE:20251128
-
-    本関数は、下記形式に修正します。
-
-      EXDATE;VALUE=DATE:20251128
-
-      バグの詳細についてはmisc/TECH-MEMO.txt 参照ください。
+    def iter_ics_blocks(lines, exdate_bugfix: bool):
+        """
+        ICSを1行ずつ渡して、BEGIN:VEVENTからEND:VEVENTまでをひとまとまり
+        のlistとして返すgenerator。VEVENT以外の行は1行ずつlistにして返す。
 
+        exdate_bugfix=Trueの場合は、VEVENTのEXDATEの書式の修正
+        (bugfix_exdate_format_aux())を行う。
 
+        返り値のlistの先頭が「BEGIN:VEVENT」かどうかでVEVENTか判断できる。
         """
         flag_debug = False
         #flag_debug = True
-        #print(f"DEBUG: arg_type:  {type(data)}")
-        # typeはstrを想定
-        if not type(data) is str:
-            raise RuntimeError(f"ERROR: 想定外の型が渡されました: type={type(data)}")
-
-        # https://maku77.github.io/python/numstr/split-lines.html
-        # 文字列を改行で分割する。
-        lines = data.splitlines()
-        org_line_num = len(lines)
 
         flag_in_vevent = False
         flag_hava_exdate = False
         lines_in_vevent = []
 
-        lines_ret = []
-
         for i in lines:
-            if re.match('BEGIN:VEVENT', i):
+            if i.startswith('BEGIN:VEVENT'):
                 if flag_in_vevent is True:
                     raise RuntimeError("ERROR: 「BEGIN:VEVENT」が二重に現れました")
                 if len(lines_in_vevent) != 0:
@@ -1319,12 +2045,12 @@ class PreSetup:
                 lines_in_vevent.append(i)
                 continue
 
-            if re.match('END:VEVENT', i):
+            if i.startswith('END:VEVENT'):
                 if flag_in_vevent is False:
                     raise RuntimeError("ERROR: 「END:VEVENT」が二重に現れました")
                 flag_in_vevent = False
                 lines_in_vevent.append(i)
-                if flag_hava_exdate:
+                if exdate_bugfix and flag_hava_exdate:
                     if flag_debug:
                         print("DEBUG: PRE:--EXDATE--\n"+'\n'.join(lines_in_vevent) \
                               + "-----\n", file=sys.stderr)
@@ -1332,46 +2058,546 @@ class PreSetup:
                     if flag_debug:
                         print("DEBUG: AFT:----\n"+'\n'.join(lines_in_vevent) \
                               + "-----\n", file=sys.stderr)
-                    flag_hava_exdate = False
+                flag_hava_exdate = False
 
-                lines_ret += lines_in_vevent
+                yield lines_in_vevent
                 lines_in_vevent = []
                 continue
 
             if not flag_in_vevent:
-                lines_ret.append(i)
+                yield [i]
                 continue
 
-            if re.match('EXDATE', i):
+            if i.startswith('EXDATE'):
                 flag_hava_exdate = True
 
             lines_in_vevent.append(i)
         ##
-        if len(lines_ret) != org_line_num:
-            raise RuntimeError("ERROR: 行数が変化している。たぶんバグ")
-
-        return "\n".join(lines_ret) + "\n"
+        if flag_in_vevent:
+            raise RuntimeError("ERROR: 「END:VEVENT」がありません")
 
-class FileIO:
-    """ファイルの読み書き関連"""
+    ###
     @staticmethod
-    def file2str(fname: str) -> str:
+    def scan_ics(source, spans: list):
         """
-        ファイルから読み込み、文字列型で返します。
-    """
-        ret = ""
-        if fname == "stdout" or fname[0] == "-":
-            #raise RuntimeError(f"入力ファイル")
-            print(f"ERROR: 入力元のICSファイル名指定エラー: {fname}", file=sys.stderr)
-            sys.exit(1)
-
-        if fname == "stdin":
-            ret = sys.stdin.read()
-            return ret
+        open_ics()で得た入力元を読み込んで、iter_ics_blocks()と同じように
+        BEGIN:VEVENTからEND:VEVENTまでをひとまとまりのlistとして返す
+        generator。VEVENT以外の行は1行ずつlistにして返す。EXDATEの書式の
+        修正は行わない。
+
+        あわせて、VEVENTの位置を[開始, 終了, EXDATEの有無]としてspansに
+        追加する。位置はFileIO.ics_lines_pos()の返り値。2回目の読み込み
+        (iter_vevent_blocks())では、spansを使ってVEVENTの部分だけを
+        読み直すので、行ごとの判断やVEVENT以外の行の読み込みをしない。
+
+        BEGIN:VEVENTやEND:VEVENTがファイルの1行に他の行と一緒に入っている
+        (改行がCRのみなど)場合は、EXDATEの有無をNoneにする。前の
+        VEVENTとファイルの同じ行にある場合は、前のVEVENTの位置とまとめる。
+
+        改行がLFかCRLFのみのファイルは、mmapしてバイト列のまま調べる
+        (scan_ics_bytes())。
+        """
+        with FileIO.mmap_ics(source) as mm:
+            if not mm is None and PreSetup.is_plain_ics(mm):
+                yield from PreSetup.scan_ics_bytes(mm, spans)
+                return
 
-        if not os.path.exists(fname):
-            print(f"ERROR: 入力元のICSファイル「{fname}」が存在しません", file=sys.stderr)
-            sys.exit(1)
+        flag_in_vevent = False
+        lines_in_vevent = []
+        span = None
+
+        for i, start, end, whole in FileIO.ics_lines_pos(source):
+            if i.startswith('BEGIN:VEVENT'):
+                if flag_in_vevent is True:
+                    raise RuntimeError("ERROR: 「BEGIN:VEVENT」が二重に現れました")
+                flag_in_vevent = True
+                lines_in_vevent.append(i)
+                span = [start, end, False if whole else None]
+                continue
+
+            if i.startswith('END:VEVENT'):
+                if flag_in_vevent is False:
+                    raise RuntimeError("ERROR: 「END:VEVENT」が二重に現れました")
+                flag_in_vevent = False
+                lines_in_vevent.append(i)
+                span[1] = end
+                if not whole:
+                    span[2] = None
+                if len(spans) > 0 and span[0] < spans[-1][1]:
+                    spans[-1][1] = span[1]
+                    spans[-1][2] = None
+                else:
+                    spans.append(span)
+
+                yield lines_in_vevent
+                lines_in_vevent = []
+                continue
+
+            if not flag_in_vevent:
+                yield [i]
+                continue
+
+            if span[2] is False and i.startswith('EXDATE'):
+                span[2] = True
+
+            lines_in_vevent.append(i)
+        ##
+        if flag_in_vevent:
+            raise RuntimeError("ERROR: 「END:VEVENT」がありません")
+
+    # scan_ics_bytes()で探す行。VEVENTの開始と終了、EXDATE、及びMain.load_ics()で
+    # 使うUID、DTSTART、RECURRENCE-IDの行(折り返し行を含む)。
+    SCAN_PATTERN = re.compile(rb'\n(?:(?:UID|RECURRENCE-ID|DTSTART)[:;][^\n]*(?:\n[ \t][^\n]*)*'
+                              rb'|EXDATE|BEGIN:VEVENT|END:VEVENT)')
+
+    ###
+    @staticmethod
+    def is_plain_ics(mm) -> bool:
+        """
+        mmapしたICSファイルを、scan_ics_bytes()で調べられるならTrue。
+
+        改行がLFかCRLFのみで、str.splitlines()が区切る他の文字(CRのみ、
+        \x0b、\x0c、\x1c-\x1e、U+0085、U+2028、U+2029)が無く、先頭の行が
+        BEGIN:VEVENT/END:VEVENTでないこと。
+        """
+        if not re.search(rb'\r(?!\n)', mm) is None:
+            return False
+        for c in (b'\x0b', b'\x0c', b'\x1c', b'\x1d', b'\x1e', b'\xc2\x85', b'\xe2\x80\xa8', b'\xe2\x80\xa9'):
+            if mm.find(c) != -1:
+                return False
+        head = mm[:len(codecs.BOM_UTF8) + 12]
+        if head.startswith(codecs.BOM_UTF8):
+            head = head[len(codecs.BOM_UTF8):]
+        return not head.startswith((b'BEGIN:VEVENT', b'END:VEVENT'))
+
+    ###
+    @staticmethod
+    def scan_ics_bytes(mm, spans: list):
+        """
+        scan_ics()の補助関数。is_plain_ics()なファイルを、mmapしたバイト列
+        のまま調べる。VEVENTの位置はSCAN_PATTERNで探す。
+
+        VEVENT以外の行はscan_ics()と同じく1行ずつlistにして返す。VEVENTは
+        全体をデコードせず、BEGIN:VEVENT、SCAN_PATTERNのUID、DTSTART、
+        RECURRENCE-IDの行、END:VEVENTのみのlistにして返す。Main.load_ics()
+        で使うのはこれらの行だけ。VEVENT全体は2回目の読み込み
+        (iter_vevent_blocks())で、処理するものだけデコードする。
+        """
+        pos = len(codecs.BOM_UTF8) if mm[:len(codecs.BOM_UTF8)] == codecs.BOM_UTF8 else 0
+        flag_in_vevent = False
+        lines_in_vevent = []
+        span = None
+
+        with memoryview(mm) as view:
+            for m in PreSetup.SCAN_PATTERN.finditer(mm, pos):
+                start = m.start() + 1
+                line = m.group()
+                if line.startswith((b'\nBEGIN:VEVENT', b'\nEND:VEVENT')):
+                    end = mm.find(b'\n', start) + 1 or len(mm)
+                    lines = mm[start:end].decode('utf-8').splitlines()
+
+                    if line.startswith(b'\nBEGIN:VEVENT'):
+                        if flag_in_vevent is True:
+                            raise RuntimeError("ERROR: 「BEGIN:VEVENT」が二重に現れました")
+                        flag_in_vevent = True
+                        # 前のVEVENTからの、VEVENT以外の行。
+                        with view[pos:start] as chunk:
+                            for i in str(chunk, 'utf-8').splitlines():
+                                yield [i]
+                        lines_in_vevent = lines
+                        span = [start, None, False]
+                        continue
+
+                    if flag_in_vevent is False:
+                        raise RuntimeError("ERROR: 「END:VEVENT」が二重に現れました")
+                    flag_in_vevent = False
+                    lines_in_vevent += lines
+                    span[1] = pos = end
+                    spans.append(span)
+                    yield lines_in_vevent
+                    lines_in_vevent = []
+                    continue
+
+                # VEVENT以外(VTODOなど)のUIDなどは、VEVENT以外の行として返す。
+                if not flag_in_vevent:
+                    continue
+
+                if line == b'\nEXDATE':
+                    span[2] = True
+                    continue
+
+                lines_in_vevent += line[1:].decode('utf-8').splitlines()
+
+            if flag_in_vevent:
+                raise RuntimeError("ERROR: 「END:VEVENT」がありません")
+
+            with view[pos:] as chunk:
+                for i in str(chunk, 'utf-8').splitlines():
+                    yield [i]
+
+    ###
+    @staticmethod
+    def iter_vevent_blocks(source, spans: list, exdate_bugfix: bool):
+        """
+        scan_ics()で調べたVEVENTの位置spansから、VEVENTの行のlistを
+        1個ずつ返すgenerator。
+
+        exdate_bugfix=Trueの場合は、EXDATEがあるVEVENTのみEXDATEの書式の
+        修正(bugfix_exdate_format_aux())を行う。EXDATEの有無がNoneの位置は、
+        iter_ics_blocks()で分割し直す。
+        """
+        for lines, flag_exdate in FileIO.read_spans(source, spans):
+            if flag_exdate is None:
+                for block in PreSetup.iter_ics_blocks(lines, exdate_bugfix):
+                    if block[0].startswith('BEGIN:VEVENT'):
+                        yield block
+                continue
+
+            if exdate_bugfix and flag_exdate:
+                lines = PreSetup.bugfix_exdate_format_aux(lines)
+            yield lines
+
+    ###
+    @staticmethod
+    def bugfix_exdate_format(data: str) -> str:
+        """EXDATE関連のbugfix。ICSのファイルをすべて読み込んだ
+    string型のdataを渡して、修正して返却する。
+
+    RRULEのEXDATEが下記形式だとライブラリvobject-0.99では例外を
+    送出します。
+
+      EXDATE:20251128
+
+    本関数は、下記形式に修正します。
+
+      EXDATE;VALUE=DATE:20251128
+
+      バグの詳細についてはmisc/TECH-MEMO.txt 参照ください。
+
+      処理本体はiter_ics_blocks()です。
+
+        """
+        #print(f"DEBUG: arg_type:  {type(data)}")
+        # typeはstrを想定
+        if not type(data) is str:
+            raise RuntimeError(f"ERROR: 想定外の型が渡されました: type={type(data)}")
+
+        # https://maku77.github.io/python/numstr/split-lines.html
+        # 文字列を改行で分割する。
+        lines = data.splitlines()
+        org_line_num = len(lines)
+
+        lines_ret = []
+        for block in PreSetup.iter_ics_blocks(lines, True):
+            lines_ret += block
+        ##
+        if len(lines_ret) != org_line_num:
+            raise RuntimeError("ERROR: 行数が変化している。たぶんバグ")
+
+        return "\n".join(lines_ret) + "\n"
+
+    ###
+    @staticmethod
+    def raw_ics_line(block: list, name: str) -> str:
+        """
+        VEVENTの行のlistから要素nameの行を探し、折り返しを戻して返す。
+        要素が無い場合はNoneを返す。vobjectには変換しない。
+
+        例: raw_ics_line(block, 'DTSTART') -> 'DTSTART;TZID=Tokyo Standard Time:20250901T090000'
+        """
+        ret = None
+        for i in block[1:-1]:
+            if ret is None:
+                if i.startswith(name) and i[len(name):len(name)+1] in (':', ';'):
+                    ret = i
+                continue
+            if i[:1] not in (' ', '\t'):
+                break
+            # 折り返し行。RFC5545 3.1. Content Lines
+            ret += i[1:]
+        return ret
+
+    ###
+    @staticmethod
+    def raw_ics_value(block: list, name: str) -> str:
+        """
+        raw_ics_line()の行から、パラメータを除いた値の部分を返す。値は
+        引用符(")の外の最初の':'の後ろ。要素が無い場合はNoneを返す。
+
+        例: raw_ics_value(block, 'UID') -> '040000008200E00074C5B7101A82E008'
+        """
+        line = PreSetup.raw_ics_line(block, name)
+        if line is None:
+            return None
+        quoted = False
+        for i, c in enumerate(line):
+            if c == '"':
+                quoted = not quoted
+            elif c == ':' and not quoted:
+                return line[i+1:]
+        return ''
+
+    ###
+    @staticmethod
+    def vevent_prefilter(block: list, lo, hi, override_uids: dict) -> bool:
+        """
+        VEVENTの行のlistを、vobjectに変換せずに調べて、期間[lo, hi)の
+        CSVに出力される可能性があればTrue、明らかに無ければFalseを返す。
+
+        引数:
+        block: VEVENTの行のlist。
+        lo, hi: TimeRange.window()の返り値。
+        override_uids: 上書スケジュール(RECURRENCE-ID)があるVEVENTの
+                       UIDの値(raw_ics_value()の返り値)をkeyとするdict。
+
+        判断に迷う場合は常にTrueを返す。
+          - RRULE/RDATEがある: 繰返しスケジュールの展開が必要。
+          - RECURRENCE-IDがある/UIDがoverride_uidsにある: 上書スケジュール
+            の復元(RecurrenceID.restore())に必要。
+          - DTSTARTの日付が読めない。
+
+        CSVへの出力はDTSTARTで判断する(TimeRange.is_collect())ので、
+        DTENDは見ない。TimeZoneによる日付のずれはlo, hiの余裕で吸収する。
+        """
+        for name in ('RRULE', 'RDATE', 'RECURRENCE-ID'):
+            if not PreSetup.raw_ics_line(block, name) is None:
+                return True
+
+        if PreSetup.raw_ics_value(block, 'UID') in override_uids:
+            return True
+
+        d = PreSetup.raw_dtstart(block)
+        if d is None:
+            return True
+
+        return lo <= d < hi
+
+    ###
+    @staticmethod
+    def raw_dtstart(block: list) -> datetime.datetime:
+        """
+        VEVENTの行のlistから、DTSTARTの日付をvobjectに変換せずに読み、
+        0時0分のnaiveなdatetime.datetimeで返す。読めない場合はNone。
+        時刻とTimeZoneは見ない。
+        """
+        dtstart = PreSetup.raw_ics_line(block, 'DTSTART')
+        if dtstart is None:
+            return None
+        m = re.match(r'(\d{4})(\d{2})(\d{2})', dtstart.rsplit(':', 1)[-1])
+        if m is None:
+            return None
+        try:
+            return datetime.datetime(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+        except ValueError:
+            return None
+
+    ###
+    @staticmethod
+    def override_skeleton(block: list) -> list:
+        """
+        VEVENTのlistからUIDとRECURRENCE-IDの行(折り返し行を含む)のみを
+        取り出して、VEVENTのlistとして返す。RECURRENCE-IDが無い場合は
+        Noneを返す。
+
+        上書スケジュール(RECURRENCE-ID)の一覧をVEVENT全体を
+        vobjectに変換せずに作るために使う。
+        """
+        ret = []
+        flag_found = False
+        flag_keep = False
+        for i in block[1:-1]:
+            if i[:1] in (' ', '\t'):
+                # 折り返し行。RFC5545 3.1. Content Lines
+                if flag_keep:
+                    ret.append(i)
+                continue
+            flag_keep = i.startswith(('UID:', 'UID;', 'RECURRENCE-ID:', 'RECURRENCE-ID;'))
+            if flag_keep:
+                ret.append(i)
+                if i.startswith('RECURRENCE-ID'):
+                    flag_found = True
+
+        if not flag_found:
+            return None
+        return [block[0]] + ret + [block[-1]]
+
+class NonPrintTable:
+    """
+    -Esimple、-Ereplace_getaで、CSVの文字コードで表せない文字の置き換えを
+    書き込む前にstr.translate()で行う。
+
+    エラーハンドラ(FileIO.simple_handler()、FileIO.replace_geta_handler())
+    は表せない文字1文字ごとに呼ばれるので遅い。表せない文字とその置き換えを
+    表(self.table)にしておき、その文字を含む欄だけtranslate()する。
+    表に無い文字は、これまでどおり書き込み時にエラーハンドラが置き換え、
+    add()で表に加える。置き換えの結果はエラーハンドラと同じなので、
+    CSVは変わらない。
+
+    同じ欄を何度も置き換えないよう、欄ごとの結果はCSVWriterが覚えておく。
+    """
+    def __init__(self, encoding: str, char_map: dict):
+        self.encoding = encoding
+        self.table = {}
+        self.pattern = None
+        for c, s in char_map.items():
+            try:
+                c.encode(encoding)
+            except UnicodeEncodeError:
+                self.add(c, s)
+
+    @staticmethod
+    def create(encoding, handle):
+        """
+        CSVの文字コードencoding(CharSet型)とエラーハンドラhandle
+        (NonPrintErrorHandle型)に合ったNonPrintTableを返す。
+        置き換えをしない場合はNone。
+    """
+        if encoding in (CharSet.utf_8, CharSet.utf_8_sig):
+            return None
+        if handle == NonPrintErrorHandle.simple:
+            return NonPrintTable(encoding.name, F.NON_PR_CHAR_MAP)
+        if handle == NonPrintErrorHandle.replace_geta:
+            return NonPrintTable(encoding.name, {})
+        return None
+
+    def add(self, c: str, s: str) -> None:
+        """
+        表せない文字cをsに置き換えるよう表に加える。
+        sに「"」や改行があると、CSVの引用符の付け方が変わるので加えない。
+    """
+        if ord(c) in self.table or '"' in s or "\r" in s or "\n" in s:
+            return
+        self.table[ord(c)] = s
+        self.pattern = None
+
+    def translate(self, s):
+        """
+        欄sの表せない文字を置き換えた文字列を返す。
+    """
+        if s.isascii() or not self.table:
+            return s
+        if self.pattern is None:
+            self.pattern = re.compile("[" + re.escape("".join(map(chr, self.table))) + "]")
+        if self.pattern.search(s):
+            return s.translate(self.table)
+        return s
+
+
+class CSVWriter:
+    """
+    CSVの書き込み。csv.writer(quoting=csv.QUOTE_ALL)と同じ形式の行を
+    バイト列にして、CHUNK_SIZEごとにまとめて書く。
+
+    欄は1個ずつ「"」で囲んでCSVの文字コードに変換する。SUMMARYや
+    DESCRIPTIONは繰返しスケジュールの各行で同じ文字列なので、変換した
+    バイト列を欄の文字列をキーに覚えておく。覚えた数がCACHE_MAXを超えたら
+    全部忘れる。文字コード(shift_jis、utf_8)は状態を持たないので、欄ごとに
+    変換しても、行をまとめて変換した場合と同じバイト列になる。
+    utf_8_sigのBOMは、io.TextIOWrapperと同じくファイルの先頭に書く場合だけ
+    最初に1回書く。
+    """
+    # まとめて書く大きさ(バイト)
+    CHUNK_SIZE = 1 << 20
+    # 覚えておく欄の数の上限
+    CACHE_MAX = 4096
+
+    def __init__(self, out, encoding: str, errors: str, non_print=None, close=True):
+        self.out = out
+        self.close_out = close
+        self.errors = errors
+        self.non_print = non_print
+        self.bom = b""
+        if encoding == CharSet.utf_8_sig.name:
+            encoding = CharSet.utf_8.name
+            if not (out.seekable() and out.tell() != 0):
+                self.bom = codecs.BOM_UTF8
+        self.encoding = encoding
+        self.fields = {}
+        self.chunk = []
+        self.chunk_size = 0
+        # 文字列以外の欄の書式はcsv.writerに任せる。
+        self.other = io.StringIO()
+        self.other_writer = csv.writer(self.other, quoting=csv.QUOTE_ALL, lineterminator="")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def field(self, s) -> bytes:
+        """
+        欄sを「"」で囲んでCSVの文字コードに変換したバイト列を返す。
+    """
+        if type(s) is not str:
+            self.other.seek(0)
+            self.other.truncate()
+            self.other_writer.writerow([s])
+            return self.other.getvalue().encode(self.encoding, self.errors)
+
+        ret = self.fields.get(s)
+        if ret is None:
+            t = s
+            if self.non_print is not None:
+                t = self.non_print.translate(t)
+            ret = ('"' + t.replace('"', '""') + '"').encode(self.encoding, self.errors)
+            if len(self.fields) >= CSVWriter.CACHE_MAX:
+                self.fields.clear()
+            self.fields[s] = ret
+        return ret
+
+    def writerow(self, row: list) -> None:
+        """
+        CSVの1行を書く。行末はcsv.writerと同じくCR+LF。
+    """
+        field = self.field
+        line = b",".join([field(s) for s in row]) + b"\r\n"
+        self.chunk.append(line)
+        self.chunk_size += len(line)
+        if self.chunk_size >= CSVWriter.CHUNK_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        まとめた行を書く。
+    """
+        if not self.chunk:
+            return
+        self.out.write(self.bom + b"".join(self.chunk))
+        self.bom = b""
+        self.chunk = []
+        self.chunk_size = 0
+
+    def close(self) -> None:
+        """
+        残りの行を書いて、ファイルを閉じる。標準出力は閉じない。
+    """
+        self.flush()
+        if self.close_out:
+            self.out.close()
+        else:
+            self.out.flush()
+
+
+class FileIO:
+    """ファイルの読み書き関連"""
+    @staticmethod
+    def check_ics_file(fname: str) -> None:
+        """
+        入力元のICSファイル名の確認と、ファイルの日付確認を行います。
+        異常があれば停止します。
+    """
+        if fname == "stdout" or fname[0] == "-":
+            #raise RuntimeError(f"入力ファイル")
+            print(f"ERROR: 入力元のICSファイル名指定エラー: {fname}", file=sys.stderr)
+            sys.exit(1)
+
+        if fname == "stdin":
+            return
+
+        if not os.path.exists(fname):
+            print(f"ERROR: 入力元のICSファイル「{fname}」が存在しません", file=sys.stderr)
+            sys.exit(1)
 
         global F
         if F.old_file_check:
@@ -1406,12 +2632,92 @@ class FileIO:
 
             #２回目は警告しない。
             F.old_file_check = False
+    # end of func
 
-        # utf-8-sig: BOM付きデータを読み込む。BOMがなければなにもしない。
-        # https://docs.python.org/ja/2.7/library/codecs.html#module-encodings.utf_8_sig
-        with open(fname, 'r', encoding='utf-8-sig') as f:
-            ret = f.read()
-        return ret
+    @staticmethod
+    def open_ics(fname: str):
+        """
+        入力元のICSファイルを確認し、FileIO.ics_lines_pos()に渡す入力元を返します。
+
+        ファイルの場合はファイル名を返し、ics_lines_pos()やread_spans()で
+        呼ばれるたびに開き直す。標準入力("stdin")は読み直しができないため、
+        行のlistにして返す。
+    """
+        FileIO.check_ics_file(fname)
+        if fname == "stdin":
+            return sys.stdin.read().splitlines()
+        return fname
+
+    @staticmethod
+    def ics_lines_pos(source):
+        """
+        open_ics()で得た入力元から1行ずつ読み込むgenerator。改行は取り除く。
+        分割はstr.splitlines()と同じ。(行, 開始, 終了, 単独)のtupleを返す。
+
+        開始, 終了: その行を含むファイルの行(改行LFまで)のバイト位置。
+                    read_spans()で読み直す時に使う。標準入力の場合は行番号。
+        単独: ファイルの行に、その行しかない場合True。改行がCRのみの
+              場合などはFalse。
+    """
+        if type(source) is list:
+            for n, line in enumerate(source):
+                yield line, n, n + 1, True
+            return
+
+        with open(source, 'rb') as f:
+            end = 0
+            for raw in f:
+                start = end
+                end += len(raw)
+                # utf-8-sig: BOM付きデータを読み込む。BOMがなければなにもしない。
+                if start == 0 and raw.startswith(codecs.BOM_UTF8):
+                    start = len(codecs.BOM_UTF8)
+                    raw = raw[start:]
+                lines = raw.decode('utf-8').splitlines()
+                whole = len(lines) == 1
+                for line in lines:
+                    yield line, start, end, whole
+    # end of func
+
+    @staticmethod
+    def read_spans(source, spans: list):
+        """
+        PreSetup.scan_ics()で調べた位置spansの部分を読み込み、
+        (行のlist, EXDATEの有無)を1個ずつ返すgenerator。
+    """
+        if type(source) is list:
+            for start, end, flag_exdate in spans:
+                yield source[start:end], flag_exdate
+            return
+
+        with FileIO.mmap_ics(source) as mm:
+            if mm is None:
+                return
+            with memoryview(mm) as view:
+                for start, end, flag_exdate in spans:
+                    with view[start:end] as chunk:
+                        lines = str(chunk, 'utf-8').splitlines()
+                    yield lines, flag_exdate
+    # end of func
+
+    @staticmethod
+    @contextlib.contextmanager
+    def mmap_ics(source):
+        """
+        open_ics()で得た入力元のファイルを、読み込み専用でmmapする
+        context manager。ファイル全体をstrやbytesにせずに、必要な部分
+        だけをデコードするために使う。標準入力(行のlist)と空のファイルはNone。
+    """
+        if type(source) is list:
+            yield None
+            return
+
+        with open(source, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                yield None
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                yield mm
     # end of func
 
     #######################################
@@ -1432,6 +2738,8 @@ class FileIO:
             print(f"ErrorHandle:reason: {error.reason}", file=sys.stderr)
 
         ###
+        if F.CSV_NON_PRINT_TABLE is not None:
+            F.CSV_NON_PRINT_TABLE.add(error.object[error.start], ConstDat.NON_PR_CHAR_DEFAULT)
         return (ConstDat.NON_PR_CHAR_DEFAULT, error.end)
 
     @staticmethod
@@ -1441,8 +2749,24 @@ class FileIO:
         未定義文字をConstDat.NON_PR_CHAR_DEFAULTに変換する。
     """
         c = error.object[error.start]
-        c = F.NON_PR_CHAR_MAP.get(c, ConstDat.NON_PR_CHAR_DEFAULT)
-        return (c, error.end)
+        ret = F.NON_PR_CHAR_MAP.get(c, ConstDat.NON_PR_CHAR_DEFAULT)
+        if F.CSV_NON_PRINT_TABLE is not None:
+            F.CSV_NON_PRINT_TABLE.add(c, ret)
+        return (ret, error.end)
+
+    @staticmethod
+    def confirm_overwrite(fname: str) -> None:
+        """
+        出力先のファイルがすでに存在する場合、上書きするか確認する。
+        F.overwriteがTrueの場合は確認しない。
+    """
+        if (not F.overwrite) and os.path.exists(fname):
+            print(f"WARNING: CSVファイル 「{fname}」 がすでに存在します。")
+            print("WARNING: 上書きしますか?")
+            inp = input('WARNING: [Y]es/[N]o? >> ').lower()
+            if not (inp in ('y', 'yes')):
+                print("WARNING: 処理を中断します。")
+                sys.exit(1)
 
     @staticmethod
     def open_csv_object(fname: str):
@@ -1459,39 +2783,679 @@ class FileIO:
         if fname == "stdin"  or fname[0] == "-":
             raise RuntimeError(f"ファイル名指定エラー: {fname}")
 
-        if F.NON_PRINT_ERROR_HANDLE == NonPrintErrorHandle.replace_geta:
-            codecs.register_error('replace_geta', FileIO.replace_geta_handler)
-        elif F.NON_PRINT_ERROR_HANDLE == NonPrintErrorHandle.simple:
-            codecs.register_error('simple', FileIO.simple_handler)
-
+        # 書き込みはバイト列(CSVWriter)。標準出力はsys.stdout.bufferに書く。
+        # エラーハンドラ'replace_geta'と'simple'はモジュール読み込み時に登録済み。
         if fname == "stdout":
-
-            sys.stdout = io.TextIOWrapper(sys.stdout.buffer, \
-                                          encoding=F.CSV_ENCODING.name, \
-                                          errors=F.NON_PRINT_ERROR_HANDLE.name, newline="")
-            csv_out = sys.stdout
+            sys.stdout.flush()
+            csv_out = sys.stdout.buffer
         else:
-            if (not F.overwrite) and os.path.exists(fname):
-                print(f"WARNING: CSVファイル 「{fname}」 がすでに存在します。")
-                print("WARNING: 上書きしますか?")
-                inp = input('WARNING: [Y]es/[N]o? >> ').lower()
-                if not (inp in ('y', 'yes')):
-                    print("WARNING: 処理を中断します。")
-                    sys.exit(1)
+            FileIO.confirm_overwrite(fname)
 
-            csv_out = open(fname, 'w', encoding=F.CSV_ENCODING.name, errors=F.NON_PRINT_ERROR_HANDLE.name, newline="")
+            csv_out = open(fname, 'wb')
 
-        # Pythonライブラリの仕様でCSVの最後の改行はCR+LF。
+        F.CSV_NON_PRINT_TABLE = NonPrintTable.create(F.CSV_ENCODING, F.NON_PRINT_ERROR_HANDLE)
+
+        # Pythonライブラリの仕様でCSVの最後の改行はCR+LF。CSVWriterも同じ。
         # Ref: https://docs.python.org/ja/3/library/csv.html
         # ->「Dialect.lineterminator」
         # -> 「writer が作り出す各行を終端する際に用いられる文字列です。デフォルトでは '\r\n' です。」
 
-        return csv.writer(csv_out, quoting=csv.QUOTE_ALL)
+        return CSVWriter(csv_out, F.CSV_ENCODING.name, F.NON_PRINT_ERROR_HANDLE.name, \
+                         F.CSV_NON_PRINT_TABLE, close=(fname != "stdout"))
+
+# 文字コード変換時のエラーハンドラ。codecsへの登録はプロセス全体で共有
+# されるため、変換ごとではなく読み込み時に一度だけ登録する。
+# ハンドラが参照するFは変換を行っているスレッドのもの。
+codecs.register_error('replace_geta', FileIO.replace_geta_handler)
+codecs.register_error('simple', FileIO.simple_handler)
+
+
+class StderrLog:
+    """
+    標準エラー出力への表示を記録する。ResultCacheで、キャッシュを使った
+    時に変換時の警告などを同じように表示するために使う。
+
+    record()のwithブロックの間だけ、sys.stderrを本クラスに置き換える。表示
+    は元のsys.stderrにそのまま渡し、そのスレッドの表示だけを記録する。記
+    録先はcontextvarsに保存するので、複数のスレッドから同時に変換を行って
+    も互いに混ざらない。すべてのスレッドのwithブロックを抜けたら、
+    sys.stderrを元に戻す。
+    """
+    current = contextvars.ContextVar("libicsconvcsv.StderrLog", default=None)
+    # sys.stderrの置き換えと、withブロックの数を数える時のロック。
+    lock = threading.Lock()
+    # 実行中のrecord()のwithブロックの数。0になったらsys.stderrを元に戻す。
+    depth = 0
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, s: str) -> int:
+        log = StderrLog.current.get()
+        if not log is None:
+            log.append(s)
+        return self.stream.write(s)
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+    @staticmethod
+    @contextlib.contextmanager
+    def record():
+        """
+        withブロックの間の標準エラー出力への表示を記録する。記録した文字列
+        のlistを返す。
+        """
+        with StderrLog.lock:
+            if not isinstance(sys.stderr, StderrLog):
+                sys.stderr = StderrLog(sys.stderr)
+            StderrLog.depth += 1
+        log = []
+        token = StderrLog.current.set(log)
+        try:
+            yield log
+        finally:
+            StderrLog.current.reset(token)
+            with StderrLog.lock:
+                StderrLog.depth -= 1
+                if StderrLog.depth == 0 and isinstance(sys.stderr, StderrLog):
+                    sys.stderr = sys.stderr.stream
+
+
+class ResultCache:
+    """
+    変換結果(CSVファイル)のキャッシュ。
+
+    入力のICSファイルの中身、出力に影響するFeatureFlags、timerange、
+    VERSION、ライブラリ(本ファイル)の中身、TimeZoneのデータベース(tzdata)
+    のバージョンが同じなら、前回の変換結果のCSVをそのまま出力する。
+    ライブラリやtzdataを更新したら前回の変換結果は使わない。
+    vobjectやdateutilは使わない。
+
+    キャッシュはF.CACHE_DIRに1変換1ファイルで保存し、合計が
+    F.CACHE_SIZE_MBを超えたら最後に使った日時が古いものから消す(LRU)。
+    ファイルには終了ステータス、変換中の標準エラー出力への表示
+    (StderrLog)、CSVの順に保存する。キャッシュを使った時も、復元に失敗
+    した繰返し命令の一覧などを変換時と同じように表示する。
+
+    標準入力/標準出力を使う場合や--DEBUG-UID指定時はキャッシュを使わない。
+    """
+    # 出力に影響しない、もしくは他の要素から決まるFeatureFlagsの要素。キャッシュのキーに含めない。
+    IGNORE_FLAGS = ('old_file_check', 'overwrite', 'GUESS_TIMEZONE', 'guess_timezone_initalized',\
+                    'TIMEZONE_YEARS', 'TIMEZONE_SWAP', 'TIMEZONE_TABLES',\
+                    'use_cache', 'CACHE_DIR', 'CACHE_SIZE_MB', 'BATCH_WORKERS', 'PARALLEL_JOBS',\
+                    'CSV_PLAN', 'CSV_TIME_POS', 'CSV_TIME_FORMAT', 'CSV_NON_PRINT_TABLE',\
+                    'cache_hit', 'cache_miss')
+    # キャッシュのファイルの拡張子
+    SUFFIX = ".csvcache"
+
+    # ライブラリ(本ファイル)の中身のハッシュ値。source_digest()で1回だけ求める。
+    SOURCE_DIGEST = None
+    # TimeZoneのデータベースのバージョン。tzdata_version()で1回だけ求める。
+    TZDATA_VERSION = None
+
+    # F.cache_hit, F.cache_missを数える時のロック。ConvertedCalendarは複数スレッドでFを共有する。
+    lock = threading.Lock()
+
+    @staticmethod
+    def is_enabled(ics_file_path: str, csv_file_path: str) -> bool:
+        """
+        キャッシュを使うかどうか。
+    """
+        if not F.use_cache:
+            return False
+        if not F.DEBUG_UID is None:
+            return False
+        if ics_file_path == "stdin" or csv_file_path == "stdout":
+            return False
+        return True
+
+    @staticmethod
+    def digest(ics_file_path: str) -> str:
+        """
+        入力のICSファイルの中身のハッシュ値を返す。
+    """
+        h = hashlib.sha256()
+        with open(ics_file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024*1024), b''):
+                h.update(chunk)
+        return h.hexdigest()
+
+    @staticmethod
+    def source_digest() -> str:
+        """
+        ライブラリ(本ファイル)の中身のハッシュ値を返す。読めなければ""。
+        """
+        if ResultCache.SOURCE_DIGEST is None:
+            try:
+                with open(__file__, 'rb') as f:
+                    ResultCache.SOURCE_DIGEST = hashlib.sha256(f.read()).hexdigest()
+            except OSError:
+                ResultCache.SOURCE_DIGEST = ""
+        return ResultCache.SOURCE_DIGEST
+
+    @staticmethod
+    def tzdata_version() -> tuple:
+        """
+        zoneinfoが使うTimeZoneのデータベースのバージョンを返す。引数-Tや
+        VTIMEZONEのzoneinfo.ZoneInfoへの差し替え(TZ.iana_timezone())の
+        結果はtzdataで変わる。
+
+        zoneinfo.TZPATHの各フォルダはtzdata.ziの先頭行("# version 2025b")、
+        無ければフォルダの更新日時。zoneinfo.TZPATHに無いTimeZoneで使う
+        Pythonのライブラリtzdataはバージョン。
+        """
+        if ResultCache.TZDATA_VERSION is None:
+            ret = []
+            for d in zoneinfo.TZPATH:
+                try:
+                    with open(os.path.join(d, "tzdata.zi"), 'rb') as f:
+                        ret.append((d, f.readline().strip().decode('ascii', errors='replace')))
+                except OSError:
+                    try:
+                        ret.append((d, os.stat(d).st_mtime_ns))
+                    except OSError:
+                        pass
+            try:
+                ret.append(("tzdata", importlib.metadata.version("tzdata")))
+            except importlib.metadata.PackageNotFoundError:
+                pass
+            ResultCache.TZDATA_VERSION = tuple(ret)
+        return ResultCache.TZDATA_VERSION
+
+    @staticmethod
+    def context() -> tuple:
+        """
+        キャッシュのキーに含める、出力に影響するFeatureFlags, VERSION,
+        ライブラリの中身のハッシュ値、依存ライブラリとtzdataのバージョンを返す。
+    """
+        flags = sorted((k, repr(v)) for k, v in vars(FlagContext.get()).items() \
+                       if k not in ResultCache.IGNORE_FLAGS)
+        return (VERSION, ResultCache.source_digest(), vobject.VERSION, dateutil.__version__, \
+                ResultCache.tzdata_version(), flags)
+
+    @staticmethod
+    def key(ics_digest: str, timerange: int) -> str:
+        """
+        キャッシュのキーを返す。入力のハッシュ値ics_digest, timerange,
+        およびcontext()から作る。
+    """
+        h = hashlib.sha256()
+        h.update(repr((ResultCache.context(), ics_digest, timerange)).encode('utf-8'))
+        return h.hexdigest()
+
+    @staticmethod
+    def path(key: str) -> str:
+        """
+        キャッシュのファイル名を返す。
+    """
+        return os.path.join(F.CACHE_DIR, key + ResultCache.SUFFIX)
+
+    @staticmethod
+    def load(key: str, ics_file_path: str, csv_file_path: str) -> bool:
+        """
+        キャッシュがあれば、変換時の標準エラー出力への表示を再現し、CSV
+        ファイルに出力して前回の終了ステータス(Main.csv_write()の返り値)
+        を返す。無ければNoneを返す。
+    """
+        p = ResultCache.path(key)
+        try:
+            with open(p, 'rb') as f:
+                status = f.readline()
+                log = f.read(int(f.readline()))
+                data = f.read()
+        except (OSError, ValueError):
+            with ResultCache.lock:
+                F.cache_miss += 1
+            return None
 
+        with ResultCache.lock:
+            F.cache_hit += 1
+        # 最後に使った日時を更新する。LRUで使う。
+        os.utime(p)
 
+        FileIO.confirm_overwrite(csv_file_path)
+        with open(csv_file_path, 'wb') as f:
+            f.write(data)
+
+        sys.stderr.write(log.decode('utf-8', errors='replace'))
+        success = status.strip() == b"INFO"
+        Main.print_result(success, ics_file_path, csv_file_path)
+        ResultCache.print_stat()
+        return success
+
+    @staticmethod
+    def store(key: str, csv_file_path: str, success: bool, log: str) -> None:
+        """
+        出力したCSVファイルをキャッシュに保存し、古いキャッシュを消す。
+        logは変換中の標準エラー出力への表示(StderrLog.record())で、
+        終了ステータスの表示は含めない。
+        保存に失敗しても変換自体は成功しているので停止しない。
+    """
+        try:
+            os.makedirs(F.CACHE_DIR, exist_ok=True)
+            p = ResultCache.path(key)
+            tmp = p + f".{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(csv_file_path, 'rb') as fin, open(tmp, 'wb') as f:
+                f.write(b"INFO\n" if success else b"WARNING\n")
+                log = log.encode('utf-8', errors='replace')
+                f.write(f"{len(log)}\n".encode('ascii') + log)
+                shutil.copyfileobj(fin, f)
+            os.replace(tmp, p)
+            ResultCache.evict()
+        except OSError as e:
+            print(f"WARNING: キャッシュの保存に失敗しました: {e}", file=sys.stderr)
+        ResultCache.print_stat()
+
+    @staticmethod
+    def evict() -> None:
+        """
+        キャッシュ(OccurrenceCacheの分も含む)の合計がF.CACHE_SIZE_MBを
+        超えたら、最後に使った日時が古いものから消す。
+    """
+        entries = []
+        total = 0
+        for e in os.scandir(F.CACHE_DIR):
+            if not e.name.endswith((ResultCache.SUFFIX, OccurrenceCache.SUFFIX)):
+                continue
+            st = e.stat()
+            entries.append((st.st_mtime, st.st_size, e.path))
+            total += st.st_size
+
+        entries.sort()
+        limit = F.CACHE_SIZE_MB * 1024 * 1024
+        for _, size, p in entries:
+            if total <= limit:
+                break
+            try:
+                os.remove(p)
+            except OSError:
+                continue
+            total -= size
+
+    @staticmethod
+    def print_stat() -> None:
+        """
+        キャッシュのヒット/ミスの回数を表示する。
+    """
+        print(f"INFO: キャッシュ: ヒット{F.cache_hit}回, ミス{F.cache_miss}回",\
+              file=sys.stderr)
+
+class OccurrenceCache:
+    """
+    VEVENT単位の変換結果(Main.vevent2csv()が返すcsv_bufferの行)のキャッシュ。
+
+    毎日ダウンロードする同じカレンダーのICSファイルは、大半のVEVENTが
+    前回と同じ内容である。VEVENTの行が前回と同じなら、vobjectへの変換と
+    繰返しスケジュール(RRULE)の展開を行わずに、前回の行を使う。
+    キーはVEVENTの行、同じUIDの上書スケジュール(RECURRENCE-ID)の行、
+    VCALENDARのヘッダ(VTIMEZONE)、timeranges、ResultCache.context()。
+
+    上書スケジュールの復元、ModCSV.modify_csv()、sortはキャッシュの
+    有無にかかわらず毎回行う。
+
+    繰返しスケジュールの行はSUMMARYやDESCRIPTIONなどが同じなので、
+    VEVENTごとに先頭の行と、2行目以降は先頭の行と異なる要素だけを
+    保存する(encode_rows())。読み込んだ行のSUMMARYなどは同じ文字列を
+    参照する。
+
+    キャッシュはVEVENTごと(キーごと)にF.CACHE_DIRの1ファイルに保存する。
+    使う時はそのVEVENTのファイルだけを読むので、メモリ使用量は変換し直す
+    場合と変わらない。同じカレンダーや別のカレンダーを同時に変換しても
+    (Batch)、互いの分を消さない。ファイルの日時を最後に使った日時とし、
+    F.CACHE_SIZE_MBを超える分はResultCacheの分と合わせて古いものから消す。
+    """
+    # キャッシュのファイル名の拡張子
+    SUFFIX = ".vevent.json"
+    # 保存形式の版。encode_rows()の形式を変えたら増やす。
+    FORMAT = 5
+    # 使ったファイルの日時(最後に使った日時)を更新する間隔(秒)。これより
+    # 短い間隔で使った場合は、ファイルの日時を更新しない。
+    TOUCH_INTERVAL = 24 * 60 * 60
+
+    @staticmethod
+    def is_enabled() -> bool:
+        """
+        キャッシュを使うかどうか。
+    """
+        return F.use_cache and F.DEBUG_UID is None
+
+    def __init__(self, ics_header: str, timeranges: list, override_uids: dict):
+        """
+        引数:
+            ics_header, override_uids: Main.load_ics()の返り値。
+            timeranges: CSVの出力範囲を指定するtimerangeの値のlist。
+        """
+        self.override_uids = override_uids
+        self.base = hashlib.sha256()
+        self.base.update(repr((OccurrenceCache.FORMAT, ResultCache.context(), \
+                               ics_header, sorted(timeranges))).encode('utf-8'))
+        # 今回新しく保存したファイルの数
+        self.added = 0
+        # 最初の保存の失敗。save()で表示する。
+        self.error = None
+        # 読み込んだ行の日付などの文字列。decode_rows()で共有する。
+        self.strings = {}
+        self.hit = 0
+        self.miss = 0
+
+    def key(self, block: list) -> str:
+        """
+        VEVENTの行のlistからキャッシュのキーを返す。
+        """
+        h = self.base.copy()
+        uid = PreSetup.raw_ics_value(block, 'UID')
+        h.update(repr(self.override_uids.get(uid)).encode('utf-8'))
+        h.update("\n".join(block).encode('utf-8', 'surrogatepass'))
+        return h.hexdigest()
+
+    @staticmethod
+    def path(key: str) -> str:
+        """
+        キーのキャッシュのファイル名を返す。
+    """
+        return os.path.join(F.CACHE_DIR, key + OccurrenceCache.SUFFIX)
+
+    def get(self, key: str) -> list:
+        """
+        キャッシュがあれば行のlistを返す。無い、もしくは壊れていればNoneを返す。
+        ファイルの日時がTOUCH_INTERVALより古ければ、最後に使った日時として
+        更新する(ResultCache.evict()のLRUで使う)。
+        """
+        p = OccurrenceCache.path(key)
+        try:
+            with open(p, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+                mtime = os.fstat(f.fileno()).st_mtime
+        except (OSError, ValueError):
+            data = None
+        if not isinstance(data, list):
+            self.miss += 1
+            return None
+        self.hit += 1
+        if time.time() - mtime >= OccurrenceCache.TOUCH_INTERVAL:
+            try:
+                os.utime(p)
+            except OSError:
+                pass
+        return OccurrenceCache.decode_rows(data, self.strings)
+
+    def put(self, key: str, rows: list) -> None:
+        """
+        行のlistをキャッシュのファイルに保存する。JSONにできない値を含む
+        場合は保存しない。同じキーを同時に保存しても、どちらかのファイルが
+        そのまま残る。
+        """
+        if not self.error is None:
+            return
+        try:
+            data = json.dumps(OccurrenceCache.encode_rows(rows))
+        except (TypeError, ValueError):
+            return
+        p = OccurrenceCache.path(key)
+        tmp = p + f".{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            if self.added == 0:
+                os.makedirs(F.CACHE_DIR, exist_ok=True)
+            with open(tmp, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(tmp, p)
+            self.added += 1
+        except OSError as e:
+            self.error = e
+
+    def save(self) -> None:
+        """
+        保存を終える。保存に失敗していれば表示する。新しく保存したファイル
+        があれば、F.CACHE_SIZE_MBを超える分を最後に使った日時が古いものから
+        消す(ResultCache.evict())。
+        保存に失敗しても変換自体は成功しているので停止しない。
+        """
+        if not self.error is None:
+            print(f"WARNING: キャッシュの保存に失敗しました: {self.error}", file=sys.stderr)
+        if self.added == 0:
+            return
+        try:
+            ResultCache.evict()
+        except OSError as e:
+            print(f"WARNING: キャッシュの保存に失敗しました: {e}", file=sys.stderr)
+
+    @staticmethod
+    def encode_date(d) -> list:
+        """
+        H:DTSTARTとH:RECURRENCE_IDの値(datetime.datetime型もしくは
+        datetime.date型)をJSONにできる形に変換する。
+        awareな日時はTZ.guess()のTimeZoneのローカルタイムのみ扱う。
+    """
+        if d is None:
+            return None
+        if type(d) is datetime.date:
+            return ["D", d.isoformat()]
+        if not TZ.is_aware(d):
+            return ["N", d.isoformat(), d.fold]
+        if d.tzinfo is TZ.guess(exit_error=False):
+            return ["A", d.replace(tzinfo=None).isoformat(), d.fold]
+        raise TypeError(f"ローカルタイムでない日時: {d}")
+
+    @staticmethod
+    def decode_date(d):
+        """
+        encode_date()の逆変換。
+    """
+        if d is None:
+            return None
+        if d[0] == "D":
+            return datetime.date.fromisoformat(d[1])
+        if d[0] == "N":
+            return datetime.datetime.fromisoformat(d[1]).replace(fold=d[2])
+        return datetime.datetime.fromisoformat(d[1]).replace(fold=d[2], tzinfo=TZ.guess())
+
+    @staticmethod
+    def encode_row(row: list) -> list:
+        """
+        行をJSONにできる形に変換する。H:DTSTARTとH:RECURRENCE_IDは
+        encode_date()で変換する。
+    """
+        n = F.CSV_POS2["H:LENGTH"]
+        ret = list(row)
+        for i in (F.CSV_POS2["H:DTSTART"], F.CSV_POS2["H:RECURRENCE_ID"]):
+            ret[i] = OccurrenceCache.encode_date(row[i])
+        for i in range(n, len(ret)):
+            if isinstance(ret[i], (datetime.date, tuple)):
+                raise TypeError(f"JSONにできない値: {ret[i]!r}")
+        return ret
+
+    @staticmethod
+    def decode_row(row: list) -> list:
+        """
+        encode_row()の逆変換。
+    """
+        # 要素のlistも後で書き換えられるので複製する。
+        ret = [list(v) if isinstance(v, list) else v for v in row]
+        for i in (F.CSV_POS2["H:DTSTART"], F.CSV_POS2["H:RECURRENCE_ID"]):
+            ret[i] = OccurrenceCache.decode_date(row[i])
+        return ret
+
+    @staticmethod
+    def encode_rows(rows: list) -> list:
+        """
+        VEVENT1個分の行のlistをJSONにできる形に変換する。
+        返り値: [先頭の行, 2行目以降の行ごとの[位置, 値]のlist]。
+        先頭の行はencode_row()の形。2行目以降は先頭の行と異なる要素
+        (日時など)だけを持つ。行が無ければ[]。
+    """
+        if len(rows) == 0:
+            return []
+        dates = (F.CSV_POS2["H:DTSTART"], F.CSV_POS2["H:RECURRENCE_ID"])
+        others = [i for i in range(len(rows[0])) if not i in dates]
+        n = F.CSV_POS2["H:LENGTH"]
+
+        top = rows[0]
+        first = OccurrenceCache.encode_row(top)
+        diffs = []
+        for row in rows[1:]:
+            diff = []
+            for i in dates:
+                v = OccurrenceCache.encode_date(row[i])
+                if v != first[i]:
+                    diff.append([i, v])
+            for i in others:
+                v = row[i]
+                if v is top[i]:
+                    continue
+                if i >= n and isinstance(v, (datetime.date, tuple)):
+                    raise TypeError(f"JSONにできない値: {v!r}")
+                if v != first[i]:
+                    diff.append([i, v])
+            diffs.append(diff)
+        return [first, diffs]
+
+    @staticmethod
+    def decode_rows(data: list, strings: dict = None) -> list:
+        """
+        encode_rows()の逆変換。各行の同じ要素は同じオブジェクトを参照する。
+        stringsを指定した場合は、2行目以降の文字列(日付など)をstringsで
+        同じオブジェクトにする。他のVEVENTの行とも共有する。
+    """
+        if len(data) == 0:
+            return []
+        dates = (F.CSV_POS2["H:DTSTART"], F.CSV_POS2["H:RECURRENCE_ID"])
+        first, diffs = data
+        top = OccurrenceCache.decode_row(first)
+        # 要素のlistも後で書き換えられるので行ごとに複製する。
+        lists = [i for i, v in enumerate(first) if isinstance(v, list) and not i in dates]
+
+        rows = [top]
+        for diff in diffs:
+            row = list(top)
+            for i in lists:
+                row[i] = list(first[i])
+            for i, v in diff:
+                if i in dates:
+                    row[i] = OccurrenceCache.decode_date(v)
+                elif isinstance(v, list):
+                    row[i] = list(v)
+                elif isinstance(v, str) and not strings is None:
+                    row[i] = strings.setdefault(v, v)
+                else:
+                    row[i] = v
+            rows.append(row)
+        return rows
+
+class ParallelVevent:
+    """
+    Main.vobject2csv()の並列処理(-j)の補助関数。
+
+    VEVENTの行のlistをチャンクに分けて、ProcessPoolExecutorの各プロセス
+    でvobjectへの変換と繰返しスケジュールの展開を行う。各プロセスでは
+    VCALENDARのヘッダ(VTIMEZONE)と上書スケジュールの一覧を読み直して
+    TimeZoneなどを初期化する。
+
+    各プロセスの結果はOccurrenceCache.encode_rows()の形で受け取り、本プ
+    ロセスのTimeZoneで戻すので、逐次処理と同じCSVになる。encode_rows()
+    できない行を含むVEVENTは本プロセスで変換する。
+    """
+    # 各プロセスでMain.vevent2csv()に渡す引数。init()で設定する。
+    args = None
+
+    @staticmethod
+    def is_enabled() -> bool:
+        """
+        並列処理を行うかどうか。
+    """
+        return F.PARALLEL_JOBS > 1 and F.DEBUG_UID is None
+
+    @staticmethod
+    def init(flag: FeatureFlags, ics_header: str, override_uids: dict, timeranges: list, lo, hi) -> None:
+        """
+        プロセスの初期化。TimeZoneの推測結果の表示は本プロセスで表示済みなので捨てる。
+    """
+        FlagContext.current.set(flag)
+        with contextlib.redirect_stderr(io.StringIO()):
+            TZ.load_ics(vobject.readOne(ics_header), F.OVERRIDE_TIMEZONE, F.TIMEZONE_YEARS)
+        override_list = Main.override_list(override_uids)
+        ParallelVevent.args = (timeranges, override_list, lo, hi)
+
+    @staticmethod
+    def convert(chunk: list) -> list:
+        """
+        チャンク(VEVENTの行のlistのlist)を変換する。VEVENTごとに
+        encode_rows()した行を返す。encode_rows()できなければNone。
+    """
+        ret = []
+        for block in chunk:
+            rows = Main.vevent2csv(Main.vevent_readone(block), *ParallelVevent.args)
+            try:
+                ret.append(OccurrenceCache.encode_rows(rows))
+            except TypeError:
+                ret.append(None)
+        return ret
+
+    @staticmethod
+    def vevent2csv(blocks: list, cache, ics_header: str, override_uids: dict, \
+                   timeranges: list, override_list: dict, lo, hi) -> list:
+        """
+        blocks(VEVENTの行のlistのlist)を変換して、VEVENTごとの
+        csv_bufferの行のlistを、blocksと同じ順番のlistで返す。
+
+        cache(OccurrenceCache)にあるVEVENTは並列処理しない。並列処理する
+        VEVENTがConstDat.PARALLEL_MIN_VEVENTS未満なら、逐次処理する。
+    """
+        ret = [None] * len(blocks)
+        keys = [None] * len(blocks)
+        todo = []
+        for i, block in enumerate(blocks):
+            if not cache is None:
+                keys[i] = cache.key(block)
+                ret[i] = cache.get(keys[i])
+            if ret[i] is None:
+                todo.append(i)
+
+        if len(todo) >= ConstDat.PARALLEL_MIN_VEVENTS:
+            # TimeZoneオブジェクトは他のプロセスに渡せないので、各プロセスで推測し直す。
+            flag = FlagContext.get().copy()
+            flag.GUESS_TIMEZONE = None
+            flag.guess_timezone_initalized = False
+            flag.TIMEZONE_SWAP = {}
+            flag.TIMEZONE_TABLES = {}
+
+            n = F.PARALLEL_JOBS
+            size = -(-len(todo) // (n * ConstDat.PARALLEL_CHUNKS_PER_JOB))
+            chunks = [todo[i:i+size] for i in range(0, len(todo), size)]
+            with concurrent.futures.ProcessPoolExecutor(max_workers=n, initializer=ParallelVevent.init, \
+                    initargs=(flag, ics_header, override_uids, timeranges, lo, hi)) as executor:
+                results = executor.map(ParallelVevent.convert, [[blocks[i] for i in c] for c in chunks])
+                for chunk, result in zip(chunks, results):
+                    for i, data in zip(chunk, result):
+                        if not data is None:
+                            ret[i] = OccurrenceCache.decode_rows(data)
+
+        for i in todo:
+            if ret[i] is None:
+                ret[i] = Main.vevent2csv(Main.vevent_readone(blocks[i]), timeranges, override_list, lo, hi)
+            if not cache is None:
+                cache.put(keys[i], ret[i])
+        return ret
 
 class ModCSV:
     """CSVを加工する関係"""
+    # 登録番号記入の拡張仕様(enhanced_gyoumunum())で使う正規表現。
+    # SUMMARYの最後尾の「g数字」「%数字」。
+    GYOUMUNUM_SUMMARY = re.compile(r"[ｇg%％]([0-9０-９]{1,4})[　 \t]*$")
+    # DESCRIPTIONのDescription-Type1〜Type4をこの順に先頭から試す。どれにも
+    # 一致しなければType5。見るのは1行目と、Type1-1、Type1-3の場合の
+    # 空白と改行の続く部分だけ。(改行文字)は「\n」のみ。
+    # Type4の1行目の終わりはstr.splitlines()と同じ区切りで判定する。
+    GYOUMUNUM_DESCRIPTION = re.compile(
+        r"(?P<type1_1>[　 \t]*[0-9０-９]{1,4}[　 \t\n]*\Z)"
+        r"|(?P<type1_2>\(N/A\))"
+        r"|(?P<type1_3>[　 \t\n]*\Z)"
+        r"|(?P<type2>[　 \t]*[0-9０-９]{1,4}[　 \t]*)\n"
+        r"|(?P<type3>[　 \t]*)\n"
+        r"|[　 \t]*(?P<type4>[可急])[　 \t]*(?=[\n\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]|\Z)")
     ##########################################################################
     #
     @staticmethod
@@ -1519,7 +3483,17 @@ class ModCSV:
         F.SPLIT_SUMMARY_EXTEND_HEAD += tmp_list2
     #
     @staticmethod
-    def split_garoon_style_summary(summary: str) -> str:
+    def summary_heads() -> frozenset:
+        """
+        SUMMARYの分割で使う予定の選択肢(ConstDat.SPLIT_SUMMARY_HEADと
+        F.SPLIT_SUMMARY_EXTEND_HEAD)のfrozensetを返す。
+        ライブラリ呼び出し側がF.SPLIT_SUMMARY_EXTEND_HEADに追加する場合が
+        あるので、変換ごと(modify_csv())に作る。
+    """
+        return frozenset(ConstDat.SPLIT_SUMMARY_HEAD) | frozenset(F.SPLIT_SUMMARY_EXTEND_HEAD)
+    #
+    @staticmethod
+    def split_garoon_style_summary(summary: str, heads: frozenset = None) -> str:
         """
     Garoonはタイトルは二種類の入力があり、
       タイトルの選択肢:'出張', '往訪', '来訪', '会議', '休み'
@@ -1538,6 +3512,7 @@ class ModCSV:
 
         引数:
         summary: タイトルstr型で入った変数。
+        heads: 予定の選択肢。summary_heads()の返り値。Noneなら作る。
 
         返り値:
         summaryを加工後返す。
@@ -1546,37 +3521,54 @@ class ModCSV:
         F.split_summary = True
         F.SPLIT_SUMMARY_EXTEND
     """
-        # 以下正規表現文字列になるので変な記号は入れない
-        # Garoonの選択肢のデフォルト。
-        head = list(ConstDat.SPLIT_SUMMARY_HEAD)
-        #SUMMARY分割の拡張
-        head += F.SPLIT_SUMMARY_EXTEND_HEAD
-        # コロンの半角。
-        splitter = [':']
-        # コロンの全角。
-        splitter += ['：']
-
-        for s in splitter:
-            ret = summary.split(s, 1)
-            if len(ret) == 1:
+        # Garoonの選択肢のデフォルトとSUMMARY分割の拡張。
+        # 選択肢は正規表現ではなく文字列として比べる。
+        if heads is None:
+            heads = ModCSV.summary_heads()
+
+        # コロンの半角、全角の順に試す。
+        for s in (':', '：'):
+            h, sep, body = summary.partition(s)
+            if not sep:
                 continue
-            ret[0] = ret[0].strip()
-            ret[1] = ret[1].strip()
-            for h in head:
-                if re.fullmatch(h, ret[0]):
-                    return ret[0], ret[1]
+            h = h.strip()
+            if h in heads:
+                return h, body.strip()
         #分割失敗
         return "", summary
 
     ###
     @staticmethod
-    def modify_description(description: str) -> str:
+    def description_pattern():
+        """
+        modify_description()で使う正規表現を返す。Teamsの会議インフォメーション
+        の目印(F.TEAMS_INFOMATION_MARKERS)と、4行目以降を消す場合は行の区切りを
+        1個の正規表現にまとめる。目印はグループ"marker"。どちらも使わない
+        場合はNone。変換ごと(modify_csv())に作る。
+    """
+        alt = []
+        if F.remove_teams_infomation and F.TEAMS_INFOMATION_MARKERS:
+            alt.append("(?P<marker>" + "|".join(map(re.escape, F.TEAMS_INFOMATION_MARKERS)) + ")")
+        if F.description_delete_4th_line_onwards:
+            alt.append("\r\n|[" + ConstDat.LINE_BREAK_CHARS + "]")
+        if not alt:
+            return None
+        return re.compile("|".join(alt))
+
+    @staticmethod
+    def modify_description(description: str, pattern=None) -> str:
         """
         メモ欄(description)の加工を行う。長いと見にくいのと、Teamsのパスワード
         が入ってることがあるので。
 
+        Teamsの会議インフォメーションの目印と4行目の終わりを、1個の正規表現
+        (description_pattern())で先頭から1回だけ探し、先に見つかった所で
+        切る。目印の場合は、目印を含む行をConstDat.REMOVE_TEAMSに置き換える。
+        どちらかを行った場合、改行は「\\n」にそろえ、最後に「\\n」を付ける。
+
         引数:
         description: メモ欄がstr型で入った変数。
+        pattern: description_pattern()の返り値。省略した場合は作る。
 
         返り値:
         descriptionを加工後返す。
@@ -1585,6 +3577,7 @@ class ModCSV:
        外部制御変数:
         F.description_delete_4th_line_onwards
         F.remove_teams_infomation
+        F.TEAMS_INFOMATION_MARKERS
 
        Known bugs:
         Teamsの会議インフォメーションの削除は、フォーマットが変わったら無効です。
@@ -1594,31 +3587,34 @@ class ModCSV:
         if description is None:
             return description
 
-        if F.remove_teams_infomation:
-            lines = description.splitlines()
-            new_line = []
-            for i in lines:
-                if re.search("Microsoft Teams ヘルプが必要ですか", i):
-                    new_line.append("(REMOVE TEAMS INFOMATION)")
-                    break
-                if re.search(r"\.\.\.\.\.\.\.\.\.\.\.\.\.\.\.\.\.\.\.\.\.\.\.\.\.\.\.", i):
-                    new_line.append("(REMOVE TEAMS INFOMATION)")
+        if pattern is None:
+            pattern = ModCSV.description_pattern()
+
+        if not pattern is None:
+            r = 4
+            cut = len(description)
+            marker = False
+            n = 0
+            for m in pattern.finditer(description):
+                if m.lastgroup == "marker":
+                    cut = m.start()
+                    marker = True
                     break
-                if re.search("___________________________", i):
-                    new_line.append("(REMOVE TEAMS INFOMATION)")
+                # 行の区切り。4行目が空行の場合も残すため、区切りの後で切る。
+                n += 1
+                if n == r:
+                    cut = m.end()
                     break
-                new_line.append(i)
-            description = "\n".join(new_line)
-            description += "\n"
 
-        if F.description_delete_4th_line_onwards:
-            r = 4
-            lines = description.splitlines()
-            if len(lines) > r:
-                description = "\n".join(lines[:r])
-            else:
-                description = "\n".join(lines)
-            description += "\n"
+            lines = description[:cut].splitlines()
+            if marker:
+                # 目印を含む行の目印より前の部分は消す。
+                if cut > 0 and not description[cut - 1] in ConstDat.LINE_BREAK_CHARS:
+                    lines.pop()
+                lines.append(ConstDat.REMOVE_TEAMS)
+            if F.description_delete_4th_line_onwards:
+                lines = lines[:r]
+            description = "\n".join(lines) + "\n"
 
         if F.remove_tail_cr:
             description = description.rstrip()
@@ -1627,7 +3623,25 @@ class ModCSV:
     ###
     # 登録番号記入の拡張仕様
     @staticmethod
-    def enhanced_gyoumunum(description: str, summary: str) -> str:
+    def summary_gyoumunum(summary: str) -> str:
+        """
+        Summaryの最後尾の「%数字」もしくは「g数字」の登録番号を返す。
+        全角数字は半角にする。無ければNone。
+    """
+        m = ModCSV.GYOUMUNUM_SUMMARY.search(summary)
+        if m is None:
+            return None
+        # 全角数字を半角にするため、0を足してる。
+        gyoumunum = str(int(m.group(1))+0)
+
+        if (int(gyoumunum) < 0) or (int(gyoumunum) > 9999):
+            # 負の数は登録番号としては無効
+            # 5桁の登録番号は無効(正規表現的にないはずだが。)
+            raise RuntimeError("ERROR: Summaryの登録番号の取得に失敗しました")
+        return gyoumunum
+
+    @staticmethod
+    def enhanced_gyoumunum(description: str, summary: str, gyoumunum: str = None) -> str:
         """Summary分割で、Summaryの最後尾に「-数字」もしくは「g数字」があった場合は、
         登録番号と見なし、DESCRIPTIONと置き換える。
 
@@ -1665,6 +3679,10 @@ class ModCSV:
 
         デバグコード:
           debug_modify_enhanced_gyoumunum.py
+          misc/gyoumunum_csv.py (Description-Type1〜Type5の表による確認)
+
+        引数gyoumunumにsummary_gyoumunum()の返り値を与えると、Summaryは
+        見ない。modify_csv()はSUMMARYの分割と一緒に登録番号を取り出しておく。
 
         処理の流れ:
 
@@ -1766,67 +3784,38 @@ class ModCSV:
 
         """
         # 登録番号記入の拡張仕様: SUMMARYの「g」と「%」
-        m = re.search(r"[ｇg%％]([0-9０-９]{1,4})[　 \t]*$", summary)
-        if m is None:
+        if gyoumunum is None:
+            gyoumunum = ModCSV.summary_gyoumunum(summary)
+        if gyoumunum is None:
             return None
-        # 全角数字を半角にするため、0を足してる。
-        #print(m.groups())
-        #print(m.group())
-        gyoumunum = str(int(m.groups()[0])+0)
-
-        if (int(gyoumunum) < 0) or (int(gyoumunum) > 9999):
-            # 負の数は登録番号としては無効
-            # 5桁の登録番号は無効(正規表現的にないはずだが。)
-            raise RuntimeError("ERROR: Summaryの登録番号の取得に失敗しました")
 
-        if re.search(r"\r", description, flags=re.DOTALL):
+        if "\r" in description:
             raise RuntimeError("ERROR: 改行の正規化が行われてません。「\\n」のみ有効です。")
 
-        # re.matchは1行めのみ検索する。2行目は見ない。
-        #print(f"DEBUG: found enhance gyoumunum = {gyoumunum}")
-
-        # Description-Type1-1:
-        # 正規表現の空白のところに全角スペース入ってる
-        # 改行の正規化をしているので改行に「\r」は出ないはず。
-        m1 = re.search(r"^[　 \t]*[0-9０-９]{1,4}[　 \t\n]*$", description, flags=re.DOTALL)
-
-        # Description-Type1-2:
         # 注:"(N/A)"の後ろの文字は無視。
         if ConstDat.NA != '(N/A)':
             raise RuntimeError("ERROR: Override(N/A)")
-        # 仕様変更で、現時点ではNoneが入っていると思われるので、
-        # 実際はこのコードは動かない可能性が高い。
-        m2 = re.search(r"^\(N\/A\).*$", description, flags=re.DOTALL)
-
-        # Description-Type1-3:
-        # 空白と改行のみ。
-        m3 = re.search(r"^[　 \t\r\n]*$", description, flags=re.DOTALL)
-        if m1 or m2 or m3:
+
+        # Description-Typeの判定。正規表現の空白のところに全角スペース入ってる。
+        m = ModCSV.GYOUMUNUM_DESCRIPTION.match(description)
+        kind = m.lastgroup if m else None
+
+        # Description-Type1-1、Type1-2、Type1-3:
+        # Type1-2は仕様変更で、現時点ではNoneが入っていると思われるので、
+        # 実際は一致しない可能性が高い。
+        if kind in ("type1_1", "type1_2", "type1_3"):
             return gyoumunum
 
-        # Description-Type2:
-        # 行数は変化しない。
-        m1 = re.search(r"^[　 \t]*[0-9０-９]{1,4}[　 \t]*\n.*", description, flags=re.DOTALL)
-        if m1:
-            ret = re.sub(r"^[　 \t]*[0-9０-９]{1,4}[　 \t]*", gyoumunum, description)
-            if ret is None:
-                raise RuntimeError("ERROR: 正規表現の想定外のエラー")
-            return ret
-
-        # Description-Type3:
-        # 行数は変化しない。
-        m1 = re.search(r"^[　 \t]*\n.*", description, flags=re.DOTALL)
-        if m1:
-            return re.sub(r"^[　 \t]*", gyoumunum, description)
+        # Description-Type2、Type3:
+        # 1行目の改行の前までを登録番号に置き換える。行数は変化しない。
+        if kind in ("type2", "type3"):
+            return gyoumunum + description[m.end(kind):]
+
         # Description-Type4:
         # 冒頭が「可急」の場合は登録番号を行頭に差し込む。行数が1行増える。
-        lines = description.splitlines()
-        m1 = re.search(r"^[　 \t]*[可急][　 \t]*$", lines[0])
-        if m1:
-            if re.search("可", lines[0]):
-                lines[0] = "可"
-            if re.search("急", lines[0]):
-                lines[0] = "急"
+        if kind == "type4":
+            lines = description.splitlines()
+            lines[0] = m.group(kind)
             return gyoumunum + "\n" + "\n".join(lines) + "\n"
 
         # Description-Type5:
@@ -1839,62 +3828,102 @@ class ModCSV:
         """
         1. timerange範囲外のデータをすてる
         2. 各種加工を行う。出力対象のCSVの行数をlistで返す。
+
+        繰返しスケジュールの各行のSUMMARYやDESCRIPTIONは同じ文字列なので、
+        加工結果を文字列ごとに覚えておき、各行は同じ加工結果を参照する。
         """
+        pos_uid = F.CSV_POS2["H:UID"]
+        pos_dtstart = F.CSV_POS2["H:DTSTART"]
+        pos_summary = F.CSV_POS2["SUMMARY"]
+        body = range(F.CSV_POS2["H:LENGTH"], len(F.CSV_HEADER))
+        remove_tail_cr = F.remove_tail_cr
+        split_summary = F.split_summary
+        pos_summary_h = F.CSV_POS2["SUMMARY:H"] if split_summary else None
+        summary_heads = ModCSV.summary_heads() if split_summary else None
+        pos_description = F.CSV_POS2["DESCRIPTION"] if "DESCRIPTION" in F.CSV_POS else None
+        enhanced_gyoumunum = F.enhanced_gyoumunum
+        description_pattern = ModCSV.description_pattern() if pos_description is not None else None
+
+        # 加工前→加工後
+        stripped = {}
+        summaries = {}
+        descriptions = {}
+
         ###################
         ret_index = []
         # 無効なデータを捨てながら各種加工を行う。
-        for i in range(len(csv_buffer)):
+        for i, row in enumerate(csv_buffer):
             # 範囲外/無効なデータを捨てる。
 
-            if csv_buffer[i][F.CSV_POS2["H:UID"]] is None:
+            if row[pos_uid] is None:
                 continue
-            if csv_buffer[i][F.CSV_POS2["H:DTSTART"]] is None:
+            if row[pos_dtstart] is None:
                 continue
-            if not TimeRange.is_collect(csv_buffer[i][F.CSV_POS2["H:DTSTART"]], timerange):
+            if not TimeRange.is_collect(row[pos_dtstart], timerange):
                 continue
 
             ret_index.append(i)
 
             # ICSのデータで指定の要素がなかった場合はNoneが入っている。
             # 適切な用語に書き換える。
-            for j in range(F.CSV_POS2["H:LENGTH"], len(F.CSV_HEADER)):
-                if csv_buffer[i][j] is None:
-                    csv_buffer[i][j] = ConstDat.NA
-                elif F.remove_tail_cr:
+            for j in body:
+                v = row[j]
+                if v is None:
+                    row[j] = ConstDat.NA
+                elif remove_tail_cr:
                     #各要素の最後の改行と空白をすべて取り除く。
-                    csv_buffer[i][j] = csv_buffer[i][j].rstrip()
-
-            summary = csv_buffer[i][F.CSV_POS2["SUMMARY"]]
-
-            if F.split_summary and (not summary is None):
-                #ICS形式の場合は予定(選択肢のところ)が無いので生成試みる
-                summary_h, summary = ModCSV.split_garoon_style_summary(summary)
-                csv_buffer[i][F.CSV_POS2["SUMMARY:H"]] = summary_h
-                csv_buffer[i][F.CSV_POS2["SUMMARY"]] = summary
-
-            if 'DESCRIPTION' not in F.CSV_POS:
+                    if type(v) is str:
+                        if not v in stripped:
+                            stripped[v] = v.rstrip()
+                        row[j] = stripped[v]
+                    else:
+                        row[j] = v.rstrip()
+
+            summary = row[pos_summary]
+
+            # SUMMARYの分割と登録番号の取り出しは、SUMMARYごとに1回だけ行う。
+            gyoumunum = None
+            if (split_summary or enhanced_gyoumunum) and (not summary is None):
+                if not summary in summaries:
+                    summary_h, summary_d = None, summary
+                    if split_summary:
+                        #ICS形式の場合は予定(選択肢のところ)が無いので生成試みる
+                        summary_h, summary_d = ModCSV.split_garoon_style_summary(summary, summary_heads)
+                    g = ModCSV.summary_gyoumunum(summary_d) if enhanced_gyoumunum else None
+                    summaries[summary] = (summary_h, summary_d, g)
+                summary_h, summary_d, gyoumunum = summaries[summary]
+                if split_summary:
+                    row[pos_summary_h] = summary_h
+                    row[pos_summary] = summary = summary_d
+
+            if pos_description is None:
                 continue
 
-            description = csv_buffer[i][F.CSV_POS2["DESCRIPTION"]]
-            description = ModCSV.modify_description(description)
-
-            # 登録番号記入の拡張仕様
-            # SUMMARYに記載された登録番号をDESCRIPTIONに差し込む。
-            if F.enhanced_gyoumunum:
-                d = ModCSV.enhanced_gyoumunum(description, summary)
-                if d:
-                    description = d
-            csv_buffer[i][F.CSV_POS2["DESCRIPTION"]] = description
+            key = (row[pos_description], summary)
+            if not key in descriptions:
+                description = ModCSV.modify_description(key[0], description_pattern)
+
+                # 登録番号記入の拡張仕様
+                # SUMMARYに記載された登録番号をDESCRIPTIONに差し込む。
+                if gyoumunum is not None:
+                    d = ModCSV.enhanced_gyoumunum(description, summary, gyoumunum)
+                    if d:
+                        description = d
+                descriptions[key] = description
+            row[pos_description] = descriptions[key]
         # end for i
         return ret_index
 
 class RecurrenceID:
     """RecurrenceID関連処理"""
     @staticmethod
-    def id_list_dump(l: dict, prefix="DEBUG:", file=sys.stderr):
+    def id_list_dump(l: dict, prefix="DEBUG:", file=None):
         """
-        recurrence_id_listをdump
+        recurrence_id_listをdump。fileの省略時は呼び出した時のsys.stderr
+        (StderrLogで記録できるように)。
     """
+        if file is None:
+            file = sys.stderr
         print("----", file=file)
         for uuid in l.keys():
             print(f'{prefix}uid = {uuid}', file=file)
@@ -1902,7 +3931,46 @@ class RecurrenceID:
                 print(f'{prefix}\tRECURRENCE-ID = {vv}', file=file)
         print("----", file=file)
 
-    #End of func()
+    #End of func()
+    @staticmethod
+    def index(buff: list, recurrence_id_list: dict, outlook_bugfix=False) -> dict:
+        """
+        restore_aux()で使う索引を作る。
+
+        recurrence_id_listにあるUIDごとに、(行番号のlist, 開始日時→行番号のdict)を
+        返す。dictには、RECURRENCE-IDが無い行のDTSTARTを登録する。同じDTSTARTの
+        行が複数あれば、先頭の行を登録する。
+
+        outlook_bugfix=Trueの時は、TZ.naive2aware()したDTSTARTも登録する。元の
+        DTSTARTとnaive2aware()したDTSTARTのどちらかが一致する行のうち、先頭の
+        行を登録する。
+
+        restore_aux()はH:UIDを書き換えるので、restore_aux()を呼び出すたびに作り直す。
+        """
+        pos_uid = F.CSV_POS2["H:UID"]
+        pos_dtstart = F.CSV_POS2["H:DTSTART"]
+        pos_recurrence_id = F.CSV_POS2["H:RECURRENCE_ID"]
+
+        index = {}
+        for i, b in enumerate(buff):
+            uid = b[pos_uid]
+            if not uid in recurrence_id_list:
+                continue
+            if not uid in index:
+                index[uid] = ([], {})
+            line_list, start2line = index[uid]
+            line_list.append(i)
+            if b[pos_recurrence_id] is None:
+                start2line.setdefault(b[pos_dtstart], i)
+
+        if outlook_bugfix:
+            for line_list, start2line in index.values():
+                for j in sorted(set(start2line.values())):
+                    dd = TZ.naive2aware(buff[j][pos_dtstart])
+                    if start2line.get(dd, j) >= j:
+                        start2line[dd] = j
+        return index
+
     @staticmethod
     def restore_aux(buff: list, recurrence_id_list: dict, outlook_bugfix=False) -> int:
         """
@@ -1920,17 +3988,11 @@ class RecurrenceID:
         """
         bad_count = 0
 
-        uid2line = {}
-        for i in range(len(buff)):
-            uid = buff[i][F.CSV_POS2["H:UID"]]
-            if uid in recurrence_id_list:
-                if not uid in uid2line:
-                    uid2line[uid] = []
-                uid2line[uid].append(i)
+        index = RecurrenceID.index(buff, recurrence_id_list, outlook_bugfix)
 
         key_list = list(recurrence_id_list.keys())
         for key in key_list:
-            line_list = uid2line[key]
+            line_list, start2line = index[key]
             for i in line_list:
                 b = buff[i]
                 uid = b[F.CSV_POS2["H:UID"]]
@@ -1939,24 +4001,10 @@ class RecurrenceID:
                 if recurrence_id is None:
                     continue
 
-                flag_found_j = -1
-                for j in line_list:
-                    if i == j:
-                        continue
-                    if not buff[j][F.CSV_POS2["H:RECURRENCE_ID"]] is None:
-                        continue
-
-                    if recurrence_id == buff[j][F.CSV_POS2["H:DTSTART"]]:
-                        flag_found_j = j
-                        break
-
-                    # 修正前のdtstartがdatetime.date(日付のみ)なのに、
-                    # 修正先のrecurrence_idがdatetime.datetime(日時情報あり)になっとる。
-                    if outlook_bugfix:
-                        dd = TZ.naive2aware(buff[j][F.CSV_POS2["H:DTSTART"]])
-                        if recurrence_id == dd:
-                            flag_found_j = j
-                            break
+                # 修正前のdtstartがdatetime.date(日付のみ)なのに、
+                # 修正先のrecurrence_idがdatetime.datetime(日時情報あり)になっとる
+                # 場合は、outlook_bugfix=Trueの索引で見つかる。
+                flag_found_j = start2line.get(recurrence_id, -1)
 
                 k = -1
                 if flag_found_j < 0:
@@ -1981,7 +4029,6 @@ class RecurrenceID:
                     buff[flag_found_j][F.CSV_POS2["H:UID"]] += "Hidden"
                     buff[flag_found_j][k] = "Hidden: " + buff[flag_found_j][k]
 
-                #end for j
             #end for i
         #end for key
         return bad_count
@@ -2017,12 +4064,97 @@ class RecurrenceID:
 
         return bad_recurrence_id_count
 
+class Column:
+    """
+    CSVの各列の値をVEVENTから取り出す関数。
+
+    PreSetup.set_format()でCSVフォーマットの定義のcolumnsをcompile()して、
+    (位置, 関数, 引数)のlistをF.CSV_PLANに保存する。
+    Main.ics_parts_to_csv_buffer()はVEVENTごとにF.CSV_PLANの関数を呼ぶだけ。
+    """
+    # 日時の列。TZ.ics_parts_to_csv_time()の返り値の順番。
+    TIME = ("DTSTART:DAY", "DTSTART:TIME", "DTEND:DAY", "DTEND:TIME", "X:ALLDAY_EVENT")
+
+    # 「:」が入ってる特殊な値の列の(関数名, 引数)。
+    SPECIAL = {
+        "SUMMARY:H": ("empty", None), # SUMMARYのヘッダ分離
+        "X-MICROSOFT-CDO-BUSYSTATUS:NUM": ("busystatus_num", "x-microsoft-cdo-busystatus"),
+        "ORGANIZER:CN": ("organizer_cn", "organizer"),
+        "ATTENDEE:CN:RSVP:TRUE": ("attendee_cn", "true"),
+        "ATTENDEE:CN:RSVP:FALSE": ("attendee_cn", "false"),
+    }
+
+    @staticmethod
+    def compile(columns: list) -> list:
+        """
+        CSVフォーマットの定義のcolumnsから、(位置, 関数, 引数)のlistを作る。
+        Column.TIMEの列と、ICSの要素がNoneの列は含まない。
+    """
+        plan = []
+        for pos, (_, name) in enumerate(columns):
+            if name is None or name in Column.TIME:
+                continue
+            if name in Column.SPECIAL:
+                func, arg = Column.SPECIAL[name]
+                plan.append((pos, getattr(Column, func), arg))
+            elif ':' in name:
+                raise ValueError(f"Internal Error: 未対応のICS要素: {name}")
+            else:
+                # vobjectのComponent.contentsのキー。Misc.get_ics_val()と同じ。
+                plan.append((pos, Column.value, name.lower().replace('_', '-')))
+        return plan
+
+    @staticmethod
+    def value(component, key: str):
+        """ICSの要素keyをそのまま返す。無ければNone。"""
+        lines = component.contents.get(key)
+        if lines is None:
+            return None
+        return lines[0].valueRepr()
+
+    @staticmethod
+    def empty(component, arg) -> str:
+        """空文字を返す。"""
+        return ""
+
+    @staticmethod
+    def busystatus_num(component, key: str) -> int:
+        """X-MICROSOFT-CDO-BUSYSTATUSを数字に読み替える。無ければNone。"""
+        n = Column.value(component, key)
+        if n is None:
+            return None
+        return ConstDat.CSV_TABLE_X_MICROSOFT_CDO_BUSYSTATUS[n]
+
+    @staticmethod
+    def organizer_cn(component, key: str) -> str:
+        """ORGANIZERのCNを返す。無ければNone。"""
+        lines = component.contents.get(key)
+        if lines is None:
+            return None
+        params = lines[0].params
+        if 'CN' in params:
+            return params['CN'][0]
+        return None
+
+    @staticmethod
+    def attendee_cn(component, rsvp: str) -> str:
+        """RSVPがrsvpのATTENDEEのCNを「;」でつないで返す。ATTENDEEが無ければNone。"""
+        lines = component.contents.get('attendee')
+        if lines is None:
+            return None
+        cn = []
+        for user in lines:
+            if ('CN' in user.params) and ('RSVP' in user.params):
+                if user.params['RSVP'][0].lower() == rsvp:
+                    cn.append(user.params['CN'][0])
+        return ";".join(cn)
+
 class Main:
     """ICSからCSVに変換する関数の親の関数"""
     @staticmethod
-    def ics_parts_to_csv_buffer(ics_parts, rrule_start=None) -> list:
+    def ics_parts_to_csv_buffer(ics_parts, rrule_start=None, times=None) -> list:
         """
-       VEVENTをCSV出力用の文字列(list)に変換する。
+        VEVENTをCSV出力用の文字列(list)に変換する。
 
         引数:
         ics_parts: ICSをよみこんだvobjectのcomponetオブジェクト。VEVENTが一つだけ
@@ -2032,101 +4164,121 @@ class Main:
                      Noneの場合は、VEVENTのDTSTARTとDTENDがそのまま使われる。
                      datetime.datetime型もしくはdatetime.date型
 
+        times: TZ.ics_parts_to_csv_time()の返り値。求めてあれば渡す。
+               Noneの場合はrrule_startから求める。
+
         返り値: CSV出力用の文字列に変換してLISTにいれて返す。
 
-       外部制御変数:
+        外部制御変数:
         F.remove_tail_cr
 
-        独自定義のICS要素の追加手順:
+        各列の値はPreSetup.set_format()で作ったF.CSV_PLANの関数で取り出す。
+        独自定義のICS要素の追加手順はPreSetup.set_format()を参照。
+        """
+        row = [None] * F.CSV_POS2["B:LENGTH"]
+
+        # 特殊処理を必要とするICS要素
+        t = times
+        if t is None:
+            t = TZ.ics_parts_to_csv_time(ics_parts, rrule_start)
+        for pos, v in zip(F.CSV_TIME_POS, t):
+            if not pos is None:
+                row[pos] = v
+
+        for pos, func, arg in F.CSV_PLAN:
+            row[pos] = func(ics_parts, arg)
+
+        return row
 
-        ICSファイルの要素ABCの中身を加工せずにそのまま出力する場合は
-        PreSetup.set_format()で
-           F.CSV_POS["ABC"]  = CSVの位置
-        と記載します。
+    ###
+    @staticmethod
+    def rrule_bound(d, tzinfo) -> datetime.datetime:
+        """
+        繰返しスケジュール(RRULE)の展開範囲の境界値dを、rrulesetの値と
+        比較できる形に変換する。
 
-        何らかの加工をする場合は「:」付きで以下のような感じで記載し
-           F.CSV_POS["X:ABC"]  = CSVの位置
-           F.CSV_POS["ABC:適当な名前"]  = CSVの位置
-        以下の関数に処理手順を記載します。
+        引数:
+        d: datetime.datetime型もしくはdatetime.date型
+        tzinfo: rrulesetのDTSTARTのtzinfo。Noneの場合はnaive(Floating Time)。
 
+        時差の分はConstDat.RRULE_EXPANSION_SLACKで吸収するので、
+        awareからnaiveへの変換はTimeZone情報を削るだけ。
     """
-        p = F.CSV_POS.copy()
-        row = [None] * F.CSV_POS2["B:LENGTH"]
+        if type(d) is datetime.date:
+            d = datetime.datetime(d.year, d.month, d.day)
 
-        # 特殊処理を必要とするICS要素
-        s_d, s_t, e_d, e_t, allday = TZ.ics_parts_to_csv_time(ics_parts, rrule_start)
-
-        # 必須項目とする。
-        row[p.pop("DTSTART:DAY")] = s_d
-        row[p.pop("DTSTART:TIME")] = s_t
-        row[p.pop("DTEND:DAY")] = e_d
-        row[p.pop("DTEND:TIME")] = e_t
-
-        if 'X:ALLDAY_EVENT' in F.CSV_POS:
-            row[p.pop("X:ALLDAY_EVENT")] = allday
-
-        # 任意項目とする
-        if 'SUMMARY:H' in p:
-            row[p.pop("SUMMARY:H")] = ""
-
-        #F.CSV_POS["X-MICROSOFT-CDO-BUSYSTATUS:NUM"] = 15
-        if 'X-MICROSOFT-CDO-BUSYSTATUS:NUM' in p:
-            pos = p.pop('X-MICROSOFT-CDO-BUSYSTATUS:NUM')
-            n = Misc.get_ics_val(ics_parts, 'X-MICROSOFT-CDO-BUSYSTATUS', None, exit_none=False)
-            if not n is None:
-                row[pos] = ConstDat.CSV_TABLE_X_MICROSOFT_CDO_BUSYSTATUS[n]
-
-
-        #F.CSV_POS["ORGANIZER:CN"] = 9
-        if 'ORGANIZER:CN' in p:
-            pos = p.pop('ORGANIZER:CN')
-            n = Misc.get_ics_val(ics_parts, 'ORGANIZER', None, exit_none=False)
-            if not n is None:
-                if 'CN' in ics_parts.organizer.params:
-                    row[pos] = ics_parts.organizer.params['CN'][0]
-
-        if 'ATTENDEE:CN:RSVP:TRUE' in p:
-            pos = p.pop('ATTENDEE:CN:RSVP:TRUE')
-            n = Misc.get_ics_val(ics_parts, 'ATTENDEE', None, exit_none=False)
-            if not n is None:
-                #print(ics_parts.attendee.params)
-                cn = []
-                for user in ics_parts.attendee_list:
-                    if ('CN' in user.params) and ('RSVP' in user.params):
-                        if user.params['RSVP'][0].lower() == 'true':
-                            cn.append(user.params['CN'][0])
-                row[pos] = ";".join(cn)
-
-        if 'ATTENDEE:CN:RSVP:FALSE' in p:
-            pos = p.pop('ATTENDEE:CN:RSVP:FALSE')
-            n = Misc.get_ics_val(ics_parts, 'ATTENDEE', None, exit_none=False)
-            if not n is None:
-                #print(ics_parts.attendee.params)
-                cn = []
-                for user in ics_parts.attendee_list:
-                    if ('CN' in user.params) and ('RSVP' in user.params):
-                        if user.params['RSVP'][0].lower() == 'false':
-                            cn.append(user.params['CN'][0])
-                row[pos] = ";".join(cn)
-
-
-        # 特殊処理を必要としないICS要素
-        for k, v in p.items():
-            if ':' in list(k):
-                raise ValueError(f"Internal Error: 未対応のICS要素: {k}")
-            row[v] = Misc.get_ics_val(ics_parts, k, None, exit_none=False)
+        if TZ.is_aware(d):
+            if tzinfo is None:
+                return d.replace(tzinfo=None)
+            return d
 
-        return row
+        if tzinfo is None:
+            return d
+        return d.replace(tzinfo=tzinfo)
 
     ###
     @staticmethod
-    def vobject2csv(calendar: vobject.base.Component, timerange: int):
+    def expand_rrule(rrule_set, tzinfo, lo, hi, recurrence_ids: list) -> list:
         """
-        補助関数。 vobjectを読み込んで、csv出力用のbufferにいれていく。
+        繰返しスケジュール(RRULE)を展開する。
+
+        全てを展開せずに、CSVの出力範囲[lo, hi]と、上書スケジュール
+        (RECURRENCE-ID)で参照される日時の前後のみ展開する。
+        後者はRecurrenceID.restore()で基のスケジュールを探すために必要。
 
+        引数:
+        rrule_set: getrruleset()で得たdateutil.rrule.rruleset
+        tzinfo: rrulesetのDTSTARTのtzinfo。Noneの場合はnaive。
+        lo, hi: TimeRange.expansion_window()の返り値。naive。
+        recurrence_ids: このVEVENTのUIDを参照するRECURRENCE-IDのlist。
 
-        引数timerangeは使ってないが、念のため残しておく。
+        返り値:
+        展開した開始日時を昇順に並べたlist。
     """
+        slack = ConstDat.RRULE_EXPANSION_SLACK
+        hi = Main.rrule_bound(hi, tzinfo)
+
+        ret = []
+        if lo is None:
+            for s in rrule_set:
+                if s > hi:
+                    break
+                ret.append(s)
+        else:
+            ret += rrule_set.between(Main.rrule_bound(lo, tzinfo), hi, inc=True)
+
+        for r in recurrence_ids:
+            r = Main.rrule_bound(r, tzinfo)
+            ret += rrule_set.between(r - slack, r + slack, inc=True)
+
+        # 重複を除く。awareなdatetimeのhash()はutcoffset()を呼ぶ(dateutil.tz.tzical
+        # は遅い)。tzinfoが同じならローカルタイムで比べられるので、naiveにして除く。
+        if not tzinfo is None and all(getattr(s, 'tzinfo', None) is tzinfo for s in ret):
+            return sorted({s.replace(tzinfo=None): s for s in ret}.values())
+        return sorted(set(ret))
+
+    ###
+    @staticmethod
+    def vobject2csv(vevents, timeranges: list, override_list: dict, cache=None, \
+                    ics_header: str = None, override_uids: dict = None):
+        """
+        補助関数。 VEVENTをvobjectに変換して、csv出力用のbufferにいれていく。
+
+        引数:
+        vevents: VEVENTの行のlistを返すiterable。iter_vevent()の返り値。
+        timeranges: CSVの出力範囲を指定するtimerangeの値のlist。
+        override_list: key: UID, value: RECURRENCE-IDのlist。load_ics()の返り値。
+        cache: OccurrenceCache。Noneならキャッシュを使わない。
+        ics_header, override_uids: load_ics()の返り値。並列処理(-j)で使う。
+                                   Noneなら並列処理を行わない。
+
+        繰返しスケジュール(RRULE)はtimerangesで指定した期間(と
+        F.RRULE_HORIZON)の範囲のみ展開する。
+
+        期間外のスケジュールは、上書スケジュール(RECURRENCE-ID)の復元に
+        必要なもの以外はbufferに入れない。最終的な絞り込みは
+        ModCSV.modify_csv()で行う。
+        """
         # 返り値
         # VERSION1.3追加
         # 旧版1.2ではCSVの要素を生成したらすぐ出力してたが、
@@ -2138,146 +4290,218 @@ class Main:
         # 最終的に残るのが読み替えに失敗したRECURRENCE-ID。
         recurrence_id_list = {}
 
-        for component in calendar.components():
-            if component.name != 'VEVENT':
-                continue
-
-            dtstart = Misc.get_ics_val(component, 'dtstart')
-            dtend = Misc.get_ics_val(component, 'dtend')
-            uid = Misc.get_ics_val(component, 'uid', ConstDat.NA)
-            rrule = Misc.get_ics_val(component, 'rrule', None, exit_none=False)
-            # VERSION1.3追加: RECURRENCE-IDコード。
-            recurrence_id = Misc.get_ics_val(component, 'recurrence-id', None, exit_none=False)
-            recurrence_id = TZ.to_localtime(recurrence_id, exit_none=False)
-
-            # debugコード
-            if (F.DEBUG_UID is not None) and F.DEBUG_UID != uid:
-                continue
-
-            # データの検査
-            if (not rrule is None) and (not recurrence_id is None):
-                raise ValueError("ERROR: ICSデータ不整合: 同一VEVENTにRECURRENCE-IDとRRULEがあります。")
-
-            # Known bugs: RDATEに対応はしたが、動作確認例が少ないため、要注意。
-            #if Misc.get_ics_val(component, 'rdate', ConstDat.NA) != ConstDat.NA:
-            #    raise RuntimeError("ERROR: 本プログラム未実装のICS命令RDATEが使われています。")
-            #
-            if TZ.is_aware(dtstart) != TZ.is_aware(dtend):
-                raise ValueError("ERROR: ICSデータ不整合: 同一VEVENTにdtstart/dtendにtimezone有り/無しが混在。")
-
-            if TZ.hava_time(dtstart) != TZ.hava_time(dtend):
-                raise ValueError("ERROR: ICSデータ不整合: 同一VEVENTにdtstart/dtendに時刻情報の有り/無しが混在。")
-
-            if F.DEBUG_UID == uid:
-                print(f"STEP1: uid = {uid}", file=sys.stderr)
-                print(f"STEP1: dtstart = {dtstart}", file=sys.stderr)
-                print(f"STEP1: dtend = {dtend}", file=sys.stderr)
-
-            # CSV用のlist生成開始。
-            buff_pre = [uid, TZ.to_localtime(dtstart), recurrence_id]
-            buff_aft = Main.ics_parts_to_csv_buffer(component)
+        # 繰返しスケジュール(RRULE)の展開範囲。
+        lo, hi = TimeRange.expansion_window(timeranges, F.RRULE_HORIZON)
 
-            # ICSのRRULE命令が未使用ならそのまま出力する。
-            if rrule is None:
-                csv_buffer.append(buff_pre + buff_aft)
-
-                if F.support_recurrence_id and (not recurrence_id is None):
+        # VEVENTごとの行のlist。VEVENTの順番は逐次処理でも並列処理でも同じ。
+        if (not ics_header is None) and ParallelVevent.is_enabled():
+            rows_list = ParallelVevent.vevent2csv(list(vevents), cache, ics_header, override_uids, \
+                                                  timeranges, override_list, lo, hi)
+        else:
+            rows_list = (Main.cached_vevent2csv(block, cache, timeranges, override_list, lo, hi) \
+                         for block in vevents)
+
+        for rows in rows_list:
+            # 上書スケジュール(RECURRENCE-ID)の行は、期間外でもbufferに入る。
+            if F.support_recurrence_id:
+                for row in rows:
+                    recurrence_id = row[F.CSV_POS2["H:RECURRENCE_ID"]]
+                    if recurrence_id is None:
+                        continue
+                    uid = row[F.CSV_POS2["H:UID"]]
                     if uid not in recurrence_id_list:
                         recurrence_id_list[uid] = []
                     recurrence_id_list[uid].append(recurrence_id)
-                continue
+            csv_buffer += rows
+        # end for()
 
-            #ICSのRRULE命令の処理。
-            #t_c = component
-            #if type(dtstart) is datetime.date:
-            #print(type(rrule))
-            #print(rrule)
-            #ignoretz = (not isinstance(dtstart, datetime.datetime) or dtstart.tzinfo is None)
-
-            # rruleの繰返し回数はcountで指定と最終日時のuntilの場合がある。
-            # untilの場合はいろいろ大変。バグが非常に出やすい。
-
-            # Known bugs: 内部変数「_until」にアクセスしているため、ライブラリの仕様が
-            # 変わったら動かない。
-            until = dateutil.rrule.rrulestr(rrule)._until
-
-            org_dtstart = dtstart
-            if not until is None:
-                if TZ.is_aware(dtstart) and TZ.is_naive(until):
-                    # dtstartがaware(timezone有)であり、untilがnaive(floatingtime)。
-                    raise ValueError("ERROR: ICSデータ不整合: \
-                                     同一VEVENTのdtstartはtimezone有りで、\
-                                     rruleのuntilがtimezone有無し。")
-
-                if F.naive_aware_mixed_bugfix and TZ.is_aware(until) and TZ.is_naive(dtstart):
-                    # dtstartがnaive(floatingtime)だが、untilがaware(timezoneあり)の場合。
-                    # 本来はICSデータの不整合なのだが、あまりにこの事例が多いため対処。
-                    component.add('x-org-dtstart').value = dtstart
-                    component.dtstart.value = TZ.naive2aware(dtstart)
-                    component.add('x-org-dtend').value = dtend
-                    component.dtend.value = TZ.naive2aware(dtend)
-
-                    if F.DEBUG_UID == uid:
-                        t = Misc.get_ics_val(component, 'dtstart')
-                        print(f"STEP2: aware dtstart  = {t}", file=sys.stderr)
-                        t = Misc.get_ics_val(component, 'dtend')
-                        print(f"STEP2: aware dtend  = {t}", file=sys.stderr)
-
-            #component.prettyPrint()
-
-            rrule_set = component.getrruleset(addRDate=True)
-            if F.DEBUG_UID == uid:
-                print(f"STEP2.5: RRULE = {rrule}", file=sys.stderr)
-                for s in rrule_set:
-                    print(f"RRULE_PARTS={s}", file=sys.stderr)
+        if not cache is None:
+            cache.save()
+        return csv_buffer, recurrence_id_list
+    #end of func.
 
-            for s in rrule_set:
-                # getrrulesetがdatetime.dateからdatetime.datetimeに拡張する事がある。
-                if TZ.hava_time(s) and (not TZ.hava_time(org_dtstart)):
-                    if not TZ.is_am12(s):
-                        raise ValueError("BUG: getrrulesetの計算がおかしい")
-                    s = s.date()
+    ###
+    @staticmethod
+    def cached_vevent2csv(block: list, cache, timeranges: list, override_list: dict, lo, hi) -> list:
+        """
+        補助関数。VEVENT1個分の行のlistを、csv出力用のbufferの行のlistに変換する。
+        cache(OccurrenceCache)にあればそれを使う。cacheがNoneならキャッシュを使わない。
+    """
+        if cache is None:
+            return Main.vevent2csv(Main.vevent_readone(block), timeranges, override_list, lo, hi)
 
+        key = cache.key(block)
+        rows = cache.get(key)
+        if rows is None:
+            rows = Main.vevent2csv(Main.vevent_readone(block), timeranges, override_list, lo, hi)
+            cache.put(key, rows)
+        return rows
 
-                if F.DEBUG_UID == uid:
-                    print(f"STEP3: s   = {s}", file=sys.stderr)
+    ###
+    @staticmethod
+    def vevent2csv(component, timeranges: list, override_list: dict, lo, hi) -> list:
+        """
+        補助関数。VEVENT1個分のvobjectを、csv出力用のbufferの行のlistに変換する。
+        繰返しスケジュール(RRULE)は[lo, hi)の範囲を展開する。
+
+        引数:
+        component: VEVENTのvobjectのcomponetオブジェクト。vevent_readone()の返り値。
+        timeranges, override_list: vobject2csv()の引数。
+        lo, hi: TimeRange.expansion_window()の返り値。
+    """
+        rows = []
+        pos_uid = F.CSV_POS2["H:UID"]
+        pos_dtstart = F.CSV_POS2["H:DTSTART"]
+        pos_recurrence_id = F.CSV_POS2["H:RECURRENCE_ID"]
+        pos_sort = F.CSV_POS2["H:SORT"]
+
+        def keep(row: list) -> bool:
+            """期間外で、上書スケジュールの復元にも使わない行はFalse。"""
+            if row[pos_uid] in override_list:
+                return True
+            if not row[pos_recurrence_id] is None:
+                return True
+            return TimeRange.is_collect_any(row[pos_dtstart], timeranges)
+
+        dtstart = Misc.get_ics_val(component, 'dtstart')
+        dtend = Misc.get_ics_val(component, 'dtend')
+        uid = Misc.get_ics_val(component, 'uid', ConstDat.NA)
+        rrule = Misc.get_ics_val(component, 'rrule', None, exit_none=False)
+        # VERSION1.3追加: RECURRENCE-IDコード。
+        recurrence_id = Misc.get_ics_val(component, 'recurrence-id', None, exit_none=False)
+        recurrence_id = TZ.to_localtime(recurrence_id, exit_none=False)
+
+        # debugコード
+        if (F.DEBUG_UID is not None) and F.DEBUG_UID != uid:
+            return rows
+
+        # データの検査
+        if (not rrule is None) and (not recurrence_id is None):
+            raise ValueError("ERROR: ICSデータ不整合: 同一VEVENTにRECURRENCE-IDとRRULEがあります。")
+
+        # Known bugs: RDATEに対応はしたが、動作確認例が少ないため、要注意。
+        #if Misc.get_ics_val(component, 'rdate', ConstDat.NA) != ConstDat.NA:
+        #    raise RuntimeError("ERROR: 本プログラム未実装のICS命令RDATEが使われています。")
+        #
+        if TZ.is_aware(dtstart) != TZ.is_aware(dtend):
+            raise ValueError("ERROR: ICSデータ不整合: 同一VEVENTにdtstart/dtendにtimezone有り/無しが混在。")
+
+        if TZ.hava_time(dtstart) != TZ.hava_time(dtend):
+            raise ValueError("ERROR: ICSデータ不整合: 同一VEVENTにdtstart/dtendに時刻情報の有り/無しが混在。")
+
+        if F.DEBUG_UID == uid:
+            print(f"STEP1: uid = {uid}", file=sys.stderr)
+            print(f"STEP1: dtstart = {dtstart}", file=sys.stderr)
+            print(f"STEP1: dtend = {dtend}", file=sys.stderr)
+
+        # CSV用のlist生成開始。
+        buff_pre = [uid, TZ.to_localtime(dtstart), recurrence_id, None]
+        _, t, buff_pre[pos_sort] = OccurrenceTime(component).csv_time()
+        buff_aft = Main.ics_parts_to_csv_buffer(component, times=t)
+
+        # ICSのRRULE命令が未使用ならそのまま出力する。
+        if rrule is None:
+            if keep(buff_pre):
+                rows.append(buff_pre + buff_aft)
+            return rows
+
+        #ICSのRRULE命令の処理。
+        #t_c = component
+        #if type(dtstart) is datetime.date:
+        #print(type(rrule))
+        #print(rrule)
+        #ignoretz = (not isinstance(dtstart, datetime.datetime) or dtstart.tzinfo is None)
+
+        # rruleの繰返し回数はcountで指定と最終日時のuntilの場合がある。
+        # untilの場合はいろいろ大変。バグが非常に出やすい。
+
+        # Known bugs: 内部変数「_until」にアクセスしているため、ライブラリの仕様が
+        # 変わったら動かない。
+        until = dateutil.rrule.rrulestr(rrule)._until
+
+        org_dtstart = dtstart
+        if not until is None:
+            if TZ.is_aware(dtstart) and TZ.is_naive(until):
+                # dtstartがaware(timezone有)であり、untilがnaive(floatingtime)。
+                raise ValueError("ERROR: ICSデータ不整合: \
+                                 同一VEVENTのdtstartはtimezone有りで、\
+                                 rruleのuntilがtimezone有無し。")
+
+            if F.naive_aware_mixed_bugfix and TZ.is_aware(until) and TZ.is_naive(dtstart):
+                # dtstartがnaive(floatingtime)だが、untilがaware(timezoneあり)の場合。
+                # 本来はICSデータの不整合なのだが、あまりにこの事例が多いため対処。
+                component.add('x-org-dtstart').value = dtstart
+                component.dtstart.value = TZ.naive2aware(dtstart)
+                component.add('x-org-dtend').value = dtend
+                component.dtend.value = TZ.naive2aware(dtend)
 
                 if F.DEBUG_UID == uid:
-                    print(f"STEP4: PASS(timerange={timerange})", file=sys.stderr)
-
-                t = TZ.ics_parts_to_csv_time(component, s)
-                buff_pre[F.CSV_POS2["H:DTSTART"]] = TZ.to_localtime(s)
-                #buff_aft[0:4] = t
-                buff_aft[F.CSV_POS["DTSTART:DAY"]] = t[0]
-                buff_aft[F.CSV_POS["DTSTART:TIME"]] = t[1]
-                buff_aft[F.CSV_POS["DTEND:DAY"]] = t[2]
-                buff_aft[F.CSV_POS["DTEND:TIME"]] = t[3]
-                if 'X:ALLDAY_EVENT' in F.CSV_POS:
-                    buff_aft[F.CSV_POS["X:ALLDAY_EVENT"]] = t[4]
-
-                csv_buffer.append(buff_pre + buff_aft)
-                if F.DEBUG_UID == uid:
-                    print(f"STEP4: normailize(s) = \
-                           {buff_pre[F.CSV_POS2['H:DTSTART']]}", file=sys.stderr)
-        # end for()
-        return csv_buffer, recurrence_id_list
+                    t = Misc.get_ics_val(component, 'dtstart')
+                    print(f"STEP2: aware dtstart  = {t}", file=sys.stderr)
+                    t = Misc.get_ics_val(component, 'dtend')
+                    print(f"STEP2: aware dtend  = {t}", file=sys.stderr)
+
+        #component.prettyPrint()
+
+        rrule_set = component.getrruleset(addRDate=True)
+        tzinfo = None
+        if TZ.is_aware(component.dtstart.value):
+            tzinfo = component.dtstart.value.tzinfo
+        rrule_list = Main.expand_rrule(rrule_set, tzinfo, lo, hi, override_list.get(uid, []))
+        debug = F.DEBUG_UID == uid
+        if debug:
+            print(f"STEP2.5: RRULE = {rrule}", file=sys.stderr)
+            for s in rrule_list:
+                print(f"RRULE_PARTS={s}", file=sys.stderr)
+
+        # 各回で変わるのは開始時刻sのみ。VEVENTごとに1回だけ準備する。
+        occurrence = OccurrenceTime(component)
+        time_pos = [(pos, n) for n, pos in enumerate(F.CSV_TIME_POS) if not pos is None]
+        org_has_time = TZ.hava_time(org_dtstart)
+
+        for s in rrule_list:
+            # getrrulesetがdatetime.dateからdatetime.datetimeに拡張する事がある。
+            if (not org_has_time) and TZ.hava_time(s):
+                if not TZ.is_am12(s):
+                    raise ValueError("BUG: getrrulesetの計算がおかしい")
+                s = s.date()
+
+
+            if debug:
+                print(f"STEP3: s   = {s}", file=sys.stderr)
+                print(f"STEP4: PASS(timeranges={timeranges})", file=sys.stderr)
+
+            buff_pre[pos_dtstart], t, buff_pre[pos_sort] = occurrence.csv_time(s)
+            for pos, n in time_pos:
+                buff_aft[pos] = t[n]
+
+            if keep(buff_pre):
+                rows.append(buff_pre + buff_aft)
+            if debug:
+                print(f"STEP4: normailize(s) = \
+                       {buff_pre[pos_dtstart]}", file=sys.stderr)
+        return rows
     #end of func.
 
 
     #####
     @staticmethod
-    def ics2csv(ics_file_path: str, csv_file_path: str, timerange: int = 0) -> None:
+    def load_ics(ics_file_path: str) -> tuple:
         """
-        ICS(iCalendar)ファイルをCSVファイルに変換する。
+        ICS(iCalendar)ファイルのVEVENT以外を読み込み、vobjectに変換する。
+        TimeZone関係の初期化も行う。VEVENTはiter_vevent()で1個ずつ変換する。
 
         引数:
             ics_file_path (str): 変換元のICS(iCalendar)ファイル。"stdin"を指定すると標準入力。
-            csv_file_path (str): 変換先のCSVファイル。"stdout"を指定すると標準出力。
-            timerange (int): CSVに変換する日時を限定する場合は、指定する。
-                             2025年8月分がほしい場合は「202508」と指定する。
-                             未指定や「0」だと全部変換する。
         返り値:
-            None。失敗したら停止する。
+            以下のtuple。失敗したら停止する。
+            calendar: VEVENTを含まないVCALENDARのvobjectのcomponetオブジェクト。
+            source: FileIO.open_ics()の返り値とVEVENTの位置(PreSetup.scan_ics())
+                    のtuple。iter_vevent()に渡す。
+            override_list: key: UID, value: RECURRENCE-IDのlist。
+            override_uids: key: 上書スケジュールのUIDの値, value: RECURRENCE-IDの行のlist。
+                           iter_vevent()とOccurrenceCacheに渡す。
+            ics_header: VEVENT以外の行(VCALENDARのヘッダとVTIMEZONE)のstr。
         """
         ######################
         if vobject.VERSION != "0.9.9":
@@ -2296,33 +4520,144 @@ class Main:
             print(f"INFO: CSVヘッダ: {F.CSV_HEADER}", file=sys.stderr)
 
         ######################
-        #ファイルから読み込み
-        ics_data = FileIO.file2str(ics_file_path)
+        # ファイルの確認。ICSファイル全体を一度に読み込まずに、
+        # VEVENTを1個ずつ処理する。
+        source = FileIO.open_ics(ics_file_path)
+
+        ######################
+        # 1回目の読み込み。VEVENT以外(VCALENDARのヘッダとVTIMEZONE)と、
+        # 上書スケジュール(RECURRENCE-ID)のUIDとRECURRENCE-IDのみを取り出す。
+        # VEVENTの位置も調べておき、2回目はVEVENTの部分だけを読む。
+        header = []
+        overrides = []
+        spans = []
+        years = set()
+        for block in PreSetup.scan_ics(source, spans):
+            if not block[0].startswith('BEGIN:VEVENT'):
+                header += block
+                continue
+            d = PreSetup.raw_dtstart(block)
+            if not d is None:
+                years.add(d.year)
+            if F.support_recurrence_id:
+                skeleton = PreSetup.override_skeleton(block)
+                if not skeleton is None:
+                    overrides.append(skeleton)
+
+        ics_data = "\n".join(header) + "\n"
         # あまりに小さい。
         if len(ics_data) < 10:
             raise RuntimeError(f"ERROR: ファイル読み込みエラー: ファイル行数: {len(ics_data)}")
 
-        ######################
-        # ライブラリvobjectがのicsファイルの読み込む時に例外を履く
-        # 記述の修正を行う。
-        # liics2gacsv(v1.4)では RRULEのEXDATEの記述の修正のみ。
-        if F.exdate_format_bugfix:
-            ics_data = PreSetup.bugfix_exdate_format(ics_data)
-        else: # 処理の都合で改行の正規化が必要
-            ics_data = "\n".join(ics_data.splitlines()) + "\n"
-
         ######################
         # 読み込んだデータstrをvobjectに変換。
+        # VEVENTの日時のtzinfoは、ここで変換したVTIMEZONEのものに差し替える
+        # (TZ.swap_timezones())。
         calendar = vobject.readOne(ics_data)
 
         ######################
         # TimeZoneデータ読み込み
-        TZ.load_ics(ics_data, F.OVERRIDE_TIMEZONE)
+        # VTIMEZONEをIANAのTimeZoneと比べる期間は、DTSTARTの範囲から
+        # 繰返しスケジュールの展開の上限まで。前後1年は時差とDTENDの余裕。
+        F.TIMEZONE_YEARS = None
+        if len(years) > 0:
+            F.TIMEZONE_YEARS = (max(min(years) - 1, datetime.MINYEAR + 1),
+                                min(max(max(years), F.RRULE_HORIZON // 100) + 1, datetime.MAXYEAR - 1))
+        TZ.load_ics(calendar, F.OVERRIDE_TIMEZONE, F.TIMEZONE_YEARS)
 
         ######################
-        # vobjectのオブジェクトをCSVに変換
-        csv_buffer, recurrence_id_list = Main.vobject2csv(calendar, timerange)
+        # key: 上書スケジュールのUIDの値, value: RECURRENCE-IDの行をリストで収納。
+        # PreSetup.vevent_prefilter()とOccurrenceCacheで使う。UIDは行ではなく
+        # 値で比べる。基のスケジュールと上書スケジュールで、UIDの折り返しの
+        # 位置やパラメータが異なる場合がある。
+        override_uids = {}
+        for skeleton in overrides:
+            uid = PreSetup.raw_ics_value(skeleton, 'UID')
+            if uid not in override_uids:
+                override_uids[uid] = []
+            override_uids[uid].append(PreSetup.raw_ics_line(skeleton, 'RECURRENCE-ID'))
+        override_list = Main.override_list(override_uids)
+
+        return calendar, (source, spans), override_list, override_uids, ics_data
+
+    #####
+    @staticmethod
+    def override_list(override_uids: dict) -> dict:
+        """
+        load_ics()のoverride_uids(UIDの値とRECURRENCE-IDの行)から、
+        key: UID, value: RECURRENCE-IDのlistのdictを作る。
+        上書スケジュールの基のスケジュールは、期間外であっても展開する。
+    """
+        ret = {}
+        for uid_value, recurrence_id_lines in override_uids.items():
+            for recurrence_id_line in recurrence_id_lines:
+                component = Main.vevent_readone(["BEGIN:VEVENT", f"UID:{uid_value}", recurrence_id_line, "END:VEVENT"])
+                uid = Misc.get_ics_val(component, 'uid', ConstDat.NA)
+                if uid not in ret:
+                    ret[uid] = []
+                ret[uid].append(Misc.get_ics_val(component, 'recurrence-id'))
+        return ret
+
+    #####
+    @staticmethod
+    def iter_vevent(source, timeranges: list, override_uids: dict):
+        """
+        ICSのVEVENTを1個ずつ行のlistで返すgenerator。vobjectへの変換は
+        vobject2csv()でvevent_readone()を呼んで行う。
+
+        期間指定がある場合は、PreSetup.vevent_prefilter()で期間外と
+        判断できるVEVENTは読み飛ばす。
+
+        引数:
+            source: load_ics()の返り値。
+            timeranges: CSVの出力範囲を指定するtimerangeの値のlist。
+            override_uids: load_ics()の返り値。
+    """
+        lo, hi = TimeRange.window(timeranges)
+        source, spans = source
+        for block in PreSetup.iter_vevent_blocks(source, spans, F.exdate_format_bugfix):
+            if (not lo is None) and (not PreSetup.vevent_prefilter(block, lo, hi, override_uids)):
+                continue
+            yield block
+
+    #####
+    @staticmethod
+    def vevent_readone(block: list):
+        """
+        VEVENT1個分の行のlistをvobjectに変換する。
+
+        VEVENT単体でvobject.readOne()するとVEVENT自身が変換されない
+        (getrruleset()などが使えない)ため、VCALENDARで包んで変換する。
+        VTIMEZONEは包まないので、vobjectはTZIDを登録済みのもの(他の
+        ICSファイルの定義の場合もある)か、naiveにする。日時のtzinfoは
+        TZ.swap_timezones()でTZ.load_ics()の表のものに差し替える。
+    """
+        lines = ["BEGIN:VCALENDAR", "VERSION:2.0"] + block + ["END:VCALENDAR"]
+        component = vobject.readOne("\n".join(lines) + "\n").vevent
+        TZ.swap_timezones(component)
+        return component
+
+    #####
+    @staticmethod
+    def csv_write(csv_buffer: list, recurrence_id_list: dict, \
+                  ics_file_path: str, csv_file_path: str, timerange: int) -> bool:
+        """
+        vobject2csv()で生成したcsv_bufferを加工して、CSVファイルに出力する。
+
+        引数csv_bufferとrecurrence_id_listは書き換えられる。同じ
+        データから複数のCSVを出力する場合は、複製を渡すこと。
+
+        引数:
+            csv_buffer, recurrence_id_list: vobject2csv()の返り値。
+            ics_file_path (str): 変換元のICS(iCalendar)ファイル。終了ステータス表示用。
+            csv_file_path (str): 変換先のCSVファイル。"stdout"を指定すると標準出力。
+            timerange (int): CSVに変換する日時を限定する場合は、指定する。
+        返り値:
+            変換に成功したらTrue。復元に失敗した繰返し命令があればFalse。
+            失敗したら停止する。
 
+        終了ステータスは表示しない。呼び出し元でprint_result()で表示する。
+        """
         Misc.csv_buffer_dump(csv_buffer, prefix="D1:", uid=F.DEBUG_UID)
 
         ######################
@@ -2345,40 +4680,95 @@ class Main:
 
         ######################
         # 日付でsortする. index sort.
-        # BUG: 月と日が2桁でないとバグる。 可:2026/01/02, 不可:2026/1/2
-        # BUG: 順番が (「20xx/月/日」| ISO_8601)以外だったら不可
+        # キーは開始日時と終了日時(H:SORT、OccurrenceTime.sort_key())とSUMMARY。
+        # 日付と時刻の出力形式によらない。
+        # 行はVEVENTごとに開始日時の順に並んでいる。sort()(Timsort)は並んで
+        # いる部分をそのまま使ってマージするので、heapq.mergeは使わない。
         if F.output_sort:
-            k = [F.CSV_POS2["DTSTART:DAY"], F.CSV_POS2["DTSTART:TIME"], \
-                 F.CSV_POS2["DTEND:DAY"], F.CSV_POS2["DTEND:TIME"], \
-                 F.CSV_POS2["SUMMARY"]]
-
-            csv_index.sort(key=lambda x: [csv_buffer[x][k[0]], csv_buffer[x][k[1]],\
-                                          csv_buffer[x][k[2]], csv_buffer[x][k[3]],\
-                                          csv_buffer[x][k[4]]])
+            pos_sort = F.CSV_POS2["H:SORT"]
+            pos_summary = F.CSV_POS2["SUMMARY"]
+            csv_index.sort(key=lambda x: (csv_buffer[x][pos_sort], csv_buffer[x][pos_summary]))
 
         Misc.csv_buffer_dump(csv_buffer, prefix="D3:", uid=F.DEBUG_UID)
 
         # 出力用CSVファイルのopen。
-        csv_writer = FileIO.open_csv_object(csv_file_path)
+        # -Esimple、-Ereplace_getaの文字の置き換えはCSVWriterが書き込む前に行う。
+        with FileIO.open_csv_object(csv_file_path) as csv_writer:
+            #CSVのHeader出力
+            if F.print_csv_header:
+                csv_writer.writerow(F.CSV_HEADER[F.CSV_POS2["H:LENGTH"]:])
 
-        #CSVのHeader出力
-        if F.print_csv_header:
-            csv_writer.writerow(F.CSV_HEADER[F.CSV_POS2["H:LENGTH"]:])
-
-        #CSVの要素出力
-        for i in csv_index:
-            csv_writer.writerow(csv_buffer[i][F.CSV_POS2["H:LENGTH"]:])
+            #CSVの要素出力
+            pos_length = F.CSV_POS2["H:LENGTH"]
+            for i in csv_index:
+                csv_writer.writerow(csv_buffer[i][pos_length:])
 
         Misc.csv_buffer_dump(csv_buffer, prefix="D4:", uid=F.DEBUG_UID)
 
-        # 終了ステータス表示。
-        if bad_recurrence_id_count == 0:
+        return bad_recurrence_id_count == 0
+
+    #####
+    @staticmethod
+    def print_result(success: bool, ics_file_path: str, csv_file_path: str) -> None:
+        """
+        終了ステータスを表示する。
+        success: True: 変換に成功。False: 変換に概ね成功(復元に失敗した繰返し命令がある)
+        """
+        if success:
             print(f"INFO: 変換に成功しました: '{ics_file_path}' to '{csv_file_path}'",\
                   file=sys.stderr)
         else:
             print(f"WARNING: 変換に*概ね*成功しました: '{ics_file_path}' to '{csv_file_path}'",\
                   file=sys.stderr)
 
+    #####
+    @staticmethod
+    def ics2csv(ics_file_path: str, csv_file_path: str, timerange: int = 0) -> None:
+        """
+        ICS(iCalendar)ファイルをCSVファイルに変換する。
+
+        引数:
+            ics_file_path (str): 変換元のICS(iCalendar)ファイル。"stdin"を指定すると標準入力。
+            csv_file_path (str): 変換先のCSVファイル。"stdout"を指定すると標準出力。
+            timerange (int): CSVに変換する日時を限定する場合は、指定する。
+                             2025年8月分がほしい場合は「202508」と指定する。
+                             未指定や「0」だと全部変換する。
+        返り値:
+            変換に成功したらTrue。復元に失敗した繰返し命令があればFalse。
+            失敗したら停止する。
+        """
+        ######################
+        # 前回の変換結果が使えれば、それを出力して終了。
+        cache_key = None
+        if ResultCache.is_enabled(ics_file_path, csv_file_path):
+            FileIO.check_ics_file(ics_file_path)
+            cache_key = ResultCache.key(ResultCache.digest(ics_file_path), timerange)
+            success = ResultCache.load(cache_key, ics_file_path, csv_file_path)
+            if not success is None:
+                return success
+
+        # キャッシュに保存するため、変換中の警告などの表示を記録する。
+        with StderrLog.record() as log:
+            _, source, override_list, override_uids, ics_header = Main.load_ics(ics_file_path)
+
+            ######################
+            # vobjectのオブジェクトをCSVに変換
+            occurrence_cache = None
+            if OccurrenceCache.is_enabled():
+                occurrence_cache = OccurrenceCache(ics_header, [timerange], override_uids)
+            vevents = Main.iter_vevent(source, [timerange], override_uids)
+            csv_buffer, recurrence_id_list = \
+                Main.vobject2csv(vevents, [timerange], override_list, occurrence_cache, \
+                                 ics_header, override_uids)
+
+            success = Main.csv_write(csv_buffer, recurrence_id_list, ics_file_path, csv_file_path, timerange)
+
+        # 終了ステータス表示。
+        Main.print_result(success, ics_file_path, csv_file_path)
+        if not cache_key is None:
+            ResultCache.store(cache_key, csv_file_path, success, "".join(log))
+        return success
+
     #end func
 
 
@@ -2531,6 +4921,21 @@ OutlookClassicとほぼ同等の出力を行います。文字コードはUTF-8
  のみです。それ以外は"(N/A)"という出力になります。会議の出席者等は
  Outlook(classic)のICSのみ対応。
 
+--format-file="ファイル"
+CSVの書式をJSONファイルで指定します。-Fより優先します。書式は
+ライブラリのConstDat.CSV_FORMATSと同じです。例:
+
+  {{"encoding": "utf_8", "allday": "nextday", "datetime": "extended",
+   "columns": [["開始日", "DTSTART:DAY"], ["開始時刻", "DTSTART:TIME"],
+               ["終了日", "DTEND:DAY"], ["終了時刻", "DTEND:TIME"],
+               ["件名", "SUMMARY"], ["場所", "LOCATION"], ["備考", null]]}}
+
+  columnsはCSVの各列の[ヘッダ, ICSの要素]です。ICSの要素がnullの列は
+  "(N/A)"という出力になります。"DTSTART:DAY", "DTSTART:TIME",
+  "DTEND:DAY", "DTEND:TIME", "SUMMARY"は必須です。encoding(文字コー
+  ド), allday(終日スケジュールの日付の書式), datetime(日時の書式)を省
+  略すると-FSimpleと同じです。
+
 * ICSのTimeZone指定
 
 -T"文字列"
@@ -2684,6 +5089,13 @@ defaultではICSメモ欄(DESCRIPTION)のTeamsの会議インフォメーショ
 
 ※詳細は関数ModCSV.modify_description()をみよ。
 
+--add-teams-marker="文字列"
+Teamsの会議インフォメーションの始まりの目印を追加します。この文字列を
+含む行から後を消します。複数指定できます。デフォルトの目印は「Microsoft
+Teams ヘルプが必要ですか」と、「.」もしくは「_」の27個の連続です。
+
+※詳細は関数ModCSV.modify_description()をみよ。
+
 --remove-tail-cr
 タイトル(SUMMARY)やメモ欄(DESCRIPTION)の最後の改行や空白を除去する。
 defaultでは除去しない。
@@ -2736,6 +5148,46 @@ DTSTART/DTENDに時刻情報を付与する修正を行う対策を行ってい
 --DEBUG-UID="UID"
 デバグ用。特定のUIDのオブジェクトを各種箇所で表示する。
 
+* 変換結果のキャッシュ:
+
+入力のICSファイルの中身と引数が前回と同じなら、前回の変換結果のCSVをそ
+のまま出力します。キャッシュは下記に保存します。
+  {ConstDat.CACHE_DIR_DEFAULT}
+標準入力/標準出力を使う場合はキャッシュを使いません。
+
+--no-cache
+変換結果のキャッシュを使いません。
+
+--cache-dir="フォルダ"
+変換結果のキャッシュの保存先を指定します。
+
+--cache-size="数字"
+変換結果のキャッシュの上限をMB単位で指定します。defaultは{ConstDat.CACHE_SIZE_MB_DEFAULT}。
+上限を超えたら最後に使った日時が古いものから消します。
+
+* 並列処理:
+
+-j "数字", --jobs="数字"
+1個のICSファイルのスケジュールを指定した数のプロセスで並列に変換しま
+す。defaultは1(並列処理しない)。スケジュールが{ConstDat.PARALLEL_MIN_VEVENTS}個未満の場合は並
+列処理しません。設備の予約表など、非常に大きいICSファイル向けです。
+
+--workers="数字"
+一括変換(icsbatch.py)の並列数(プロセス数)を指定します。defaultはCPUの
+数。一括変換ではICSファイルごとに並列に変換するので、-jは無視します。
+
+* 繰返しスケジュール(RRULE)の展開:
+
+--rrule-horizon="年月"
+繰返しスケジュールを展開する上限を西暦4桁+月2桁の6桁の数字で指定しま
+す。指定した月の月末まで展開します。defaultは{ConstDat.RRULE_HORIZON_DEFAULT}。
+
+終了日(UNTIL)や回数(COUNT)の指定が無い繰返しスケジュールは、この上限で
+打ち切ります。期間を指定した場合は、その期間の前後のみ展開します。
+
+例
+  --rrule-horizon=203012
+
 * 煩雑なファイル確認:
 
 --enable-file-exist-test
@@ -2749,13 +5201,51 @@ DTSTART/DTENDに時刻情報を付与する修正を行う対策を行ってい
 """
 
 ############################################
-#設計がクソですが、Fは FeatureFlags型で、下記の外部公開の関数から呼び出された時に
-#初期化します。関数から抜ける時に再びNoneに上書きします。
-F = None
+class FlagContext:
+    """
+    モジュール変数Fの型。
+
+    Fは FeatureFlags型として使いますが、実体は下記の外部公開の関数から
+    呼び出された時にFlagContext.use()で設定したFeatureFlagsです。関数か
+    ら抜けると元に戻ります。設定はcontextvarsに保存するので、スレッドご
+    とに独立しており、複数のスレッドから同時に変換を行っても互いに干渉し
+    ません。
+
+    Fの属性の読み書きは、現在有効なFeatureFlagsの属性の読み書きになります。
+    """
+    __slots__ = ()
+    current = contextvars.ContextVar("libicsconvcsv.F", default=None)
+
+    def __getattr__(self, name):
+        return getattr(FlagContext.current.get(), name)
+
+    def __setattr__(self, name, value):
+        setattr(FlagContext.current.get(), name, value)
+
+    @staticmethod
+    def get() -> FeatureFlags:
+        """
+        現在有効なFeatureFlagsを返す。
+    """
+        return FlagContext.current.get()
+
+    @staticmethod
+    @contextlib.contextmanager
+    def use(flag: FeatureFlags):
+        """
+        withブロックの間、flagをFとして有効にする。
+    """
+        token = FlagContext.current.set(flag)
+        try:
+            yield flag
+        finally:
+            FlagContext.current.reset(token)
+
+F = FlagContext()
 #
 
 def parse_args(argv: list, amari_argv: int, allow_short_opt: str = None, \
-               allow_long_opt: list = None) -> list:
+               allow_long_opt: list = None, use_cache: bool = False) -> list:
     """
     引数の解析を行います。
 
@@ -2768,17 +5258,21 @@ def parse_args(argv: list, amari_argv: int, allow_short_opt: str = None, \
     allow_short_opt(str)およびallow_long_opt(list)を使います。与えられた
     引数のみ有効にします。
 
+    use_cache(bool)は変換結果のキャッシュ(ResultCache, OccurrenceCache)を
+    使うかどうかの初期値です。defaultのFalseではキャッシュを使わず、
+    F.CACHE_DIRに何も書き込みません。コマンド(icsconvcsv.pyなど)はTrueを
+    指定し、引数--no-cacheで無効にします。
+
     返り値:
     オプション解析に失敗するとNoneを返します。
 
     正常終了時は引数解析後に残るマイナスがない引数と,FeatureFlags型のクラスです。
 
     """
-    global F
-    F = FeatureFlags()
-    ret = PreSetup.parse_args(argv, amari_argv, allow_short_opt, allow_long_opt)
-    flag = F
-    F = None
+    flag = FeatureFlags()
+    flag.use_cache = use_cache
+    with FlagContext.use(flag):
+        ret = PreSetup.parse_args(argv, amari_argv, allow_short_opt, allow_long_opt)
     return ret, flag
 
 
@@ -2793,14 +5287,222 @@ def ics2csv(flag: FeatureFlags, ics_file_path: str, csv_file_path: str, timerang
             timerange (int): CSVに変換する日時を限定する場合は、指定する。
                              2025年8月分がほしい場合は「202508」と指定する。
                              未指定や「0」だと全部変換する。
+        返り値:
+            変換に成功したらTrue。復元に失敗した繰返し命令があればFalse。
+            失敗したら停止する。
+
+        複数のスレッドから同時に呼び出せます。同じflagを共有しても構いません。
+        flagの複製を使うため、TimeZoneの推測結果などはflagに残りません。
+        変換結果のキャッシュは、parse_args()にuse_cache=Trueを指定した
+        場合のみ使います。
+        別のICSファイルに同じTZIDで定義の異なるVTIMEZONEがあっても、
+        それぞれのICSファイルの定義で変換します。
+        ただし、標準入力/標準出力を使う場合とflag.overwriteがFalseの場合は
+        同時に呼び出さないでください。
+    """
+    with FlagContext.use(flag.copy()):
+        return Main.ics2csv(ics_file_path, csv_file_path, timerange)
+
+class ConvertedCalendar:
+    """
+    ICS(iCalendar)ファイルを一度だけ読み込み、複数期間のCSVを出力する。
+
+    ics2csv()を期間ごとに呼び出すと、その都度ICSファイルの読み込み、
+    vobjectへの変換、TimeZoneの初期化、繰返しスケジュールの展開を行う。
+    本クラスはそれらを一度だけ行い、結果を保持する。
+
+    変換結果のキャッシュ(ResultCache)が使える期間しか出力しない場合は、
+    ICSファイルの読み込み自体を行わない。
+
+    使用例:
+        cal = ConvertedCalendar(flag, "calendar.ics", [202512, 202601])
+        cal.write_csv("schedules202512.csv", 202512)
+        cal.write_csv("schedules202601.csv", 202601)
+
+    ics2csv()と同様に、複数のスレッドから同時に使えます。
+    """
+    def __init__(self, flag: FeatureFlags, ics_file_path: str, timeranges: list = None):
+        """
+        引数:
+            flag(FeatureFlags) 各種フラグ。複製を保持し、TimeZoneの推測結果も
+                             複製の方に保持する。
+            ics_file_path (str): 変換元のICS(iCalendar)ファイル。"stdin"を指定すると標準入力。
+            timeranges (list): 出力する予定のtimerangeの値のlist。
+                             繰返しスケジュールはこの期間のみ展開する。
+                             未指定や「0」を含む場合は全部展開する。
+        """
+        if timeranges is None:
+            timeranges = [0]
+        self.flag = flag.copy()
+        self.ics_file_path = ics_file_path
+        self.timeranges = list(timeranges)
+
+        self.calendar = None
+        self.csv_buffer = None
+        self.recurrence_id_list = None
+        # load()の間の標準エラー出力への表示。ResultCacheに期間ごとの表示と合わせて保存する。
+        self.load_log = ""
+        # load()を複数スレッドから同時に呼ばれても一度だけ行う。
+        self.lock = threading.Lock()
+
+        with FlagContext.use(self.flag):
+            # 入力ファイルの確認はキャッシュの有無にかかわらず最初に行う。
+            FileIO.check_ics_file(ics_file_path)
+            self.ics_digest = None
+            if F.use_cache and ics_file_path != "stdin":
+                self.ics_digest = ResultCache.digest(ics_file_path)
+
+    def load(self) -> None:
+        """
+        ICSファイルを読み込み、繰返しスケジュールを展開する。
+        write_csv()から必要な時に一度だけ呼ばれる。
+        """
+        with self.lock, FlagContext.use(self.flag):
+            if not self.csv_buffer is None:
+                return
+
+            with StderrLog.record() as log:
+                self.calendar, source, override_list, override_uids, ics_header = \
+                    Main.load_ics(self.ics_file_path)
+                occurrence_cache = None
+                if OccurrenceCache.is_enabled():
+                    occurrence_cache = OccurrenceCache(ics_header, self.timeranges, override_uids)
+                vevents = Main.iter_vevent(source, self.timeranges, override_uids)
+                self.csv_buffer, self.recurrence_id_list = \
+                    Main.vobject2csv(vevents, self.timeranges, override_list, occurrence_cache, \
+                                     ics_header, override_uids)
+            self.load_log = "".join(log)
+
+    def write_csv(self, csv_file_path: str, timerange: int = 0) -> None:
+        """
+        CSVファイルを出力する。何度でも呼び出せる。
+
+        引数:
+            csv_file_path (str): 変換先のCSVファイル。"stdout"を指定すると標準出力。
+            timerange (int): CSVに変換する日時を限定する場合は、指定する。
+                             コンストラクタに渡したtimerangesに含まれること。
         返り値:
             None。失敗したら停止する。
+        """
+        if (0 not in self.timeranges) and (timerange not in self.timeranges):
+            raise ValueError(f"ERROR: 期間{timerange}は展開されていません: {self.timeranges}")
+
+        with FlagContext.use(self.flag):
+            cache_key = None
+            if ResultCache.is_enabled(self.ics_file_path, csv_file_path):
+                cache_key = ResultCache.key(self.ics_digest, timerange)
+                if not ResultCache.load(cache_key, self.ics_file_path, csv_file_path) is None:
+                    return
+
+        self.load()
+
+        # csv_write()はbufferを書き換えるので複製を渡す。
+        csv_buffer = [list(row) for row in self.csv_buffer]
+        recurrence_id_list = {k: list(v) for k, v in self.recurrence_id_list.items()}
+
+        with FlagContext.use(self.flag):
+            with StderrLog.record() as log:
+                success = Main.csv_write(csv_buffer, recurrence_id_list, \
+                                         self.ics_file_path, csv_file_path, timerange)
+            Main.print_result(success, self.ics_file_path, csv_file_path)
+            if not cache_key is None:
+                ResultCache.store(cache_key, csv_file_path, success, self.load_log + "".join(log))
+
+class Batch:
+    """
+    一括変換(ics2csv_batch())の補助関数。ProcessPoolExecutorの各プロセ
+    スで呼ばれる。ライブラリの読み込みとflagの受け渡しはプロセスごとに
+    一度だけ行う。
+    """
+    # 各プロセスで使うFeatureFlags。init()で設定する。
+    flag = None
+
+    @staticmethod
+    def init(flag: FeatureFlags) -> None:
+        """
+        プロセスの初期化。ICSファイルごとに並列に変換するので、-jは無視する。
+    """
+        Batch.flag = flag.copy()
+        Batch.flag.PARALLEL_JOBS = 1
+
+    @staticmethod
+    def convert(job: tuple):
+        """
+        1個変換する。変換の終了ステータスはMain.ics2csv()と同じ形式で表示する。
+
+        引数:
+            job: (入力ICS, timerange, 出力CSV)のtuple。timerangeがNoneなら
+                 変換せずに失敗とする。
+        返り値:
+            ics2csv()の返り値。失敗した場合はNone。
+    """
+        ics_file_path, timerange, csv_file_path = job
+        if timerange is None or not TimeRange.format_check(timerange):
+            print(f"ERROR: 期間指定の誤り: {timerange}", file=sys.stderr)
+        else:
+            try:
+                return ics2csv(Batch.flag, ics_file_path, csv_file_path, timerange)
+            except SystemExit:
+                # エラーの内容は表示済み。
+                pass
+            except Exception as e:
+                print(f"ERROR: {e}", file=sys.stderr)
+        print(f"ERROR: 変換に失敗しました: '{ics_file_path}' to '{csv_file_path}'", file=sys.stderr)
+        return None
+
+    @staticmethod
+    def print_summary(results: list, elapsed: float) -> None:
+        """
+        一括変換の結果の集計を表示する。
+    """
+        ok = results.count(True)
+        warn = results.count(False)
+        ng = results.count(None)
+        level = "INFO" if ng == 0 else "WARNING"
+        print(f"{level}: 一括変換: {len(results)}件中, 成功{ok}件, *概ね*成功{warn}件, "\
+              f"失敗{ng}件, {elapsed:.1f}秒", file=sys.stderr)
+
+def ics2csv_batch(flag: FeatureFlags, jobs: list, workers: int = None) -> list:
+    """
+        複数のICS(iCalendar)ファイルを、プロセスを並列に動かしてCSVファイルに変換する。
+
+        ICSファイルの大きいものから順に変換を始めるので、全体の時間が短くなる。
+        最後に結果の集計を表示する。
+
+        引数:
+            flag(FeatureFlags) 各種フラグ。すべての変換で共通。
+            jobs (list): (入力ICS, timerange, 出力CSV)のtupleのlist。
+                         入力ICSに標準入力、出力CSVに標準出力は使えない。
+                         timerangeがNoneか誤った値の変換は、他の変換を
+                         止めずに失敗として数える。
+            workers (int): 並列数(プロセス数)。Noneならflag.BATCH_WORKERS、
+                           それもNoneならCPUの数。
+        返り値:
+            jobsと同じ順番で、ics2csv()の返り値のlist。失敗した変換はNone。
     """
-    global F
-    F = flag
-    ret = Main.ics2csv(ics_file_path, csv_file_path, timerange)
-    F = None
-    return ret
+    if not flag.overwrite:
+        raise ValueError("ERROR: 一括変換では出力ファイルの上書き確認はできません。")
+    for ics_file_path, _, csv_file_path in jobs:
+        if ics_file_path == "stdin" or csv_file_path == "stdout":
+            raise ValueError("ERROR: 一括変換では標準入力/標準出力は使えません。")
+
+    if workers is None:
+        workers = flag.BATCH_WORKERS
+
+    # 大きいファイルから。存在しないファイルは変換時にエラーとする。
+    order = sorted(range(len(jobs)), \
+                   key=lambda i: -os.path.getsize(jobs[i][0]) if os.path.isfile(jobs[i][0]) else 0)
+
+    start = time.time()
+    results = [None] * len(jobs)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=Batch.init, \
+                                                initargs=(flag,)) as executor:
+        futures = {executor.submit(Batch.convert, jobs[i]): i for i in order}
+        for future in concurrent.futures.as_completed(futures):
+            results[futures[future]] = future.result()
+
+    Batch.print_summary(results, time.time() - start)
+    return results
 
 def guess_timerange(TIMERANGE: str, INPUT_ICS_FILENAME: str, OUTPUT_CSV_FILENAME: str) -> int:
     """
@@ -2817,7 +5519,7 @@ def guess_timerange(TIMERANGE: str, INPUT_ICS_FILENAME: str, OUTPUT_CSV_FILENAME
     return TimeRange.guess(TIMERANGE, INPUT_ICS_FILENAME, OUTPUT_CSV_FILENAME)
 
 ############################################
-__all__ = ('parse_args', 'ics2csv', 'guess_timerange',\
+__all__ = ('parse_args', 'ics2csv', 'guess_timerange', 'ConvertedCalendar', 'ics2csv_batch',\
            'VERSION', 'HELP_LICENSE', 'HELP_PART1',\
            'HELP_PART2', 'HAIFU_URL', 'GITHUB_URL')
 
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- python -*-
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2026 MATSUMOTO Ryuji.
+# License: Apache License 2.0
+#
+import sys
+import os
+import shutil
+import subprocess
+import tempfile
+
+from testcommon import BASE, expected, same_file, finish
+
+__doc__="""
+一括変換コマンドicsbatch.pyの確認用。
+
+入力フォルダと出力フォルダを指定する形と、一覧.csvを指定する形で
+icsbatch.pyを実行し、出力されたCSVをCSV/*.csvと比較する。一覧.csvには
+書式の誤った行と、期間を推測できない行(guess)を混ぜておき、それらは
+失敗として表示され、他の行は変換されることを確認する。
+
+また、同じTZIDで定義が異なるICS/ouc20-*.ics(README.tests.mdの1.8)を
+入力フォルダに入れて、1プロセスで順番に変換(--workers=1)した場合と
+並列数を指定しない場合の出力が、icsconvcsv.pyで1個ずつ変換した出力と
+同じことを確認する。
+
+すべて期待どおりなら終了ステータス0、そうでなければ不一致を表示して
+終了ステータス1。
+"""
+
+PYTHON = sys.executable
+PROGNAME = os.path.join(BASE, "..", "icsbatch.py")
+PROG_SINGLE = os.path.join(BASE, "..", "icsconvcsv.py")
+
+# すべての変換で共通の引数。キャッシュは使わない。
+OPTIONS = ["--no-cache", "-Fgaroon", "-Cutf-8"]
+
+# 一覧.csvの中身。6行目は書式の誤り、4行目と7行目は期間の誤り。
+MANIFEST = """# icsbatch.pyの確認用
+ou16.ics,all,out/ou16.csv
+ouc16.ics,guess,out/ouc16-all.csv
+
+ou16.ics,guess,out/no-timerange.csv
+ouc16.ics,all
+ou16.ics,99,out/bad-timerange.csv
+"""
+
+# (出力CSV, 期待値のCSV)
+EXPECTED_MANIFEST = [
+    ("out/ou16.csv", "ou16"),
+    ("out/ouc16-all.csv", "ou16"),
+]
+# 変換しないはずの出力CSV
+NOT_CREATED = ["out/no-timerange.csv", "out/bad-timerange.csv"]
+
+# 同じTZIDで定義が異なるICSファイル
+TZID_NAMES = ["ouc20-est", "ouc20-jst", "ouc20-notz"]
+
+bad = 0
+
+def check(name: str, ok: bool) -> None:
+    """okがFalseなら表示する。"""
+    global bad
+    if not ok:
+        print(f"ERROR: {name}")
+        bad += 1
+
+def run(args: list, prog: str = PROGNAME) -> tuple:
+    """icsbatch.pyを実行して、(終了ステータス, 標準エラー出力)を返す。"""
+    p = subprocess.run([PYTHON, prog] + OPTIONS + args, capture_output=True, text=True, check=False)
+    return p.returncode, p.stderr
+
+with tempfile.TemporaryDirectory() as d:
+    # 入力フォルダと出力フォルダを指定する形
+    ics_dir = os.path.join(d, "ics")
+    csv_dir = os.path.join(d, "csv")
+    os.mkdir(ics_dir)
+    os.mkdir(csv_dir)
+    for name in ("ou16", "ouc16"):
+        shutil.copy(os.path.join(BASE, "ICS", name + ".ics"), ics_dir)
+    status, log = run(["all", ics_dir, csv_dir])
+    check(f"フォルダ: 終了ステータス{status}", status == 0)
+    for name in ("ou16", "ouc16"):
+        check(f"フォルダ: {name}.csv", same_file(os.path.join(csv_dir, name + ".csv"), expected("ou16")))
+
+    # 一覧.csvを指定する形。ファイル名は一覧.csvからの相対パス。
+    for name in ("ou16", "ouc16"):
+        shutil.copy(os.path.join(BASE, "ICS", name + ".ics"), d)
+    os.mkdir(os.path.join(d, "out"))
+    manifest = os.path.join(d, "jobs.csv")
+    with open(manifest, 'w', encoding='utf-8') as f:
+        f.write(MANIFEST)
+    status, log = run([manifest])
+    check(f"一覧: 終了ステータス{status}", status == 1)
+    for out, name in EXPECTED_MANIFEST:
+        check(f"一覧: {out}", same_file(os.path.join(d, out), expected(name)))
+    for out in NOT_CREATED:
+        check(f"一覧: {out}が作られた", not os.path.exists(os.path.join(d, out)))
+    check("一覧: 書式の誤りの表示", "の6行目の書式の誤り" in log)
+    check("一覧: 期間の推測の失敗の表示", "出力ファイル名からCSVの期間の推測に失敗しました" in log)
+    check("一覧: 集計", "4件中, 成功2件, *概ね*成功0件, 失敗2件" in log)
+
+    # 同じTZIDで定義が異なるICSファイル。icsconvcsv.pyで1個ずつ変換した結果と比較。
+    tzid_dir = os.path.join(d, "tzid")
+    single_dir = os.path.join(d, "single")
+    os.mkdir(tzid_dir)
+    os.mkdir(single_dir)
+    for name in TZID_NAMES:
+        ics = os.path.join(BASE, "ICS", name + ".ics")
+        shutil.copy(ics, tzid_dir)
+        status, log = run(["all", ics, os.path.join(single_dir, name + ".csv")], PROG_SINGLE)
+        check(f"TZID: icsconvcsv.py {name}: 終了ステータス{status}", status == 0)
+    for workers in (["--workers=1"], []):
+        out_dir = os.path.join(d, f"tzid-out{len(workers)}")
+        os.mkdir(out_dir)
+        status, log = run(workers + ["all", tzid_dir, out_dir])
+        check(f"TZID{workers}: 終了ステータス{status}", status == 0)
+        for name in TZID_NAMES:
+            check(f"TZID{workers}: {name}.csv", same_file(os.path.join(out_dir, name + ".csv"), \
+                                                          os.path.join(single_dir, name + ".csv")))
+
+finish("icsbatch.pyの確認", bad)
+#EOF
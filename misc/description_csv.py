@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- python -*-
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2026 MATSUMOTO Ryuji.
+# License: Apache License 2.0
+#
+
+from testcommon import libicsconvcsv, finish
+
+__doc__="""
+メモ欄(DESCRIPTION)の加工の確認用。
+
+ModCSV.modify_description()に引数とDESCRIPTIONを与えて、Teamsの会議
+インフォメーションの削除(defaultで有効、--show-teams-infomationで無効)と
+4行目以降の削除(--delete-4th-line-onward)の結果を表(CASES)で確認する。
+期待値は1個の正規表現で探すように変更する前(行ごとに探していた版)の
+結果。
+
+すべて一致すれば終了ステータス0、そうでなければ不一致を表示して
+終了ステータス1。
+"""
+
+TEAMS = "Microsoft Teams ヘルプが必要ですか"
+REMOVE = "(REMOVE TEAMS INFOMATION)"
+
+# (引数, DESCRIPTION, 期待値)
+CASES = [
+    ([], "本文\n2行目\n", "本文\n2行目\n"),
+    ([], "本文\r\n2行目", "本文\n2行目\n"),
+    ([], "", "\n"),
+    ([], "本文\n" + TEAMS + "\nパスワード\n", "本文\n" + REMOVE + "\n"),
+    ([], "本文\n前置き" + TEAMS + "\nパスワード", "本文\n" + REMOVE + "\n"),
+    ([], TEAMS + "\nパスワード\n", REMOVE + "\n"),
+    ([], "本文\n" + "." * 27 + "\n会議ID\n", "本文\n" + REMOVE + "\n"),
+    ([], "本文\n" + "_" * 27 + "\n会議ID\n", "本文\n" + REMOVE + "\n"),
+    ([], "本文\n" + "." * 26 + "\n" + "_" * 26 + "\n", "本文\n" + "." * 26 + "\n" + "_" * 26 + "\n"),
+    (["--show-teams-infomation"], "本文\r\n" + TEAMS + "\r\n", "本文\r\n" + TEAMS + "\r\n"),
+    (["--add-teams-marker=会議ID:"], "本文\n会議ID: 123\n", "本文\n" + REMOVE + "\n"),
+    (["--delete-4th-line-onward"], "a\nb\nc\nd\ne\n", "a\nb\nc\nd\n"),
+    (["--delete-4th-line-onward"], "a\nb\nc\n\nd", "a\nb\nc\n\n"),
+    (["--delete-4th-line-onward"], "a\r\nb\rc\n\n\ne", "a\nb\nc\n\n"),
+    (["--delete-4th-line-onward"], "a\nb\n", "a\nb\n"),
+    (["--delete-4th-line-onward"], "a\nb\n" + TEAMS + "\nc\nd\n", "a\nb\n" + REMOVE + "\n"),
+    (["--delete-4th-line-onward"], "a\nb\nc\nd\n" + TEAMS + "\n", "a\nb\nc\nd\n"),
+    (["--delete-4th-line-onward", "--show-teams-infomation"], \
+     "a\nb\nc\n" + TEAMS + "\ne\n", "a\nb\nc\n" + TEAMS + "\n"),
+    (["--remove-tail-cr"], "本文\n\n" + TEAMS + "\n", "本文\n\n" + REMOVE),
+    (["--remove-tail-cr", "--delete-4th-line-onward"], "a\nb\nc\n\nd", "a\nb\nc"),
+]
+
+bad = 0
+for opt, description, expected in CASES:
+    argv, flag = libicsconvcsv.parse_args(opt + ["--no-cache", "-Fgaroon", "all", "in.ics", "out.csv"], 3)
+    with libicsconvcsv.FlagContext.use(flag):
+        ret = libicsconvcsv.ModCSV.modify_description(description)
+    if ret != expected:
+        print(f"ERROR: {opt} {description!r}: {ret!r} != {expected!r}")
+        bad += 1
+
+finish(f"{len(CASES)}件", bad)
+#EOF
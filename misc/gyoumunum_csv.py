@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- python -*-
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2026 MATSUMOTO Ryuji.
+# License: Apache License 2.0
+#
+import datetime
+
+from testcommon import libicsconvcsv, finish
+
+__doc__="""
+登録番号記入の拡張仕様(引数-z)の確認用。
+
+ModCSV.enhanced_gyoumunum()に(SUMMARY, DESCRIPTION)を与えて、
+docstringのDescription-Type1〜Type5の規則どおりのDESCRIPTIONになるかを
+表(CASES)で確認する。SUMMARYの分割と合わせた確認として、別の表
+(CASES_CSV)をModCSV.modify_csv()で変換する。
+
+すべて一致すれば終了ステータス0、そうでなければ不一致を表示して
+終了ステータス1。
+"""
+
+# (種類, SUMMARY, DESCRIPTION, 期待値)
+# 期待値がNoneならDESCRIPTIONは変えない。RuntimeErrorなら例外。
+CASES = [
+    ("登録番号なし", "打合せ", "本文\n", None),
+    ("登録番号なし(5桁)", "打合せ%12345", "本文\n", None),
+    ("登録番号なし(途中)", "打合せ%12です", "本文\n", None),
+    ("Type1-1", "打合せ%12", "0345", "12"),
+    ("Type1-1", "打合せ g12　", " 0345 \n\n", "12"),
+    ("Type1-1", "打合せｇ０１２", "\t０９９９　\n", "12"),
+    ("Type1-2", "打合せ%12", "(N/A)", "12"),
+    ("Type1-2", "打合せ%12", "(N/A)本文\n2行目\n", "12"),
+    ("Type1-3", "打合せ%12", "", "12"),
+    ("Type1-3", "打合せ％１２", " \n　\t\n", "12"),
+    ("Type2", "打合せ%12", " 99 \n本文\n", "12\n本文\n"),
+    ("Type2", "打合せ%12", "１２３４\n本文", "12\n本文"),
+    ("Type2", "打合せ%7", "0012\n\n本文\n", "7\n\n本文\n"),
+    ("Type3", "打合せ%12", "\n本文\n", "12\n本文\n"),
+    ("Type3", "打合せ%12", "　\t\n本文", "12\n本文"),
+    ("Type4", "打合せ%12", "可\n本文\n", "12\n可\n本文\n"),
+    ("Type4", "打合せ%12", " 急　\n本文", "12\n急\n本文\n"),
+    ("Type4", "打合せ%12", "可", "12\n可\n"),
+    ("Type4", "打合せ%12", "急\x0b本文", "12\n急\n本文\n"),
+    ("Type5", "打合せ%12", "本文\n2行目\n", "12\n\n本文\n2行目\n"),
+    ("Type5", "打合せ%12", "可急\n", "12\n\n可急\n"),
+    ("Type5", "打合せ%12", "12345\n本文", "12\n\n12345\n本文"),
+    ("Type5", "打合せ%12", "12 本文\n", "12\n\n12 本文\n"),
+    ("改行の正規化なし", "打合せ%12", "本文\r\n", RuntimeError),
+]
+
+# (SUMMARY, DESCRIPTION, 予定, 予定詳細, 期待値): modify_csv()で確認する。
+# Teamsの会議インフォメーションを消す処理で、DESCRIPTIONの最後に改行が付く。
+CASES_CSV = [
+    ("会議:打合せ%12", "", "会議", "打合せ%12", "12"),
+    ("会議：打合せ g34 ", "可\n本文", "会議", "打合せ g34", "34\n可\n本文\n"),
+    ("打合せ%56", " 78 \n本文", "", "打合せ%56", "56\n本文\n"),
+    ("会議:打合せ", "本文", "会議", "打合せ", "本文\n"),
+]
+
+bad = 0
+
+def check(name: str, ret, expected) -> None:
+    """結果retが期待値expectedと異なれば表示する。"""
+    global bad
+    if ret != expected:
+        print(f"ERROR: {name}: {ret!r} != {expected!r}")
+        bad += 1
+
+argv, flag = libicsconvcsv.parse_args(["--no-cache", "-Fgaroon", "-z", "all", "in.ics", "out.csv"], 3)
+with libicsconvcsv.FlagContext.use(flag):
+    for name, summary, description, expected in CASES:
+        try:
+            ret = libicsconvcsv.ModCSV.enhanced_gyoumunum(description, summary)
+        except RuntimeError:
+            ret = RuntimeError
+        check(f"{name}: {summary!r} {description!r}", ret, expected)
+
+    F = libicsconvcsv.FlagContext.get()
+    pos = F.CSV_POS2
+    buff = []
+    for summary, description, *_ in CASES_CSV:
+        row = [None] * len(F.CSV_HEADER)
+        row[pos["H:UID"]] = "uid"
+        row[pos["H:DTSTART"]] = datetime.datetime(2026, 1, 1, 10)
+        row[pos["SUMMARY"]] = summary
+        row[pos["DESCRIPTION"]] = description
+        buff.append(row)
+    libicsconvcsv.ModCSV.modify_csv(buff, 0)
+    for row, (summary, description, summary_h, summary_d, expected) in zip(buff, CASES_CSV):
+        check(f"modify_csv: {summary!r} {description!r}", \
+              (row[pos["SUMMARY:H"]], row[pos["SUMMARY"]], row[pos["DESCRIPTION"]]), \
+              (summary_h, summary_d, expected))
+
+finish(f"{len(CASES) + len(CASES_CSV)}件", bad)
+#EOF
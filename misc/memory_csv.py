@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- python -*-
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2026 MATSUMOTO Ryuji.
+# License: Apache License 2.0
+#
+import sys
+import os
+import glob
+import tempfile
+import tracemalloc
+
+from testcommon import libicsconvcsv, vevent, calendar, parse
+
+__doc__="""
+繰返しスケジュールのメモリ使用量の確認用。
+
+毎日繰り返すVEVENTがVEVENTS個、それぞれREPEAT回、合計VEVENTS×REPEAT行
+になるICSファイルを作り、libicsconvcsv.ics2csv()でCSVに変換する間の
+メモリ使用量のピークをtracemallocで測る。キャッシュを使わない場合と、
+VEVENTキャッシュ(OccurrenceCache)から読み込む場合の両方を測る。
+
+DESCRIPTIONが短い場合と長い場合を比べる。SUMMARYやDESCRIPTIONを各行で
+共有していれば、ピークの差はDESCRIPTIONを行ごとに複製した場合の1/10未満に
+なる。また、VEVENTキャッシュから読み込む場合のピークは、キャッシュを
+使わない場合の1.1倍未満になる(VEVENTキャッシュ全体を読み込まない)。
+そうなら終了ステータス0、そうでなければ終了ステータス1。
+"""
+
+VEVENTS = 50
+REPEAT = 1000
+DESCRIPTION_LONG = "議題の説明です。" * 100
+
+def repeat_calendar(description: str) -> str:
+    """繰返しスケジュールだけのICSファイルの中身を返す。"""
+    vevents = []
+    for n in range(VEVENTS):
+        vevents.append(vevent(f"uid-{n}", [f"SUMMARY:定例会議{n}",
+                                           f"DESCRIPTION:{description}",
+                                           f"DTSTART:20260101T{10 + n % 8:02d}0000",
+                                           f"DTEND:20260101T{11 + n % 8:02d}0000",
+                                           f"RRULE:FREQ=DAILY;COUNT={REPEAT}"], "20260101T000000Z"))
+    return calendar("memory_csv.py", vevents)
+
+def peak(d: str, description: str, use_cache: bool) -> int:
+    """
+    ics2csv()で変換する間のメモリ使用量のピーク(バイト)。use_cacheが
+    Trueなら、1回変換してVEVENTキャッシュを作ってから、VEVENTキャッシュ
+    から読み込む変換を測る。
+    """
+    ics = os.path.join(d, "memory.ics")
+    out = os.path.join(d, "memory.csv")
+    cache_dir = os.path.join(d, "cache")
+    with open(ics, 'w', encoding='utf-8') as f:
+        f.write(repeat_calendar(description))
+
+    opt = [f"--cache-dir={cache_dir}"] if use_cache else ["--no-cache"]
+    flag = parse(opt + ["-Foutlookclassic"], ics, use_cache)
+    if use_cache:
+        libicsconvcsv.ics2csv(flag, ics, out, 0)
+        # 変換結果のキャッシュ(ResultCache)を消し、VEVENTキャッシュを使わせる。
+        for p in glob.glob(os.path.join(cache_dir, "*.csvcache")):
+            os.remove(p)
+
+    tracemalloc.start()
+    libicsconvcsv.ics2csv(flag, ics, out, 0)
+    ret = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return ret
+
+copied = VEVENTS * REPEAT * sys.getsizeof(DESCRIPTION_LONG)
+bad = 0
+peaks = {}
+for use_cache in (False, True):
+    with tempfile.TemporaryDirectory() as d1, tempfile.TemporaryDirectory() as d2:
+        short = peak(d1, "本文", use_cache)
+        long = peak(d2, DESCRIPTION_LONG, use_cache)
+    name = "VEVENTキャッシュ" if use_cache else "キャッシュなし"
+    print(f"INFO: {name}: {VEVENTS * REPEAT}行: ピーク {short // 1024}KB / {long // 1024}KB"
+          f" (DESCRIPTIONの行ごとの複製は{copied // 1024}KB)")
+    if (long - short) * 10 >= copied:
+        print(f"ERROR: {name}: DESCRIPTIONを行ごとに複製しています。")
+        bad += 1
+    peaks[use_cache] = max(short, long)
+
+if peaks[True] * 10 >= peaks[False] * 11:
+    print("ERROR: VEVENTキャッシュから読み込む方が、キャッシュを使わない場合よりメモリを使います。")
+    bad += 1
+
+sys.exit(1 if bad else 0)
+#EOF
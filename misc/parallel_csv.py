@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- python -*-
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2026 MATSUMOTO Ryuji.
+# License: Apache License 2.0
+#
+import sys
+import os
+import tempfile
+import concurrent.futures
+
+from testcommon import vevent, calendar, parse, convert, finish
+
+__doc__="""
+大きいICSファイル1個のVEVENTを複数のプロセスで変換する(引数-j)確認用。
+
+VEVENTが800個のICSファイルを作り、いくつかのオプションと期間で
+libicsconvcsv.ics2csv()を使ってCSVに変換する。-jなしで変換した結果と、
+-jを指定して変換した結果を比較する。VEVENTが
+ConstDat.PARALLEL_MIN_VEVENTS個未満だと並列化しないので、実際に
+ProcessPoolExecutorを使ったかも確認する。
+
+一致すれば終了ステータス0、不一致があれば不一致を表示して
+終了ステータス1。
+
+引数: プロセス数(省略時4)
+"""
+
+# VEVENTの数
+VEVENTS = 800
+
+# 変換のオプション。キャッシュは使わない。
+OPTIONS = [
+    ["--no-cache"],
+    ["--no-cache", "-Fgaroon", "-Cutf-8", "-m", "-z"],
+    ["--no-cache", "--show-timezone", "-Fgaroon", "-Cutf-8"],
+    ["--no-cache", "-TAsia/Tokyo", "-Foutlookclassic"],
+]
+
+# 期間。0は全部。
+TIMERANGES = [0, 202606]
+
+VTIMEZONE = """BEGIN:VTIMEZONE
+TZID:Eastern Standard Time
+BEGIN:STANDARD
+DTSTART:16010101T020000
+TZOFFSETFROM:-0400
+TZOFFSETTO:-0500
+RRULE:FREQ=YEARLY;INTERVAL=1;BYDAY=1SU;BYMONTH=11
+END:STANDARD
+BEGIN:DAYLIGHT
+DTSTART:16010101T020000
+TZOFFSETFROM:-0500
+TZOFFSETTO:-0400
+RRULE:FREQ=YEARLY;INTERVAL=1;BYDAY=2SU;BYMONTH=3
+END:DAYLIGHT
+END:VTIMEZONE
+"""
+
+TZID = "DTSTART;TZID=Eastern Standard Time"
+
+def parallel_calendar() -> str:
+    """
+    VEVENTがVEVENTS個のICSファイルの中身を返す。単発、終日、繰返し
+    (COUNT, UNTIL, EXDATE)、上書スケジュール(RECURRENCE-ID)、UTCの
+    日時を順番に作る。
+    """
+    ret = []
+    n = 0
+    i = 0
+    while n < VEVENTS:
+        day = 1 + i % 28
+        hour = 8 + i % 10
+        summary = f"SUMMARY:打合せ{i}%{i % 100}"
+        kind = i % 5
+        if kind == 0:
+            ret.append(vevent(f"single-{i}", [summary, f"{TZID}:202606{day:02d}T{hour:02d}0000",
+                                              f"DTEND;TZID=Eastern Standard Time:202606{day:02d}T{hour+1:02d}0000",
+                                              f"DESCRIPTION:本文{i}\\n2行目"]))
+        elif kind == 1:
+            ret.append(vevent(f"allday-{i}", [summary, f"DTSTART;VALUE=DATE:202606{day:02d}",
+                                              f"DTEND;VALUE=DATE:202606{day+1:02d}"]))
+        elif kind == 2:
+            ret.append(vevent(f"weekly-{i}", [summary, f"{TZID}:202603{day:02d}T{hour:02d}3000",
+                                              f"DTEND;TZID=Eastern Standard Time:202603{day:02d}T{hour+1:02d}0000",
+                                              "RRULE:FREQ=WEEKLY;COUNT=20",
+                                              f"EXDATE;TZID=Eastern Standard Time:202603{day:02d}T{hour:02d}3000"]))
+        elif kind == 3:
+            uid = f"daily-{i}"
+            ret.append(vevent(uid, [summary, f"{TZID}:202605{day:02d}T{hour:02d}0000",
+                                    f"DTEND;TZID=Eastern Standard Time:202605{day:02d}T{hour:02d}4500",
+                                    "RRULE:FREQ=DAILY;UNTIL=20260731T000000Z"]))
+            n += 1
+            ret.append(vevent(uid, [summary + "(変更)",
+                                    f"RECURRENCE-ID;TZID=Eastern Standard Time:202606{day:02d}T{hour:02d}0000",
+                                    f"{TZID}:202606{day:02d}T{hour+1:02d}0000",
+                                    f"DTEND;TZID=Eastern Standard Time:202606{day:02d}T{hour+1:02d}4500"]))
+        else:
+            ret.append(vevent(f"utc-{i}", [summary, f"DTSTART:202606{day:02d}T{hour:02d}0000Z",
+                                           f"DTEND:202606{day:02d}T{hour+1:02d}0000Z",
+                                           "DESCRIPTION:本文\\nMicrosoft Teams ヘルプが必要ですか\\n会議ID"]))
+        n += 1
+        i += 1
+    return calendar("parallel_csv.py", ret, VTIMEZONE)
+
+# 実際にProcessPoolExecutorを使った回数を数える。
+pools = 0
+
+class CountingPool(concurrent.futures.ProcessPoolExecutor):
+    """作られた回数を数えるProcessPoolExecutor。"""
+    def __init__(self, *args, **kwargs):
+        global pools
+        pools += 1
+        super().__init__(*args, **kwargs)
+
+concurrent.futures.ProcessPoolExecutor = CountingPool
+
+jobs = 4
+if len(sys.argv) > 1:
+    jobs = int(sys.argv[1])
+
+bad = 0
+count = 0
+with tempfile.TemporaryDirectory() as d:
+    ics = os.path.join(d, "parallel.ics")
+    with open(ics, 'w', encoding='utf-8') as f:
+        f.write(parallel_calendar())
+
+    for n, opt in enumerate(OPTIONS):
+        for timerange in TIMERANGES:
+            out = []
+            for j in (["-j1"], [f"-j{jobs}"]):
+                csv_file = os.path.join(d, f"{n}-{timerange}{j[0]}.csv")
+                out.append(convert(parse(opt + j, ics), ics, csv_file, timerange))
+            count += 1
+            if out[0] != out[1]:
+                print(f"ERROR: 不一致: {opt} {timerange}")
+                bad += 1
+
+if pools < count:
+    print(f"ERROR: 並列化しなかった変換がある: {count}件中{pools}件")
+    bad += 1
+
+finish(f"VEVENT{VEVENTS}個を{count}通りに変換(-j{jobs})", bad)
+#EOF
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- python -*-
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2026 MATSUMOTO Ryuji.
+# License: Apache License 2.0
+#
+import sys
+import os
+
+BASE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BASE, ".."))
+import libicsconvcsv
+
+__doc__="""
+misc/*_csv.pyで共通に使う関数。
+
+ICSファイルの中身の生成(vevent(), calendar())、libicsconvcsv.ics2csv()
+での変換(parse(), convert())、CSV/*.csvとの比較(expected(), same_file())、
+結果の表示と終了(finish())。
+
+使用例:
+    from testcommon import libicsconvcsv, convert, finish
+"""
+
+def vevent(uid: str, lines: list, dtstamp: str = "20260501T000000Z") -> str:
+    """
+    VEVENT1個分の文字列を返す。linesはUIDとDTSTAMP以外の行(改行なし)のlist。
+    """
+    return "BEGIN:VEVENT\n" + f"UID:{uid}\n" + "".join(s + "\n" for s in lines) + \
+        f"DTSTAMP:{dtstamp}\nEND:VEVENT\n"
+
+def calendar(prodid: str, vevents: list, vtimezone: str = "") -> str:
+    """
+    VEVENTの文字列(vevent()の返り値)のlistから、ICSファイルの中身を返す。
+    vtimezoneはVTIMEZONEの文字列。
+    """
+    return f"BEGIN:VCALENDAR\nVERSION:2.0\nPRODID:{prodid}\n" + vtimezone + \
+        "".join(vevents) + "END:VCALENDAR\n"
+
+def parse(opt: list, ics: str, use_cache: bool = False) -> libicsconvcsv.FeatureFlags:
+    """
+    オプションのlistからlibicsconvcsv.ics2csv()に渡すFeatureFlagsを返す。
+    """
+    argv, flag = libicsconvcsv.parse_args(opt + ["all", ics, "OUT"], 3, use_cache=use_cache)
+    return flag
+
+def convert(flag: libicsconvcsv.FeatureFlags, ics: str, out: str, timerange: int = 0) -> bytes:
+    """
+    1個変換して、CSVの中身を返す。
+    """
+    libicsconvcsv.ics2csv(flag, ics, out, timerange)
+    with open(out, 'rb') as f:
+        return f.read()
+
+def expected(name: str) -> str:
+    """
+    期待値のCSV(CSV/name.csv)のファイル名を返す。
+    """
+    return os.path.join(BASE, "CSV", name + ".csv")
+
+def same_file(path1: str, path2: str) -> bool:
+    """
+    2個のファイルの中身が同じならTrue。どちらかが無ければFalse。
+    """
+    if not (os.path.isfile(path1) and os.path.isfile(path2)):
+        return False
+    with open(path1, 'rb') as f1, open(path2, 'rb') as f2:
+        return f1.read() == f2.read()
+
+def finish(name: str, bad: int) -> None:
+    """
+    「INFO: name: 不一致bad件」と表示して、不一致があれば終了ステータス1、
+    無ければ0で終了する。
+    """
+    print(f"INFO: {name}: 不一致{bad}件")
+    sys.exit(1 if bad else 0)
+#EOF
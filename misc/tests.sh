@@ -11,6 +11,9 @@
 
 PYTHON=python3
 PROGNAME=../icsconvcsv.py
+# 変換結果のキャッシュは使わない。前回の変換結果ではなく、いまのコード
+# の出力を確認するため。
+PROGOPT=--no-cache
 
 TIMERANG=all
 
@@ -31,6 +34,22 @@ NKF=off
 NORMAL=off
 
 PROG_NORMAL=./normal_csv.py
+# スレッド並列実行の確認用
+PROG_THREAD=./thread_csv.py
+# 繰返しスケジュールのメモリ使用量の確認用
+PROG_MEMORY=./memory_csv.py
+# 登録番号記入の拡張仕様の確認用
+PROG_GYOUMUNUM=./gyoumunum_csv.py
+# メモ欄(DESCRIPTION)の加工の確認用
+PROG_DESCRIPTION=./description_csv.py
+# VEVENTの複数プロセスでの変換(-j)の確認用
+PROG_PARALLEL=./parallel_csv.py
+# 一括変換コマンドicsbatch.pyの確認用
+PROG_BATCH=./batch_csv.py
+# 日付と時刻の文字列への変換(TimeFormat)の確認用
+PROG_TIMEFORMAT=./timeformat_csv.py
+# 同じTZIDで定義が異なるICSファイルの確認用
+PROG_TZID=./tzid_csv.py
 # 上記プログラムで表示する行数
 # -1, -2, -3, -4, -5,
 # 無指定もしくは-aなら全部
@@ -75,14 +94,14 @@ function cmp_ics() {
     fi
 
     if [ $SILENT == "off" ]; then
-	echo -n "CHECK: > ${PYTHON} ${PROGNAME} ${ARGS} ${ICS} ${TMP1CSV}"
+	echo -n "CHECK: > ${PYTHON} ${PROGNAME} ${PROGOPT} ${ARGS} ${ICS} ${TMP1CSV}"
     fi
-    ${PYTHON} ${PROGNAME} ${ARGS} ${ICS} ${TMP1CSV} 2> ${TMPLOG}
+    ${PYTHON} ${PROGNAME} ${PROGOPT} ${ARGS} ${ICS} ${TMP1CSV} 2> ${TMPLOG}
     retval=$?
 
     if [ $retval -ne 0 ] ; then
 	if [ $SILENT == "on" ]; then
-	    echo -n "CHECK: > ${PYTHON} ${PROGNAME} ${ARGS} ${ICS} ${TMP1CSV}"
+	    echo -n "CHECK: > ${PYTHON} ${PROGNAME} ${PROGOPT} ${ARGS} ${ICS} ${TMP1CSV}"
 	fi
 
 	echo 'ERROR: 失敗しました(終了ステータス異常)。'
@@ -151,6 +170,63 @@ function cmp_ics() {
     fi
 }
 
+function cmp_cache_log() {
+    ARGS=$1
+    ICS=ICS/$2."ics"
+    CACHEDIR=$(mktemp -d)
+    COLDLOG=${CACHEDIR}/cold.txt
+    WARMLOG=${CACHEDIR}/warm.txt
+
+    if [ $SILENT == "off" ]; then
+	echo "CHECK: > ${PYTHON} ${PROGNAME} --cache-dir=${CACHEDIR} ${ARGS} ${ICS} ${TMP1CSV} (2回)"
+    fi
+    # 1回目はキャッシュなし、2回目はキャッシュあり。ヒット/ミスの回数の行は除いて比較する。
+    ${PYTHON} ${PROGNAME} --cache-dir=${CACHEDIR} ${ARGS} ${ICS} ${TMP1CSV} 2>&1 >/dev/null \
+	| grep -v "INFO: キャッシュ:" > ${COLDLOG}
+    ${PYTHON} ${PROGNAME} --cache-dir=${CACHEDIR} ${ARGS} ${ICS} ${TMP2CSV} 2>&1 >/dev/null \
+	| grep -v "INFO: キャッシュ:" | sed "s|${TMP2CSV}|${TMP1CSV}|" > ${WARMLOG}
+    ls ${CACHEDIR}/*.csvcache > /dev/null 2>&1
+    retval=$?
+    if [ $retval -eq 0 ] ; then
+	diff -u ${COLDLOG} ${WARMLOG} > ${TMPLOG}
+	retval=$?
+    fi
+    rm -rf ${CACHEDIR}
+
+    if [ $retval -ne 0 ] ; then
+	echo "CHECK: > ${PYTHON} ${PROGNAME} --cache-dir=... ${ARGS} ${ICS} (キャッシュなし/あり)"
+	echo 'ERROR: 失敗しました'
+	echo "-- ERROR LOG --------------------------"
+	cat -n ${TMPLOG} | fold -w 80
+	echo "---------------------------------------"
+	if [ $ERROR_TAIOU = "stop" ]; then
+	   exit
+	fi
+	return
+    fi
+
+    if [ $SILENT == "off" ]; then
+	echo ": SUCCESS "
+    fi
+}
+
+function run_prog() {
+    # ICSファイルを使わない確認用のプログラム(thread_csv.pyなど)を実行する。
+    # 終了ステータスが0以外なら停止する。標準エラー出力は表示しない。
+    PROG=$1
+
+    if [ $SILENT == "off" ]; then
+	echo "CHECK: > ${PYTHON} ${PROG}"
+    fi
+    ${PYTHON} ${PROG} 2> /dev/null
+    retval=$?
+    if [ $retval -ne 0 ] ; then
+	echo "CHECK: > ${PYTHON} ${PROG}"
+	echo 'ERROR: 失敗しました'
+	exit
+    fi
+}
+
 echo "ライブラリicsconvcsvの一括テストスクリプト。「MEMO:失敗で正常」とある場合は無視して問題ありません。"
 echo "ubuntu24.*ではfoldコマンドが日本語未対応のため、一部文字化けします。"
 
@@ -189,6 +265,14 @@ if [ ! -f ${PROG_NORMAL} ]; then
     exit
 fi
 
+for PROG in ${PROG_THREAD} ${PROG_MEMORY} ${PROG_GYOUMUNUM} ${PROG_DESCRIPTION} \
+	    ${PROG_PARALLEL} ${PROG_BATCH} ${PROG_TIMEFORMAT} ${PROG_TZID}; do
+    if [ ! -f ${PROG} ]; then
+	echo "ERROR: ファイル" ${PROG} "が存在しません。"
+	exit
+    fi
+done
+
 which nkf >& /dev/null
 
 retval=$?
@@ -256,6 +340,10 @@ echo "MEMO: 失敗で正常: UIDを修正しているため、一部復元に失
 cmp_ics "all" "ouc4-baduid" "ouc4"
 ERROR_TAIOU=stop
 
+echo
+echo "MEMO: 上書スケジュール(RECURRENCE-ID)とUIDの折り返し位置とパラメータが異なる例。期間指定あり。"
+cmp_ics "202606" "ouc4-folduid"
+
 echo
 echo "MEMO:Outlookで使える属性の調査。出力はCSV-Simple形式のみ調査。"
 cmp_ics "all" "ou10"
@@ -369,6 +457,13 @@ cmp_ics "--print-csv-header -Foutlookclassic all" "ga14" "ga14-ouc"
 cmp_ics "--print-csv-header -Foutlookclassic all" "ouc14" "ou14-ouc"
 cmp_ics "--print-csv-header -Foutlookclassic all" "ou14-us" "ou14-ouc"
 
+echo
+echo "MEMO: CSV書式をファイルで指定(--format-file)。-Fgaroonと同じ書式"
+
+cmp_ics "--print-csv-header --format-file=FORMAT/garoon.json -Cutf-8 all" "ou14" "ou14-ga"
+cmp_ics "--format-file=FORMAT/garoon.json -Cutf-8 -m all" "ou11" "ou11"
+cmp_ics "--format-file=FORMAT/garoon.json -Cutf-8 all" "ou16" "ou16"
+
 echo
 echo "MEMO: アメリカ東海岸(EDT)の時刻の確認"
 
@@ -398,6 +493,17 @@ echo "MEMO: RDATE関係"
 # 作業メモ「make gen-ouc-omitdes.csv」の出力がほぼ同等のはず。
 cmp_ics "-Fomitdescription all" "ouc17-limit2"
 
+echo
+echo "MEMO: 除外日(EXDATE)の行が複数ある(Garoon)"
+cmp_ics "-Fgaroon -Cutf-8 all" "ga19" "ga19"
+
+echo
+echo "MEMO: 同じTZID(Customized Time Zone)で定義が異なるICSファイル(日本/アメリカ東海岸)"
+cmp_ics "-Fgaroon -Cutf-8 all" "ouc20-jst" "ouc20-jst"
+cmp_ics "-Fgaroon -Cutf-8 all" "ouc20-est" "ouc20-est"
+echo "MEMO: 他のICSファイルで定義したTZIDとIANAのTimeZone名をVTIMEZONEなしで使用"
+cmp_ics "-Fgaroon -Cutf-8 all" "ouc20-notz" "ouc20-notz"
+
 echo
 echo "MEMO: 文字コード変換テスト(ICSファイル側にShift_JISに変換できない文字があると差分となる)"
 NKF=on
@@ -424,6 +530,44 @@ cmp_ics "-Fgaroon -Estrict all" "ouc18" "ou18"
 ERROR_TAIOU=stop
 NKF=off
 
+echo
+echo "MEMO: ライブラリの複数スレッドからの同時呼び出し。順番に変換した結果と比較。"
+run_prog ${PROG_THREAD}
+
+echo
+echo "MEMO: 同じTZIDを使うICSファイルを1個のプロセスで変換。別々に変換した結果と比較。"
+run_prog ${PROG_TZID}
+
+echo
+echo "MEMO: 変換結果のキャッシュ。キャッシュを使った時も警告などを同じように表示するか。"
+cmp_cache_log "all" "ouc4-baduid"
+cmp_cache_log "202607" "ouc4-baduid"
+cmp_cache_log "-TUS/Eastern all" "ou3"
+
+echo
+echo "MEMO: 繰返しスケジュールのSUMMARYやDESCRIPTIONを各行で共有しているか。メモリ使用量を比較。"
+run_prog ${PROG_MEMORY}
+
+echo
+echo "MEMO: 登録番号記入の拡張仕様。Description-Type1〜Type5の表と比較。"
+run_prog ${PROG_GYOUMUNUM}
+
+echo
+echo "MEMO: メモ欄のTeamsの会議インフォメーションと4行目以降の削除。表と比較。"
+run_prog ${PROG_DESCRIPTION}
+
+echo
+echo "MEMO: VEVENTが800個のICSファイルを複数プロセスで変換(-j)。-jなしの結果と比較。"
+run_prog ${PROG_PARALLEL}
+
+echo
+echo "MEMO: 一括変換(icsbatch.py)。フォルダ指定と一覧.csv指定。一覧の誤った行は失敗で正常。"
+run_prog ${PROG_BATCH}
+
+echo
+echo "MEMO: 日付と時刻の文字列への変換(TimeFormat)。strftime()の結果と比較。"
+run_prog ${PROG_TIMEFORMAT}
+
 echo
 echo "正常終了しました。"
 
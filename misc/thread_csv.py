@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- python -*-
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2026 MATSUMOTO Ryuji.
+# License: Apache License 2.0
+#
+import sys
+import os
+import glob
+import tempfile
+import concurrent.futures
+
+from testcommon import BASE, parse, convert, expected, finish
+
+__doc__="""
+スレッド並列実行の確認用。
+
+ICS/*.icsを、いくつかのオプションでlibicsconvcsv.ics2csv()を使って
+CSVに変換する。同じ変換を1個ずつ順番に行った結果と、
+ThreadPoolExecutorで同時に行った結果を比較する。
+
+同じTZIDで定義が異なるICS/ouc20-*.ics(README.tests.mdの1.8)は、さらに
+同時に何度も変換し、CSV/ouc20-*.csv(別々のプロセスで変換した結果)と
+比較する。
+
+一致すれば終了ステータス0、不一致があれば不一致のファイル名を表示して
+終了ステータス1。
+
+引数: スレッド数(省略時8)
+"""
+
+# 変換のオプション。キャッシュは使わない。
+OPTIONS = [
+    ["--no-cache"],
+    ["--no-cache", "-Fgaroon", "-Cutf-8", "-m", "-z"],
+    ["--no-cache", "-Fgaroon", "-Ereplace_geta"],
+    ["--no-cache", "-Fgaroon", "-Esimple"],
+    ["--no-cache", "--show-timezone", "-Fgaroon", "-Cutf-8"],
+    ["--no-cache", "-TUS/Eastern", "-Foutlookclassic"],
+]
+
+# 同じTZIDで定義が異なるICSファイルと、そのオプションと、同時に変換する回数
+TZID_NAMES = ["ouc20-est", "ouc20-jst", "ouc20-notz"]
+TZID_OPTIONS = ["--no-cache", "-Fgaroon", "-Cutf-8"]
+TZID_REPEAT = 8
+
+workers = 8
+if len(sys.argv) > 1:
+    workers = int(sys.argv[1])
+
+ics_list = []
+for ics in sorted(glob.glob(os.path.join(BASE, "ICS", "*.ics"))):
+    ics_list.append(ics)
+
+jobs = []
+for ics in ics_list:
+    for n, opt in enumerate(OPTIONS):
+        jobs.append((parse(opt, ics), ics, f"{os.path.basename(ics)[:-4]}-{n}.csv"))
+
+tzid_jobs = []
+for i in range(TZID_REPEAT):
+    for name in TZID_NAMES:
+        ics = os.path.join(BASE, "ICS", f"{name}.ics")
+        tzid_jobs.append((parse(TZID_OPTIONS, ics), ics, f"{name}-tzid{i}.csv"))
+
+def run(outdir: str, job: tuple) -> bytes:
+    """1個変換して、CSVの中身を返す。"""
+    flag, ics, csv_fname = job
+    return convert(flag, ics, os.path.join(outdir, csv_fname))
+
+with tempfile.TemporaryDirectory() as d1, tempfile.TemporaryDirectory() as d2:
+    serial = [run(d1, job) for job in jobs]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as ex:
+        parallel = list(ex.map(lambda job: run(d2, job), jobs))
+        tzid_parallel = list(ex.map(lambda job: run(d2, job), tzid_jobs))
+
+bad = 0
+for job, s, p in zip(jobs, serial, parallel):
+    if s != p:
+        print(f"ERROR: 不一致: {job[2]}")
+        bad += 1
+
+for job, p in zip(tzid_jobs, tzid_parallel):
+    with open(expected(os.path.basename(job[1])[:-4]), 'rb') as f:
+        if f.read() != p:
+            print(f"ERROR: 不一致: {job[2]}")
+            bad += 1
+
+finish(f"{len(jobs) + len(tzid_jobs)}件を{workers}スレッドで変換", bad)
+#EOF
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- python -*-
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2026 MATSUMOTO Ryuji.
+# License: Apache License 2.0
+#
+import sys
+import time
+import datetime
+import zoneinfo
+
+from testcommon import libicsconvcsv, finish
+
+__doc__="""
+日付と時刻の文字列への変換(TimeFormat)の確認用のマイクロベンチマーク。
+
+繰返しスケジュールの展開結果と同じように、同じ日付や時刻が何度も出て
+くる日時のlistを作り、TimeFormat.date()/time()と、毎回strftime()する
+場合の時間を表示する。日時はUTCからの差が変わるAmerica/New_Yorkの
+ローカルタイムで、夏時間の切り替わりの前後を含む。
+
+TimeFormatの結果が全てstrftime()と一致すれば終了ステータス0、
+そうでなければ不一致を表示して終了ステータス1。時間は表示のみで、
+速さでは失敗にしない。
+
+引数: 日時の数(省略時100000)
+"""
+
+count = 100000
+if len(sys.argv) > 1:
+    count = int(sys.argv[1])
+
+tz = zoneinfo.ZoneInfo("America/New_York")
+start = datetime.datetime(2026, 1, 1, 9, 0, tzinfo=tz)
+# 2年分を毎日、時刻は5通り。
+times = [start + datetime.timedelta(days=i % 730, minutes=30 * (i % 5)) for i in range(count)]
+# 夏時間の切り替わりで2回ある時刻(fold)
+times += [datetime.datetime(2026, 11, 1, 1, 30, tzinfo=tz, fold=f) for f in (0, 1)]
+
+def measure(f) -> float:
+    """timesの全ての日時をfで変換した時間(秒)を返す。"""
+    t = time.perf_counter()
+    for d in times:
+        f(d)
+    return time.perf_counter() - t
+
+bad = 0
+for date_time_format in libicsconvcsv.DateTimeFormat:
+    for with_tz in (False, True):
+        tf = libicsconvcsv.TimeFormat(date_time_format, with_tz)
+        time_f = tf.time_f + ("%z" if with_tz else "")
+
+        for d in times:
+            if tf.date(d) != d.strftime(tf.date_f) or tf.time(d, with_tz) != d.strftime(time_f):
+                print(f"ERROR: {date_time_format.name} {with_tz}: {d}")
+                bad += 1
+                break
+
+        memo = measure(lambda d: (tf.date(d), tf.time(d, with_tz)))
+        plain = measure(lambda d: (d.strftime(tf.date_f), d.strftime(time_f)))
+        print(f"INFO: {date_time_format.name:9} %z={with_tz!s:5}: " \
+              f"TimeFormat {memo / len(times) * 1e6:.2f}us, strftime {plain / len(times) * 1e6:.2f}us")
+
+finish(f"{len(times)}個の日時", bad)
+#EOF
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- python -*-
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2026 MATSUMOTO Ryuji.
+# License: Apache License 2.0
+#
+import os
+import tempfile
+
+from testcommon import BASE, parse, convert, expected, finish
+
+__doc__="""
+同じTZIDで定義が異なるICSファイルの確認用。
+
+ICS/ouc20-jst.icsとICS/ouc20-est.icsは、どちらもTZIDが
+"Customized Time Zone"で、時差が異なる(+0900と-0500/-0400)。
+ICS/ouc20-notz.icsは、VTIMEZONEに無いそのTZIDとIANAのTimeZone名を
+使う。1個のプロセスでこれらをlibicsconvcsv.ics2csv()で変換し、
+CSV/ouc20-*.csv(別々のプロセスで変換した結果)と比較する。変換の順番を
+入れ替えて2回行う。
+
+vobjectのTZIDの登録はプロセス全体で共有していて、先に変換したICSファイル
+の定義が残る。その定義を使うと、後に変換したICSファイルの時刻がずれる。
+VTIMEZONEの無いTZIDも、先に変換したICSファイルの定義になる。
+
+一致すれば終了ステータス0、不一致があれば不一致のファイル名を表示して
+終了ステータス1。
+"""
+
+# ouc20-est.icsを先にする。ouc20-jst.icsの定義(+0900)が残っても
+# ouc20-notz.icsの時刻は変わらない。
+NAMES = ["ouc20-est", "ouc20-jst", "ouc20-notz"]
+# 変換のオプション。キャッシュは使わない。
+OPTIONS = ["--no-cache", "-Fgaroon", "-Cutf-8"]
+
+def run(outdir: str, name: str) -> bytes:
+    """1個変換して、CSVの中身を返す。"""
+    ics = os.path.join(BASE, "ICS", f"{name}.ics")
+    return convert(parse(OPTIONS, ics), ics, os.path.join(outdir, f"{name}.csv"))
+
+bad = 0
+for order in (NAMES, NAMES[::-1]):
+    with tempfile.TemporaryDirectory() as d:
+        for name in order:
+            with open(expected(name), 'rb') as f:
+                expect = f.read()
+            if run(d, name) != expect:
+                print(f"ERROR: 不一致: {name} (順番: {', '.join(order)})")
+                bad += 1
+
+finish(f"同じTZIDを使う{len(NAMES)}個のICSファイルを順番を変えて変換", bad)
+#EOF